@@ -0,0 +1,173 @@
+import math
+import os
+
+import numpy as np
+
+# Adaptive interview engine. A candidate has an overall ability and each skill sits around it
+# (ability_skill = overall + offset, offset ~ N(0, ADAPTIVE_SKILL_SPREAD)); each level is a Rasch / 1PL IRT
+# item of known difficulty. Posteriors are computed exactly on a grid over the overall ability, so an
+# answer on one skill also informs the others. Candidates are compared on their mean ability over the
+# resume's skills: the next question is the skill and level expected to shrink its variance the most, and
+# the interview stops once its SD reaches ADAPTIVE_TARGET_SD or the question budget runs out.
+ADAPTIVE_INTERVIEW = os.getenv("ADAPTIVE_INTERVIEW", "1") == "1"
+ADAPTIVE_TARGET_SD = float(os.getenv("ADAPTIVE_TARGET_SD", "0.5"))
+ADAPTIVE_MAX_QUESTIONS = int(os.getenv("ADAPTIVE_MAX_QUESTIONS", "18"))
+ADAPTIVE_MAX_PER_SKILL = int(os.getenv("ADAPTIVE_MAX_PER_SKILL", "3"))
+ADAPTIVE_SKILL_SPREAD = float(os.getenv("ADAPTIVE_SKILL_SPREAD", "0.7"))
+
+LEVELS = ('easy', 'normal', 'hard')
+# Item difficulty of each level on the ability scale
+LEVEL_DIFFICULTY = {'easy': -1.0, 'normal': 0.0, 'hard': 1.0}
+# Chance an answer is judged against the candidate's ability (a lucky guess or a slip), so no single
+# answer is decisive
+SLIP = 0.1
+GRID = np.linspace(-4.0, 4.0, 161)
+PRIOR = np.exp(-GRID ** 2 / 2)
+PRIOR /= PRIOR.sum()
+
+
+# Function to return P(relevant answer) for each ability on the grid
+def p_relevant(level, grid=GRID):
+    return SLIP / 2 + (1 - SLIP) / (1 + np.exp(-(grid - LEVEL_DIFFICULTY[level])))
+
+
+# Function to build the overall-to-skill kernel: row g is the density of a skill's ability given overall g
+def skill_kernel(spread):
+    return np.exp(-(GRID[None, :] - GRID[:, None]) ** 2 / (2 * spread ** 2))
+
+
+# The answers given on one skill, as a likelihood over that skill's ability
+class SkillEstimate:
+    def __init__(self, skill, kernel):
+        self.skill = skill
+        self.likelihood = np.ones_like(GRID)
+        self.answers = []
+        # Set when no question can be found for the skill
+        self.closed = False
+        self.mass, self.mean, self.variance = conditional(kernel, self.likelihood)
+
+    def update(self, kernel, level, relevant):
+        likelihood = p_relevant(level)
+        self.likelihood = self.likelihood * (likelihood if relevant else 1 - likelihood)
+        self.mass, self.mean, self.variance = conditional(kernel, self.likelihood)
+        self.answers.append((level, bool(relevant)))
+
+
+# Function to return, for each overall ability g, the evidence of a skill's answers and the mean and variance
+# of the skill's ability given g
+def conditional(kernel, likelihood):
+    mass = kernel @ likelihood
+    mean = (kernel @ (likelihood * GRID)) / mass
+    second = (kernel @ (likelihood * GRID ** 2)) / mass
+    return mass, mean, np.maximum(second - mean ** 2, 0.0)
+
+
+# One interview over a list of skills: ask next_question(), grade the answer, then record() it
+class AdaptiveInterview:
+    def __init__(self, skills, target_sd=None, max_questions=None, max_per_skill=None, spread=None):
+        self.kernel = skill_kernel(ADAPTIVE_SKILL_SPREAD if spread is None else spread)
+        self.estimates = {skill: SkillEstimate(skill, self.kernel) for skill in dict.fromkeys(skills)}
+        self.target_sd = ADAPTIVE_TARGET_SD if target_sd is None else target_sd
+        self.max_questions = ADAPTIVE_MAX_QUESTIONS if max_questions is None else max_questions
+        self.max_per_skill = ADAPTIVE_MAX_PER_SKILL if max_per_skill is None else max_per_skill
+        # Posterior over the overall ability
+        self.overall = PRIOR.copy()
+        self.asked = 0
+
+    # Mean ability over the skills given g, and its variance given g (both 0 with no skills)
+    def _mean_ability(self):
+        if not self.estimates:
+            return np.zeros_like(GRID), np.zeros_like(GRID)
+        count = len(self.estimates)
+        mean = sum(estimate.mean for estimate in self.estimates.values()) / count
+        variance = sum(estimate.variance for estimate in self.estimates.values()) / count ** 2
+        return mean, variance
+
+    @staticmethod
+    def _total_variance(weights, mean, variance):
+        centre = float(weights @ mean)
+        return float(weights @ (variance + mean ** 2)) - centre ** 2
+
+    # Function to return the variance of the mean ability expected after asking this skill at this level
+    def expected_variance(self, skill, level):
+        estimate = self.estimates[skill]
+        mean, variance = self._mean_ability()
+        count = max(1, len(self.estimates))
+        likelihood = p_relevant(level)
+        expected = 0.0
+        for outcome in (likelihood, 1 - likelihood):
+            mass, skill_mean, skill_variance = conditional(self.kernel, estimate.likelihood * outcome)
+            ratio = mass / estimate.mass
+            probability = float(self.overall @ ratio)
+            expected += probability * self._total_variance(
+                self.overall * ratio / probability, mean + (skill_mean - estimate.mean) / count,
+                variance + (skill_variance - estimate.variance) / count ** 2)
+        return expected
+
+    @property
+    def sd(self):
+        if not self.estimates:
+            return 0.0
+        return math.sqrt(max(0.0, self._total_variance(self.overall, *self._mean_ability())))
+
+    # Function to pick the (skill, level) with the largest expected variance reduction, or None when done
+    def next_question(self):
+        if not self.estimates or self.asked >= self.max_questions or self.sd <= self.target_sd:
+            return None
+        variance = self.sd ** 2
+        best, best_gain = None, 0.0
+        for skill, estimate in self.estimates.items():
+            if estimate.closed or len(estimate.answers) >= self.max_per_skill:
+                continue
+            for level in LEVELS:
+                gain = variance - self.expected_variance(skill, level)
+                if gain > best_gain:
+                    best, best_gain = (skill, level), gain
+        return best
+
+    def record(self, skill, level, relevant):
+        estimate = self.estimates[skill]
+        before = estimate.mass
+        estimate.update(self.kernel, level, relevant)
+        ratio = estimate.mass / before
+        self.overall = self.overall * ratio / float(self.overall @ ratio)
+        self.asked += 1
+
+    # Function to stop asking about a skill, e.g. when no question could be generated for it
+    def close(self, skill):
+        self.estimates[skill].closed = True
+
+    @property
+    def finished(self):
+        return self.next_question() is None
+
+    # Function to return one skill's ability estimate and SD, averaging its conditional over the overall posterior
+    def skill_estimate(self, skill):
+        estimate = self.estimates[skill]
+        mean = float(self.overall @ estimate.mean)
+        variance = float(self.overall @ (estimate.variance + estimate.mean ** 2)) - mean ** 2
+        return mean, math.sqrt(max(0.0, variance))
+
+    # Function to name the hardest level the candidate is more likely than not to answer well
+    @staticmethod
+    def proficiency(ability):
+        passed = [level for level in LEVELS if ability >= LEVEL_DIFFICULTY[level]]
+        return passed[-1] if passed else 'below easy'
+
+    # Function to report each skill's estimate, strongest first
+    def summary(self):
+        rows = []
+        for skill, estimate in self.estimates.items():
+            mean, sd = self.skill_estimate(skill)
+            rows.append({'skill': skill, 'ability': round(mean, 3), 'sd': round(sd, 3),
+                         'questions': len(estimate.answers), 'proficiency': self.proficiency(mean)})
+        return sorted(rows, key=lambda row: row['ability'], reverse=True)
+
+    # Mean ability over the resume's skills, the figure candidates are ranked on
+    @property
+    def ability(self):
+        return float(self.overall @ self._mean_ability()[0])
+
+    # Function to turn the mean ability into a 0-10 score
+    def overall_score(self):
+        return max(0, min(10, round(10 / (1 + math.exp(-self.ability)))))
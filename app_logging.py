@@ -0,0 +1,132 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Fields bound to everything logged in the current request, job or interview (request_id, interview_id, ...)
+_context = contextvars.ContextVar('log_context', default={})
+_lock = threading.Lock()
+_listener = None
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is logged as a field
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+# One JSON object per line: time, level, logger, message, bound context and any extra fields
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'context', None) or {})
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != 'context':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# Human-readable alternative for local runs (LOG_FORMAT=text)
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        context = getattr(record, 'context', None)
+        if context:
+            line += " " + " ".join(f"{key}={value}" for key, value in context.items())
+        return line
+
+
+# Queue handler that never blocks the caller: context is captured here, and records are dropped
+# (and counted) if the writer thread falls behind by more than LOG_QUEUE_SIZE records
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.context = dict(_context.get())
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Function to route all logging through a background writer thread. Safe to call more than once;
+# reads LOG_LEVEL (default INFO), LOG_FORMAT (json or text) and LOG_QUEUE_SIZE at the first call.
+def configure():
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(TextFormatter() if os.getenv("LOG_FORMAT", "json") == "text" else JsonFormatter())
+
+        root = logging.getLogger()
+        root.handlers = [NonBlockingQueueHandler(log_queue)]
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+# Function for scripts: configure logging once and return a named logger.
+# Shared modules use logging.getLogger(__name__) and inherit this configuration.
+def get_logger(name):
+    configure()
+    return logging.getLogger(name)
+
+
+# Usage: with app_logging.bind(interview_id=session_id): ...
+@contextmanager
+def bind(**fields):
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+# Function to tag every record of a Flask request with a request id (from X-Request-ID or a new one)
+def init_app(app):
+    from flask import g, request
+
+    @app.before_request
+    def _bind_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.log_token = _context.set({**_context.get(), 'request_id': g.request_id})
+
+    @app.after_request
+    def _return_request_id(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(error=None):
+        token = g.pop('log_token', None)
+        if token is not None:
+            try:
+                _context.reset(token)
+            except ValueError:
+                pass
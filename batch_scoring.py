@@ -0,0 +1,139 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+DATABASE_NAME = 'resume_analysis'
+UNKNOWN_LEVEL = 'unknown'
+
+# Only the fields scoring needs; covers both the nested 'questions' layout and the flat one
+PROJECTION = {
+    '_id': 0, 'skill': 1, 'level': 1, 'relevant': 1,
+    'questions.level': 1, 'questions.relevant': 1,
+}
+
+
+# Columnar view of every graded answer: integer codes per answer plus the label arrays they index
+class AnswerTable:
+    def __init__(self, candidate_codes, skill_codes, level_codes, relevant, candidates, skills, levels):
+        self.candidate_codes = candidate_codes
+        self.skill_codes = skill_codes
+        self.level_codes = level_codes
+        self.relevant = relevant
+        self.candidates = candidates
+        self.skills = skills
+        self.levels = levels
+
+    def __len__(self):
+        return len(self.relevant)
+
+
+# Function to encode raw per-answer columns into an AnswerTable
+def answers_from_columns(candidates, skills, levels, relevant):
+    candidate_codes, candidate_labels = pd.factorize(pd.Series(candidates, dtype=object), sort=True)
+    skill_codes, skill_labels = pd.factorize(pd.Series(skills, dtype=object), sort=True)
+    level_codes, level_labels = pd.factorize(pd.Series(levels, dtype=object), sort=True)
+    return AnswerTable(
+        candidate_codes.astype(np.int64), skill_codes.astype(np.int64), level_codes.astype(np.int64),
+        np.asarray(relevant, dtype=np.int8),
+        np.asarray(candidate_labels, dtype=object), np.asarray(skill_labels, dtype=object),
+        np.asarray(level_labels, dtype=object),
+    )
+
+
+# Function to read every graded answer for the given people (default: all collections) in one projected scan each
+def load_answers(client, person_ids=None, database=DATABASE_NAME):
+    db = client[database]
+    person_ids = person_ids or db.list_collection_names()
+    candidates, skills, levels, relevant = [], [], [], []
+    for person_id in person_ids:
+        for document in db[person_id].find({}, PROJECTION):
+            skill = document.get('skill') or 'unknown'
+            for entry in document.get('questions') or [document]:
+                if entry.get('relevant') is None:
+                    continue
+                candidates.append(person_id)
+                skills.append(skill)
+                levels.append((entry.get('level') or document.get('level') or UNKNOWN_LEVEL).lower())
+                relevant.append(bool(entry['relevant']))
+    return answers_from_columns(candidates, skills, levels, relevant)
+
+
+# Relevance ratio and answer count for every (group) code with vectorised bincounts
+def _group_scores(codes, relevant, size):
+    answers = np.bincount(codes, minlength=size)
+    hits = np.bincount(codes, weights=relevant, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(answers > 0, hits / np.maximum(answers, 1), np.nan)
+    return answers, hits.astype(np.int64), ratio
+
+
+def _pair_scores(table, codes, labels, column):
+    n_candidates, n_groups = len(table.candidates), len(labels)
+    pair = table.candidate_codes * n_groups + codes
+    answers, hits, ratio = _group_scores(pair, table.relevant, n_candidates * n_groups)
+    present = np.flatnonzero(answers)
+    return pd.DataFrame({
+        'person_id': table.candidates[present // n_groups],
+        column: labels[present % n_groups],
+        'answers': answers[present],
+        'relevant': hits[present],
+        'score': np.round(ratio[present] * 100, 2),
+    })
+
+
+# Function to compute per-candidate, per-skill and per-difficulty scores with percentiles and rankings
+def score_answers(table):
+    n_candidates = len(table.candidates)
+    answers, hits, ratio = _group_scores(table.candidate_codes, table.relevant, n_candidates)
+    score = ratio * 100
+
+    # Rank by score, then by number of answers so a 10/10 outranks a 1/1
+    order = np.lexsort((-answers, -score))
+    rank = np.empty(n_candidates, dtype=np.int64)
+    rank[order] = np.arange(1, n_candidates + 1)
+    percentile = pd.Series(score).rank(pct=True, method='max').to_numpy() * 100
+
+    candidates = pd.DataFrame({
+        'person_id': table.candidates,
+        'answers': answers,
+        'relevant': hits,
+        'score': np.round(score, 2),
+        'percentile': np.round(percentile, 2),
+        'rank': rank,
+    }).sort_values('rank', kind='stable').reset_index(drop=True)
+
+    return {
+        'candidates': candidates,
+        'skills': _pair_scores(table, table.skill_codes, table.skills, 'skill'),
+        'levels': _pair_scores(table, table.level_codes, table.levels, 'level'),
+    }
+
+
+# Function to write each score table to <directory>/<name>.parquet (requires pyarrow or fastparquet)
+def export_parquet(scores, directory):
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, frame in scores.items():
+        paths[name] = os.path.join(directory, f"{name}.parquet")
+        frame.to_parquet(paths[name], index=False)
+    return paths
+
+
+# Usage: python batch_scoring.py <output-directory>
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    output_directory = sys.argv[1] if len(sys.argv) > 1 else 'scores'
+    client = MongoClient(os.getenv("MONGO_URI"))
+    scores = score_answers(load_answers(client))
+    print(scores['candidates'].head(20).to_string(index=False))
+    for name, path in export_parquet(scores, output_directory).items():
+        print(f"Wrote {name} scores to {path}")
+
+
+if __name__ == "__main__":
+    main()
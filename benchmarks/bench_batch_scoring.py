@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import batch_scoring
+
+SKILLS = np.array(['Python', 'Java', 'SQL', 'React', 'Docker', 'AWS', 'Git', 'Linux', 'HR'], dtype=object)
+LEVELS = np.array(['easy', 'normal', 'hard'], dtype=object)
+
+
+# Builds an AnswerTable directly from codes, as load_answers would after its scan
+def synthetic_table(answers, candidates, seed=0):
+    rng = np.random.default_rng(seed)
+    level_codes = rng.integers(0, len(LEVELS), answers)
+    ability = rng.beta(4, 2, candidates)
+    candidate_codes = rng.integers(0, candidates, answers)
+    relevant = rng.random(answers) < ability[candidate_codes] - 0.15 * level_codes
+    return batch_scoring.AnswerTable(
+        candidate_codes, rng.integers(0, len(SKILLS), answers), level_codes, relevant.astype(np.int8),
+        np.array([f"candidate{i:06d}" for i in range(candidates)], dtype=object), SKILLS, LEVELS,
+    )
+
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    print(f"{label}: {time.perf_counter() - started:.3f}s")
+    return result
+
+
+def main():
+    answers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    table = timed(f"build {answers:,} answers", synthetic_table, answers, answers // 20)
+    scores = timed("score", batch_scoring.score_answers, table)
+    print(scores['candidates'].head(5).to_string(index=False))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = timed("export parquet", batch_scoring.export_parquet, scores, directory)
+            for name, path in paths.items():
+                print(f"{name}: {os.path.getsize(path):,} bytes")
+    except ImportError as e:
+        print(f"Skipping parquet export: {e}")
+
+
+if __name__ == "__main__":
+    main()
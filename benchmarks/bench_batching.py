@@ -0,0 +1,78 @@
+import json
+import re
+import time
+
+import llm_gateway
+import question_batch
+from benchmarks.fakes import FakeModel
+
+RESUME_SKILLS = ['Python', 'Java', 'SQL', 'React', 'Docker', 'AWS', 'Git', 'Linux']
+QUESTIONS_PER_SKILL_PROMPT = 10
+
+
+# Rough token estimate (~4 characters per token) used for both prompts and replies
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+# Answers batched prompts with JSON and single-skill prompts with a plain question list
+def responder(prompt):
+    match = re.search(r'Skills: (\[.*\])', prompt)
+    if match:
+        skills = json.loads(match.group(1))
+        return json.dumps({
+            skill: {level: f"{level.title()} question about {skill}?" for level in question_batch.LEVELS}
+            for skill in skills
+        })
+    skill = re.search(r"skill '([^']+)'", prompt).group(1)
+    return "\n".join(f"{i}. Question {i} about {skill}?" for i in range(1, QUESTIONS_PER_SKILL_PROMPT + 1))
+
+
+# Fixed round trip plus time proportional to the generated text
+def latency(prompt, reply):
+    return 0.05 + 0.0002 * len(reply)
+
+
+def single_skill(gateway, model, skill):
+    prompt = (
+        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
+        f"Only list clear, direct questions without any extra text."
+    )
+    text = gateway.generate(model, prompt)
+    questions = [q for q in text.split('\n') if q.strip().endswith('?')]
+    return questions[:1], questions[1:2], questions[2:3]
+
+
+def run(batched, skills=RESUME_SKILLS, batch_size=5):
+    model = FakeModel(latency=latency, responder=responder)
+    gateway = llm_gateway.LLMGateway(requests_per_minute=60000, burst=100)
+    started = time.perf_counter()
+    if batched:
+        question_batch.generate_batched_questions(
+            skills, lambda prompt: gateway.generate(model, prompt),
+            lambda skill: single_skill(gateway, model, skill), batch_size=batch_size)
+    else:
+        for skill in skills:
+            single_skill(gateway, model, skill)
+    elapsed = time.perf_counter() - started
+    return {
+        'batched': batched,
+        'skills': len(skills),
+        'llm_calls': model.call_count,
+        'prompt_tokens': sum(estimate_tokens(p) for p in model.prompts),
+        'response_tokens': sum(estimate_tokens(r) for r in model.replies),
+        'wall_seconds': round(elapsed, 3),
+    }
+
+
+def main():
+    baseline, batched = run(False), run(True)
+    print(baseline)
+    print(batched)
+    for field in ('llm_calls', 'prompt_tokens', 'response_tokens', 'wall_seconds'):
+        saved = 1 - batched[field] / baseline[field]
+        print(f"{field}: {saved:.0%} fewer per resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+# The cache and the question bank read their paths at import time
+_directory = tempfile.mkdtemp()
+os.environ['LLM_CACHE_PATH'] = os.path.join(_directory, 'llm_cache.db')
+os.environ['QUESTION_BANK_PATH'] = os.path.join(_directory, 'question_bank.db')
+
+import llm_cache  # noqa: E402
+import llm_gateway  # noqa: E402
+import prompts  # noqa: E402
+import question_bank  # noqa: E402
+from benchmarks.fakes import FakeModel, interview_responder  # noqa: E402
+
+SKILLS = ['Python', 'Java', 'SQL', 'React', 'Docker', 'AWS', 'Kubernetes', 'Machine Learning']
+TEMPLATES = ("What is {s}?", "How do you debug a problem in a {s} project?", "How do you test code that uses {s}?",
+             "What trade-offs do you consider when choosing {s}?", "How would you scale a service built with {s}?")
+
+
+def question_pool():
+    return [template.format(s=skill) for skill in SKILLS for template in TEMPLATES]
+
+
+# Each candidate answers `questions` questions drawn from the pool (popular ones more often); every answer
+# costs a reference answer and a grading call, as analyze_answer does when the prefilter cannot decide
+def cohort(gateway, model, pool, candidates, questions, rng, fresh=False):
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    started = time.perf_counter()
+    for candidate in range(candidates):
+        for question in rng.choices(pool, weights, k=questions):
+            gateway.generate(model, prompts.render('reference_answer', question=question), fresh=fresh)
+            answer = f"candidate {candidate} explains {question.lower()} with an example"
+            gateway.generate(model, prompts.render('relevance', question=question, answer=answer), fresh=fresh)
+    return time.perf_counter() - started
+
+
+def report(label, model, calls_before, seconds, answers, latency):
+    calls = model.call_count - calls_before
+    print(f"{label:<28}{calls:>8}{calls / answers:>12.2f}{seconds:>9.2f}{calls * latency:>12.0f}")
+
+
+# Usage: python -m benchmarks.bench_cache [candidates] [questions per candidate]
+def main():
+    candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    questions = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+    # Typical Gemini latency, used to turn avoided calls into seconds; the fake itself answers instantly
+    latency = 2.0
+    pool = question_pool()
+    model = FakeModel(latency=0, responder=interview_responder)
+    gateway = llm_gateway.LLMGateway(requests_per_minute=10 ** 7, burst=10 ** 6)
+    llm_gateway.set_gateway(gateway)
+    answers = candidates * questions
+    print(f"{candidates} candidates x {questions} answers, {len(pool)} distinct questions, "
+          f"store {llm_cache.LLM_CACHE_PATH}")
+    print(f"{'run':<28}{'calls':>8}{'per answer':>12}{'wall s':>9}{'model s est':>12}")
+
+    before = model.call_count
+    seconds = cohort(gateway, model, pool, candidates, questions, random.Random(1), fresh=True)
+    report("no cache", model, before, seconds, answers, latency)
+    # fresh=True still stores its responses; start the cached runs from an empty store
+    llm_cache.purge(now=float('inf'))
+    llm_cache.cache.clear_memory()
+
+    before = model.call_count
+    seconds = cohort(gateway, model, pool, candidates, questions, random.Random(2))
+    report("cold cache", model, before, seconds, answers, latency)
+
+    # A new process: only the on-disk tier survives
+    llm_cache.cache.clear_memory()
+    before = model.call_count
+    seconds = cohort(gateway, model, pool, candidates, questions, random.Random(3))
+    report("restart (disk tier only)", model, before, seconds, answers, latency)
+
+    stats = llm_cache.get_stats()
+    print(f"hit rate {stats['hit_rate']:.1%} (memory {stats['memory_hits']}, disk {stats['disk_hits']}, "
+          f"misses {stats['misses']})")
+    for template, entry in sorted(stats['templates'].items()):
+        print(f"  {template:<22} hits {entry['hits']:>6}  misses {entry['misses']:>6}")
+
+    # Warming: bank the pool, precompute its reference answers, then measure lookups
+    question_bank.add_questions('bench', [('normal', question, None) for question in pool])
+    generated, cached, failed = llm_cache.warm(model)
+    print(f"warm: {generated} generated, {cached} already cached, {failed} failed")
+    key = llm_gateway.cache_key(model, prompts.render('reference_answer', question=pool[0]))
+    for label, clear in (("memory hit", False), ("disk hit", True)):
+        started = time.perf_counter()
+        for _ in range(1000):
+            if clear:
+                llm_cache.cache.clear_memory()
+            llm_cache.get(key)
+        print(f"{label}: {(time.perf_counter() - started) * 1000:.0f}us per lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+import threading
+import time
+
+import llm_gateway
+from benchmarks.fakes import FakeModel
+
+HR_PROMPT = (
+    "Generate a list of HR-related interview questions that evaluate communication skills, "
+    "teamwork, conflict resolution, and leadership."
+)
+SKILLS = ['Python', 'Java', 'SQL', 'React', 'Docker', 'AWS']
+
+
+# Same prompt shape the routes send for a skill
+def skill_prompt(skill):
+    return (
+        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
+        f"Only list clear, direct questions without any extra text."
+    )
+
+
+# Each simulated interview start asks for the HR set and questions for two resume skills
+def start_interview(gateway, model, rng):
+    gateway.generate(model, HR_PROMPT, coalesce=True)
+    for skill in rng.sample(SKILLS, 2):
+        gateway.generate(model, skill_prompt(skill), coalesce=True)
+
+
+def run(interviews=200, latency=0.2, coalesce=True, seed=7):
+    model = FakeModel(latency=latency)
+    gateway = llm_gateway.LLMGateway(requests_per_minute=60000, burst=interviews * 3)
+    if not coalesce:
+        gateway.flight.do = lambda key, fn, ttl=0.0: (fn(), llm_gateway.SingleFlight.LEADER)
+
+    barrier = threading.Barrier(interviews)
+
+    def worker(index):
+        barrier.wait()
+        start_interview(gateway, model, random.Random(seed + index))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(interviews)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    metrics = gateway.metrics.snapshot()
+    return {
+        'coalesce': coalesce,
+        'interviews': interviews,
+        'requests': metrics['requests'],
+        'model_calls': model.call_count,
+        'coalesced': metrics['coalesced'],
+        'shared_hits': metrics['shared_hits'],
+        'elapsed_seconds': round(elapsed, 3),
+    }
+
+
+def main():
+    for coalesce in (False, True):
+        result = run(coalesce=coalesce)
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
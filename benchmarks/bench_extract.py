@@ -0,0 +1,96 @@
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import ocr
+import pdf_extract
+import skill_matcher
+from benchmarks.resume_corpus import load_corpus
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Peak resident set size: VmHWM where /proc exists (ru_maxrss survives exec, so a spawned child would
+# report its parent's peak), ru_maxrss elsewhere
+def max_rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+# Runs in a fresh process per backend so RSS peaks do not bleed between backends.
+# RSS growth includes loading the backend's library; tracemalloc only sees Python allocations,
+# so the C backend's own memory shows up in RSS alone.
+def measure(backend, repeat):
+    # Text layers only; OCR has its own benchmark
+    ocr.OCR_ENABLED = False
+    corpus = load_corpus()
+    baseline_rss = max_rss_mb()
+    pdf_extract.extract_text(corpus[0][0], backend)
+
+    pages = empty_pages = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path, _expected in corpus:
+            for text in pdf_extract.extract_pages(path, backend):
+                pages += 1
+                empty_pages += not text.strip()
+    elapsed = time.perf_counter() - started
+    peak_rss = max_rss_mb()
+
+    found = expected_total = extra = 0
+    tracemalloc.start()
+    for path, expected in corpus:
+        skills = skill_matcher.find_skills(pdf_extract.extract_text(path, backend))
+        expected = set(expected['skills'])
+        found += len(skills & expected)
+        expected_total += len(expected)
+        extra += len(skills - expected)
+    python_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+
+    return {
+        'backend': backend,
+        'pages_per_second': pages / elapsed,
+        'seconds': elapsed,
+        'empty_pages': empty_pages // repeat,
+        'python_peak_mb': python_peak,
+        'rss_growth_mb': None if peak_rss is None else peak_rss - baseline_rss,
+        'recall': found / expected_total if expected_total else 0.0,
+        'extra_skills': extra,
+    }
+
+
+# Usage: python -m benchmarks.bench_extract [repeat] [backend ...]
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    backends = sys.argv[2:] or pdf_extract.available_backends()
+    corpus = load_corpus()
+    print(f"{len(corpus)} resumes, {sum(expected['pages'] for _, expected in corpus)} pages, x{repeat}")
+    print(f"auto selects: {pdf_extract.get_backend('auto').name}")
+    print(f"{'backend':<12}{'pages/s':>9}{'empty':>7}{'py peak MB':>12}{'RSS +MB':>9}{'recall':>8}{'extra':>7}")
+    context = multiprocessing.get_context('spawn')
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(measure, backend, repeat).result()
+        rss = 'n/a' if result['rss_growth_mb'] is None else f"{result['rss_growth_mb']:.1f}"
+        print(f"{backend:<12}{result['pages_per_second']:>9.1f}{result['empty_pages']:>7}"
+              f"{result['python_peak_mb']:>12.1f}{rss:>9}{result['recall']:>8.3f}{result['extra_skills']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import random
+import sys
+import tempfile
+
+# The question bank and the response cache read their paths at import time
+_directory = tempfile.mkdtemp()
+os.environ['QUESTION_BANK_PATH'] = os.path.join(_directory, 'question_bank.db')
+os.environ['LLM_CACHE_PATH'] = os.path.join(_directory, 'llm_cache.db')
+
+import hr_interview  # noqa: E402
+import llm_gateway  # noqa: E402
+import prompts  # noqa: E402
+import reference_answers  # noqa: E402
+import relevance_filter  # noqa: E402
+from benchmarks.fakes import FakeModel, interview_responder  # noqa: E402
+
+# Candidate answers: brief on-topic, detailed on-topic and off-topic, in that order of likelihood
+BRIEF = "I enjoy working in a team and I always help my colleagues when they need it"
+DETAILED = (
+    "In my last project our team disagreed about the release plan, so I set up a short meeting, listed the risks of "
+    "each option, and we agreed to ship the smaller change first. I followed up with the people who had doubts, "
+    "shared the monitoring results after the release, and we used the same approach for the next two releases."
+)
+OFF_TOPIC = "I mostly write Python scripts for data cleaning"
+
+
+def calls_by_template(before):
+    after = prompts.get_stats()
+    return {key: entry['calls'] - before.get(key, {}).get('calls', 0) for key, entry in after.items()
+            if entry['calls'] - before.get(key, {}).get('calls', 0)}
+
+
+# Usage: python -m benchmarks.bench_hr [candidates]
+def main():
+    candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(5)
+    model = FakeModel(latency=0, responder=interview_responder)
+    llm_gateway.set_gateway(llm_gateway.LLMGateway(requests_per_minute=10 ** 7, burst=10 ** 6))
+
+    def generate(prompt):
+        return llm_gateway.generate(model, prompt).strip()
+
+    def ask(label, question):
+        return rng.choices((BRIEF, DETAILED, OFF_TOPIC), (0.4, 0.4, 0.2))[0]
+
+    # The grading path of analyze_answer, as the scripts run it for HR answers
+    def grade(question, answer):
+        reference, context_vector = reference_answers.answer_for(model, question, generate)
+        verdict, _ = relevance_filter.prefilter(question, answer, reference, context_vector=context_vector)
+        if verdict is None:
+            verdict = generate(prompts.render('relevance', question=question, answer=answer)) == 'Yes'
+        return verdict
+
+    before, calls = prompts.get_stats(), model.call_count
+    answers = sum(len(hr_interview.run_round('Acme', ask, grade, generate)) for _ in range(candidates))
+    stats = hr_interview.get_stats()
+    print(f"{candidates} HR rounds of {hr_interview.HR_QUESTION_COUNT} pooled questions, {answers} graded answers")
+    print(f"model calls: {model.call_count - calls} ({(model.call_count - calls) / candidates:.2f} per round)")
+    for key, count in sorted(calls_by_template(before).items()):
+        print(f"  {key:<24}{count:>6}")
+    # Before the pools every round generated its own questions with one call
+    print(f"question generation: {stats['pool_fills']} pool fills for {stats['drawn']} questions drawn "
+          f"(one call per round before: {candidates})")
+    print(f"follow-ups asked: {stats['follow_ups']}, skipped for detailed answers: {stats['follow_ups_skipped']} "
+          f"(always following up: {candidates * hr_interview.HR_QUESTION_COUNT})")
+
+
+if __name__ == "__main__":
+    main()
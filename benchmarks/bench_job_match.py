@@ -0,0 +1,69 @@
+import sys
+import time
+
+import numpy as np
+
+import job_matching
+import skill_matcher
+
+JOB_DESCRIPTION = """Backend Engineer
+Requirements:
+- Python and SQL in production
+- Docker, Kubernetes and AWS
+- REST API design with Flask or FastAPI
+Nice to have:
+- React, TypeScript
+- Big Data experience is a plus
+"""
+
+
+# Synthetic onboarded profiles: 3-15 skills each from the matcher's vocabulary, some popular ones more often
+def synthetic_profiles(count, seed=0):
+    rng = np.random.default_rng(seed)
+    skills = np.asarray(skill_matcher.default_matcher.skills, dtype=object)
+    popularity = rng.pareto(1.5, len(skills)) + 1
+    popularity /= popularity.sum()
+    return [(f"candidate{index:06d}", list(rng.choice(skills, rng.integers(3, 16), replace=False, p=popularity)))
+            for index in range(count)]
+
+
+# Baseline: one set intersection per candidate in Python
+def loop_scores(profiles, job):
+    weights = {skill.lower(): 1.0 for skill in job.required}
+    weights.update({skill.lower(): job_matching.JOB_PREFERRED_WEIGHT for skill in job.preferred})
+    total = sum(weights.values())
+    scores = {}
+    for person_id, skills in profiles:
+        scores[person_id] = sum(weights.get(skill.lower(), 0.0) for skill in skills) / total * 100
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    print(f"{label}: {time.perf_counter() - started:.3f}s")
+    return result
+
+
+# Usage: python -m benchmarks.bench_job_match [candidates] [jobs]
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    job_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    job = timed("parse job description", job_matching.parse_job_description, JOB_DESCRIPTION, 'backend')
+    print(f"required: {', '.join(job.required)}; preferred: {', '.join(job.preferred)}")
+    profiles = timed(f"build {count:,} profiles", synthetic_profiles, count)
+    candidates = timed("candidate matrix", job_matching.candidate_matrix, profiles)
+    baseline = timed("per-candidate loop, 1 job", loop_scores, profiles, job)
+    matches = timed("vectorised, 1 job", job_matching.match_candidates, candidates, job, 20)
+    print(matches.head(5).to_string(index=False))
+
+    rng = np.random.default_rng(1)
+    jobs = [job_matching.JobProfile(f"job{index}", required=rng.choice(candidates.skills, 5, replace=False))
+            for index in range(job_count)]
+    timed(f"vectorised, {job_count} jobs", job_matching.match_scores, candidates, jobs)
+    same = np.allclose([score for _, score in baseline[:20]], matches['score'], atol=0.01)
+    print(f"top 20 scores agree with the loop: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import io
+import sys
+import time
+import tracemalloc
+
+import pdf_extract
+import skill_matcher
+from benchmarks.resume_corpus import build_resume
+
+PAGE_COUNTS = (10, 50, 100, 200, 400)
+
+
+# Unbounded: keep every page and match skills on the joined text
+def unbounded(data, backend):
+    text = pdf_extract.extract_text(io.BytesIO(data), backend, max_chars=0)
+    return text, skill_matcher.find_skills(text)
+
+
+# Bounded: text capped at PDF_MAX_CHARS, skills matched page by page
+def bounded(data, backend):
+    scanner = skill_matcher.default_matcher.scanner()
+    text = pdf_extract.extract_text(io.BytesIO(data), backend, scanner=scanner)
+    return text, scanner.close()
+
+
+# Python-heap peak (tracemalloc) while one mode extracts a PDF; memory held inside C libraries such as
+# PDFium is not traced
+def measure(mode, data, backend):
+    tracemalloc.start()
+    started = time.perf_counter()
+    text, skills = mode(data, backend)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return peak, elapsed, len(text), skills
+
+
+# Usage: python -m benchmarks.bench_memory [backend] [pages ...]
+def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'pypdf2'
+    counts = [int(count) for count in sys.argv[2:]] or PAGE_COUNTS
+    print(f"backend {backend}, PDF_MAX_CHARS={pdf_extract.PDF_MAX_CHARS}")
+    # Warm up so library imports and caches are not charged to the first row
+    measure(unbounded, build_resume(0, 1, 'single')[0], backend)
+    print(f"{'pages':>6}{'KB':>7}{'full MB':>9}{'bounded MB':>12}{'full s':>8}{'bounded s':>11}"
+          f"{'chars kept':>12}{'same skills':>13}")
+    for count in counts:
+        data, _ = build_resume(count, count, 'single')
+        full_peak, full_seconds, _, full_skills = measure(unbounded, data, backend)
+        peak, seconds, chars, skills = measure(bounded, data, backend)
+        print(f"{count:>6}{len(data) // 1024:>7}{full_peak:>9.2f}{peak:>12.2f}{full_seconds:>8.2f}{seconds:>11.2f}"
+              f"{chars:>12}{str(skills == full_skills):>13}")
+
+
+if __name__ == "__main__":
+    main()
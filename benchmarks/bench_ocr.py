@@ -0,0 +1,55 @@
+import sys
+import time
+
+import ocr
+import pdf_extract
+import skill_matcher
+from benchmarks.resume_corpus import load_corpus
+
+
+def recall(texts, expected):
+    skills = skill_matcher.find_skills(pdf_extract.PAGE_SEPARATOR.join(texts))
+    expected = set(expected['skills'])
+    return len(skills & expected), len(expected)
+
+
+# Usage: python -m benchmarks.bench_ocr [engine]
+# Runs the corpus through the text backend, then the OCR fallback twice: the second pass is served
+# from the page-hash cache.
+def main():
+    if len(sys.argv) > 1:
+        ocr.OCR_ENGINE = sys.argv[1]
+    name = ocr.engine_name()
+    if name is None:
+        print(f"No OCR engine installed (OCR_ENGINE={ocr.OCR_ENGINE}); install tesserocr or rapidocr-onnxruntime.")
+        return
+    corpus = load_corpus()
+    print(f"{len(corpus)} resumes, engine {name}, {ocr.OCR_DPI} dpi, {ocr.OCR_WORKERS} worker(s)")
+
+    print(f"{'resume':<32}{'empty':>7}{'before':>9}{'after':>9}{'first s':>9}{'cached s':>10}")
+    needing = 0
+    for path, expected in corpus:
+        texts = list(pdf_extract.extract_pages(path))
+        empty = sum(not text.strip() for text in texts)
+        if not empty:
+            continue
+        needing += 1
+        before = recall(texts, expected)
+        started = time.perf_counter()
+        filled = ocr.fill_empty_pages(path, texts)
+        first = time.perf_counter() - started
+        after = recall(filled, expected)
+        started = time.perf_counter()
+        ocr.fill_empty_pages(path, texts)
+        cached = time.perf_counter() - started
+        print(f"{path.rsplit('/', 1)[-1][:31]:<32}{empty:>7}{before[0]:>5}/{before[1]:<3}{after[0]:>5}/{after[1]:<3}"
+              f"{first:>9.2f}{cached:>10.3f}")
+
+    result = ocr.get_stats()
+    print(f"resumes needing OCR: {needing}/{len(corpus)}")
+    print(f"OCR pages: {result['pages']}, {result['pages_per_second']} pages/s per worker, "
+          f"cache hits: {result['cache_hits']}, failed: {result['failed']}, timed out: {result['timed_out']}")
+
+
+if __name__ == "__main__":
+    main()
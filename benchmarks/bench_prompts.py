@@ -0,0 +1,64 @@
+import random
+import statistics
+import sys
+import time
+
+import prompts
+from benchmarks.bench_relevance import load_fixtures
+
+# Spoken answers ramble: filler clauses around the part that actually answers the question
+FILLER = (
+    "so basically what I would say is that it depends on the situation",
+    "I have seen this a lot in my previous projects with the team",
+    "um let me think about how to put this in the right way",
+    "and honestly there are many different opinions about it",
+    "we discussed this in a meeting once and people did not agree",
+)
+
+
+# Function to pad a labelled answer with `words` words of filler before and after it, without punctuation
+def rambling(answer, words, rng):
+    before, after = [], []
+    while sum(len(part.split()) for part in before + after) < words:
+        (before if rng.random() < 0.5 else after).append(rng.choice(FILLER))
+    return ' '.join(before + [answer.rstrip('.')] + after)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# Usage: python -m benchmarks.bench_prompts [max filler words]
+def main():
+    max_words = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    rng = random.Random(3)
+    rows = load_fixtures()
+    template = prompts.get('relevance')
+    unbounded = prompts.PromptTemplate('relevance_unbounded', 0, template.text)
+    cases = [(row, rambling(row['answer'], rng.randint(0, max_words), rng)) for row in rows for _ in range(20)]
+
+    raw, bounded, kept, timings = [], [], [], []
+    for row, answer in cases:
+        raw.append(prompts.estimate_tokens(unbounded.render(question=row['question'], answer=answer)))
+        started = time.perf_counter()
+        prompt = template.render(question=row['question'], answer=answer)
+        timings.append(time.perf_counter() - started)
+        bounded.append(prompts.estimate_tokens(prompt))
+        words = prompts._words(row['answer'])
+        if row['llm_relevant'] and words:
+            kept.append(len(words & prompts._words(prompt)) / len(words))
+
+    print(f"{len(cases)} relevance prompts, answers padded with 0-{max_words} words of filler, "
+          f"mode {prompts.PROMPT_SHORTEN_MODE}, answer budget {prompts.PROMPT_ANSWER_TOKENS} tokens")
+    print(f"{'':<10}{'mean':>8}{'p50':>8}{'p95':>8}{'max':>8}")
+    for label, values in (('raw', raw), ('budgeted', bounded)):
+        print(f"{label:<10}{statistics.mean(values):>8.0f}{percentile(values, 0.5):>8}"
+              f"{percentile(values, 0.95):>8}{max(values):>8}")
+    print(f"prompt tokens saved: {1 - sum(bounded) / sum(raw):.1%}")
+    print(f"words of the relevant answers kept: {statistics.mean(kept):.1%}")
+    print(f"render: mean {statistics.mean(timings) * 1e6:.0f}us, p95 {percentile(timings, 0.95) * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
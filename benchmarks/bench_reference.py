@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# The question bank reads its path at import time; the response cache is off so only the store saves calls
+_directory = tempfile.mkdtemp()
+os.environ['QUESTION_BANK_PATH'] = os.path.join(_directory, 'question_bank.db')
+os.environ['LLM_CACHE'] = '0'
+
+import llm_gateway  # noqa: E402
+import prompts  # noqa: E402
+import question_bank  # noqa: E402
+import reference_answers  # noqa: E402
+import relevance_filter  # noqa: E402
+from benchmarks.bench_relevance import load_fixtures  # noqa: E402
+from benchmarks.fakes import FakeModel, interview_responder  # noqa: E402
+
+# Fake Gemini latency: a fixed overhead plus time per generated token, so long model answers cost more
+BASE_SECONDS = 0.02
+SECONDS_PER_TOKEN = 0.0005
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# Replies from the labelled fixtures: their reference answers and their LLM relevance labels
+def fixture_responder(rows):
+    references = {row['question']: row['reference'] for row in rows}
+    labels = {(row['question'], row['answer']): row['llm_relevant'] for row in rows}
+
+    def respond(prompt):
+        if prompt.template == 'reference_answer':
+            return next(reference for question, reference in references.items() if question in prompt)
+        if prompt.template == 'reference_answers':
+            numbered = prompt[prompt.index('Questions:\n') + len('Questions:\n'):].splitlines()
+            return json.dumps({number: references[question]
+                               for number, _, question in (line.partition('. ') for line in numbered)})
+        if prompt.template == 'relevance':
+            relevant = next((label for (question, answer), label in labels.items()
+                             if question in prompt and answer in prompt), True)
+            return 'Yes' if relevant else 'No'
+        return interview_responder(prompt)
+    return respond
+
+
+# The grading path of analyze_answer: reference answer, local prefilter, relevance call when undecided
+def grade(model, question, answer):
+    reference, context_vector = reference_answers.answer_for(model, question)
+    verdict, _ = relevance_filter.prefilter(question, answer, reference, context_vector=context_vector)
+    if verdict is None:
+        verdict = llm_gateway.generate(model, prompts.render('relevance', question=question, answer=answer)) == 'Yes'
+    return verdict
+
+
+def tokens():
+    return sum(entry['prompt_tokens'] + entry['response_tokens'] for entry in prompts.get_stats().values())
+
+
+def run(label, model, cases):
+    calls, used, timings = model.call_count, tokens(), []
+    for question, answer in cases:
+        started = time.perf_counter()
+        grade(model, question, answer)
+        timings.append(time.perf_counter() - started)
+    calls, used = model.call_count - calls, tokens() - used
+    print(f"{label:<22}{calls / len(cases):>8.2f}{used / len(cases):>10.0f}"
+          f"{statistics.mean(timings) * 1000:>10.1f}{percentile(timings, 0.95) * 1000:>10.1f}")
+
+
+# Usage: python -m benchmarks.bench_reference [graded answers]
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rows = load_fixtures()
+    rng = random.Random(4)
+    cases = [(row['question'], row['answer']) for row in rng.choices(rows, k=count)]
+    model = FakeModel(latency=lambda prompt, reply: BASE_SECONDS + SECONDS_PER_TOKEN * len(reply) / 4,
+                      responder=fixture_responder(rows))
+    llm_gateway.set_gateway(llm_gateway.LLMGateway(requests_per_minute=10 ** 7, burst=10 ** 6))
+    question_bank.add_questions('bench', [('normal', question, None) for question in {q for q, _ in cases}])
+    print(f"{count} graded answers over {len(question_bank.all_questions())} banked questions; fake Gemini takes "
+          f"{BASE_SECONDS * 1000:.0f}ms + {SECONDS_PER_TOKEN * 1000:.1f}ms per generated token")
+    print(f"{'grading':<22}{'calls':>8}{'tokens':>10}{'mean ms':>10}{'p95 ms':>10}")
+
+    reference_answers.REFERENCE_ANSWERS = False
+    run("live reference answer", model, cases)
+    reference_answers.REFERENCE_ANSWERS = True
+
+    for batch_size in (1, reference_answers.REFERENCE_BATCH_SIZE):
+        question_bank.get_connection().execute("DELETE FROM reference_answers")
+        calls, used, started = model.call_count, tokens(), time.perf_counter()
+        stored, failed = reference_answers.build(model, batch_size=batch_size)
+        print(f"offline build, batch size {batch_size}: {stored} stored, {failed} failed, "
+              f"{model.call_count - calls} calls, {tokens() - used} tokens, {time.perf_counter() - started:.2f}s")
+
+    run("precomputed store", model, cases)
+    print(f"store: {reference_answers.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
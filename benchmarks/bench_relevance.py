@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+
+import relevance_filter
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'relevance_labelled.jsonl')
+
+
+def load_fixtures(path=FIXTURE_PATH):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+# Replays the labelled set through the local stage and compares its decisions with the LLM labels
+def run(high=None, use_reference=True):
+    rows = load_fixtures()
+    decided = agreed = 0
+    for row in rows:
+        reference = row['reference'] if use_reference else None
+        verdict, _ = relevance_filter.prefilter(row['question'], row['answer'], reference, high=high)
+        if verdict is not None:
+            decided += 1
+            agreed += verdict == row['llm_relevant']
+    return {
+        'examples': len(rows),
+        'decided_locally': decided,
+        'llm_calls_avoided': round(decided / len(rows), 3),
+        'agreement_with_llm': round(agreed / decided, 3) if decided else None,
+        'high': relevance_filter.RELEVANCE_HIGH if high is None else high,
+    }
+
+
+def main():
+    print(run())
+    if '--sweep' in sys.argv:
+        for high in (0.20, 0.25, 0.30, 0.35):
+            print(run(high))
+
+
+if __name__ == "__main__":
+    main()
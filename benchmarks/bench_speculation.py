@@ -0,0 +1,100 @@
+import os
+import statistics
+import sys
+import time
+
+# Grading here is the two serial calls of the original flow: no cached or precomputed reference answers
+os.environ['LLM_CACHE'] = '0'
+os.environ['REFERENCE_ANSWERS'] = '0'
+
+import interview_session  # noqa: E402
+import llm_gateway  # noqa: E402
+import prompts  # noqa: E402
+import speculation  # noqa: E402
+from benchmarks.fakes import FakeModel, interview_responder, lognormal_latency  # noqa: E402
+
+SKILLS = ['Python', 'Java', 'SQL', 'React', 'Docker', 'AWS', 'Kubernetes', 'Machine Learning']
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def tokens():
+    return sum(entry['prompt_tokens'] + entry['response_tokens'] for entry in prompts.get_stats().values())
+
+
+# One answer of the questiongeneration1/3 loop: grade it (model answer, then relevance) and, when relevant,
+# produce the follow-up. Returns the seconds from the answer to the follow-up (None when there is none).
+def answer_step(generate, speculator, index):
+    skill = SKILLS[index % len(SKILLS)]
+    question = f"How do you debug a problem in a {skill} project?"
+    answer = f"I reproduce it, read the logs and add a failing test for case {index}"
+    session = interview_session.InterviewSession(f"bench{index}", 'bench', [skill], base_question=question,
+                                                 last_answer=answer)
+
+    def grade(entry):
+        generate(prompts.render('reference_answer', question=entry['question']))
+        return generate(prompts.render('relevance', question=entry['question'], answer=entry['answer'])) == 'Yes'
+
+    def follow_up_prompt(base_question, last_answer):
+        return prompts.render('follow_up', question=base_question, answer=last_answer)
+
+    if speculator is not None:
+        grade = speculation.grade_with_follow_up(session, grade, speculator, follow_up_prompt)
+    started = time.perf_counter()
+    if not grade({'question': question, 'answer': answer, 'skill': skill}):
+        return None
+    prompt = follow_up_prompt(question, answer)
+    if speculator is not None:
+        speculator.take(prompt)
+    else:
+        generate(prompt)
+    return time.perf_counter() - started
+
+
+def run(label, answers, speculative, requests_per_minute=10 ** 7, burst=10 ** 6):
+    model = FakeModel(latency=lognormal_latency(median=0.03, sigma=0.3), responder=interview_responder)
+    llm_gateway.set_gateway(llm_gateway.LLMGateway(requests_per_minute=requests_per_minute, burst=burst))
+
+    def generate(prompt):
+        return llm_gateway.generate(model, prompt).strip()
+
+    speculator = speculation.Speculator(generate, enabled=True) if speculative else None
+    before, before_tokens = speculation.get_stats(), tokens()
+    timings = [answer_step(generate, speculator, index) for index in range(answers)]
+    # Wasted calls may still be running; their tokens are counted when they finish
+    time.sleep(0.5)
+    after = speculation.get_stats()
+    follow_ups = [seconds for seconds in timings if seconds is not None]
+    result = {
+        'calls': model.call_count,
+        'mean': statistics.mean(follow_ups),
+        'p95': percentile(follow_ups, 0.95),
+        'tokens': tokens() - before_tokens,
+        'wasted_tokens': after['wasted_tokens'] - before['wasted_tokens'],
+        'skipped': after['skipped'] - before['skipped'],
+    }
+    print(f"{label:<26}{result['calls']:>7}{result['mean'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}"
+          f"{result['tokens']:>9}{result['wasted_tokens']:>9}{result['skipped']:>9}")
+    return result
+
+
+# Usage: python -m benchmarks.bench_speculation [answers]
+def main():
+    answers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{answers} answers, fake Gemini median 30ms per call; latency is from the answer to its follow-up")
+    print(f"{'mode':<26}{'calls':>7}{'mean ms':>10}{'p95 ms':>10}{'tokens':>9}{'wasted':>9}{'skipped':>9}")
+    serial = run("serial", answers, False)
+    speculative = run("speculative", answers, True)
+    # About one call every 30ms against a 10 calls/s quota: the bucket stays low and speculation backs off
+    run("speculative, tight quota", answers, True, requests_per_minute=600, burst=5)
+    saved = serial['mean'] - speculative['mean']
+    extra = speculative['tokens'] - serial['tokens']
+    print(f"follow-up latency saved: {saved * 1000:.1f}ms per follow-up ({saved / serial['mean']:.0%}); "
+          f"extra tokens: {extra} ({extra / serial['tokens']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyPDF2 import PdfReader
+
+import resume_upload
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Madhusmita Subudhi.pdf')
+
+
+# Stand-in for werkzeug's FileStorage: a request stream plus the client's filename
+class FakeUpload:
+    def __init__(self, data, filename):
+        self.stream = io.BytesIO(data)
+        self.filename = filename
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.stream.read())
+
+
+def extract_text(source):
+    return "".join(page.extract_text() or "" for page in PdfReader(source).pages)
+
+
+# Previous path: save under the client's filename in a shared folder, parse from disk, delete
+def ingest_via_disk(upload, folder):
+    file_path = os.path.join(folder, upload.filename)
+    upload.save(file_path)
+    text = extract_text(file_path)
+    os.remove(file_path)
+    return text
+
+
+def ingest_via_stream(upload):
+    with resume_upload.read_upload(upload) as ingested:
+        return resume_upload.resume_text(ingested, extract_text)
+
+
+def run(label, ingest, payloads, clients):
+    errors = []
+    lock = threading.Lock()
+
+    def one(payload):
+        try:
+            return ingest(FakeUpload(*payload))
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        texts = list(pool.map(one, payloads))
+    elapsed = time.perf_counter() - started
+    ok = sum(1 for text in texts if text)
+    print(f"{label}: {len(payloads) / elapsed:.1f} uploads/s, {ok}/{len(payloads)} parsed, {len(errors)} errors")
+
+
+# Usage: python -m benchmarks.bench_upload [uploads] [clients] [distinct-resumes]
+def main():
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    distinct = int(sys.argv[3]) if len(sys.argv) > 3 else uploads
+    with open(SAMPLE_PDF, 'rb') as file:
+        sample = file.read()
+    # Every client sends "resume.pdf"; distinct trailing comments give distinct content hashes
+    payloads = [(sample + f"\n% upload {i % distinct}\n".encode(), 'resume.pdf') for i in range(uploads)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        run("disk, shared filename", lambda upload: ingest_via_disk(upload, folder), payloads, clients)
+    resume_upload.text_cache.capacity = 0
+    run("stream, no cache", ingest_via_stream, payloads, clients)
+    resume_upload.text_cache.capacity = resume_upload.RESUME_TEXT_CACHE_SIZE
+    run("stream, hash cache", ingest_via_stream, payloads, clients)
+    print(resume_upload.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import copy
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+
+
+# Minimal stand-in for a Gemini response object
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+# Raised by FakeModel for an injected quota error; carries a 429 code like google.api_core errors
+class FakeRateLimitError(Exception):
+    def __init__(self, message="429 Resource has been exhausted (e.g. check quota).", retry_after=None):
+        super().__init__(message)
+        self.code = 429
+        self.retry_after = retry_after
+
+
+# Function to build a latency callable with a log-normal distribution (median seconds, spread sigma),
+# the long-tailed shape of real Gemini response times. Seeded, so runs are repeatable.
+def lognormal_latency(median=0.05, sigma=0.5, seed=0):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def latency(prompt, reply):
+        with lock:
+            return median * math.exp(sigma * rng.gauss(0, 1))
+    return latency
+
+
+# Deterministic stand-in for gen_ai.GenerativeModel: canned replies, call counting, a latency
+# that is either fixed or a function of (prompt, reply), and a share of calls failing with a 429
+class FakeModel:
+    def __init__(self, latency=0.05, responder=None, model_name='fake-gemini', rate_limit_rate=0.0, seed=0):
+        self.latency = latency
+        self.responder = responder or (lambda prompt: f"What is {prompt[:20]}?")
+        self.model_name = model_name
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.prompts = []
+        self.replies = []
+        self.rate_limited = 0
+
+    @property
+    def call_count(self):
+        with self.lock:
+            return len(self.prompts)
+
+    def start_chat(self):
+        return self
+
+    def send_message(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            throttled = self.rate_limit_rate and self.rng.random() < self.rate_limit_rate
+            if throttled:
+                self.rate_limited += 1
+        if throttled:
+            raise FakeRateLimitError()
+        reply = self.responder(prompt)
+        time.sleep(self.latency(prompt, reply) if callable(self.latency) else self.latency)
+        with self.lock:
+            self.replies.append(reply)
+        return FakeResponse(reply)
+
+
+def _stable(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+# A spread of short to long questions so difficulty ranking has something to separate
+def _skill_questions(skill, count=9):
+    templates = (
+        "What is {s}?",
+        "What are the main features of {s}?",
+        "How do you debug a problem in a {s} project?",
+        "How would you structure a medium sized application that uses {s}?",
+        "How do you test and deploy code that depends on {s} in a team setting?",
+        "What trade-offs do you consider when choosing {s} over its alternatives for a new service?",
+        "How would you diagnose a performance regression in a production system built with {s}, step by step?",
+        "How would you design a fault-tolerant, horizontally scalable platform around {s}, including monitoring and rollback?",
+        "Explain how you would migrate a large legacy codebase to {s} without downtime, covering data consistency, testing strategy and team coordination?",
+    )
+    return [template.format(s=skill) for template in templates[:count]]
+
+
+# Function to answer every prompt shape the interview scripts send with a well-formed canned reply:
+# batched JSON, the {"questions": [...]} contract, Yes/No grading, model answers (single or batched) and single
+# questions
+def interview_responder(prompt):
+    if 'Skills: [' in prompt and '"easy"' in prompt:
+        skills = json.loads(prompt[prompt.index('Skills: [') + len('Skills: '):].strip())
+        reply = {}
+        for skill in skills:
+            questions = _skill_questions(skill)
+            reply[skill] = {'easy': questions[0], 'normal': questions[4], 'hard': questions[8]}
+        return json.dumps(reply)
+    if '{"questions"' in prompt:
+        match = re.search(r"skill '([^']+)'", prompt)
+        if match:
+            return json.dumps({'questions': _skill_questions(match.group(1))})
+        return json.dumps({'questions': [
+            "Tell me about a time you worked in a team?",
+            "How do you handle conflict with a colleague?",
+            "Describe a situation where you showed leadership?",
+            "Why do you want to join this company?",
+            "Where do you see yourself in five years?",
+        ]})
+    if 'keyed by the question number' in prompt:
+        numbered = prompt[prompt.index('Questions:\n') + len('Questions:\n'):].splitlines()
+        return json.dumps({
+            number: (f"{question.rstrip('?')} is answered by explaining the core idea, giving a concrete example "
+                     f"and noting the main trade-offs.")
+            for number, _, question in (line.partition('. ') for line in numbered if line.strip())
+        })
+    if "Respond with 'Yes'" in prompt:
+        return "Yes" if _stable(prompt) % 3 else "No"
+    match = re.search(r'answer for the following question: (.*?)\. ', prompt)
+    if match:
+        question = match.group(1)
+        return (f"{question.rstrip('?')} is answered by explaining the core idea, giving a concrete example "
+                f"and noting the main trade-offs.")
+    match = re.match(r'Generate a question about (.+)\.$', prompt)
+    if match:
+        return _skill_questions(match.group(1))[_stable(prompt) % 9]
+    if 'follow-up question' in prompt:
+        return "Can you give a concrete example of that from your own experience?"
+    if 'HR question' in prompt:
+        return "Tell me about a challenge you overcame at work?"
+    return f"What is {prompt[:20]}?"
+
+
+# Minimal pymongo results and operations, enough for the calls the scripts make
+class FakeInsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class FakeBulkWriteResult:
+    def __init__(self, matched_count, upserted_count):
+        self.matched_count = matched_count
+        self.upserted_count = upserted_count
+
+
+def _matches(document, query):
+    return all(document.get(key) == value for key, value in (query or {}).items())
+
+
+def _project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    included = {key.split('.')[0] for key, flag in projection.items() if flag and key != '_id'}
+    if not included:
+        # Exclusion-only projection such as {'_id': 0}
+        return {key: copy.deepcopy(value) for key, value in document.items() if projection.get(key, 1)}
+    result = {key: copy.deepcopy(value) for key, value in document.items()
+              if key in included or (key == '_id' and projection.get('_id', 1))}
+    return result
+
+
+def _apply(document, update):
+    for key, value in update.get('$set', {}).items():
+        document[key] = copy.deepcopy(value)
+    for key, value in update.get('$push', {}).items():
+        document.setdefault(key, []).append(copy.deepcopy(value))
+
+
+# In-memory collection with the subset of the pymongo API used across the scripts
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.documents = []
+        self.next_id = 0
+
+    def _insert(self, document):
+        document = copy.deepcopy(document)
+        self.next_id += 1
+        document.setdefault('_id', f"{self.name}-{self.next_id}")
+        self.documents.append(document)
+        return document['_id']
+
+    def insert_one(self, document):
+        with self.lock:
+            return FakeInsertResult(self._insert(document))
+
+    def insert_many(self, documents):
+        with self.lock:
+            return [self._insert(document) for document in documents]
+
+    def find(self, query=None, projection=None):
+        with self.lock:
+            return [_project(document, projection) for document in self.documents if _matches(document, query)]
+
+    def find_one(self, query=None, projection=None):
+        found = self.find(query, projection)
+        return found[0] if found else None
+
+    def count_documents(self, query):
+        with self.lock:
+            return sum(1 for document in self.documents if _matches(document, query))
+
+    # Returns (matched, upserted)
+    def _update(self, query, update, upsert):
+        for document in self.documents:
+            if _matches(document, query):
+                _apply(document, update)
+                return 1, 0
+        if upsert:
+            document = dict(query)
+            _apply(document, update)
+            self._insert(document)
+            return 0, 1
+        return 0, 0
+
+    def update_one(self, query, update, upsert=False):
+        with self.lock:
+            return self._update(query, update, upsert)
+
+    # Accepts pymongo UpdateOne operations
+    def bulk_write(self, operations, ordered=True):
+        matched = upserted = 0
+        with self.lock:
+            for operation in operations:
+                found, created = self._update(operation._filter, operation._doc, operation._upsert)
+                matched += found
+                upserted += created
+        return FakeBulkWriteResult(matched, upserted)
+
+    def create_index(self, keys, **kwargs):
+        return keys if isinstance(keys, str) else '_'.join(str(key) for key in keys)
+
+
+class FakeDatabase:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.collections = {}
+
+    def __getitem__(self, name):
+        with self.lock:
+            return self.collections.setdefault(name, FakeCollection(name))
+
+    # Like MongoDB, a collection only exists once something was written to it
+    def list_collection_names(self):
+        with self.lock:
+            return [name for name, collection in self.collections.items() if collection.documents]
+
+
+# Stand-in for pymongo.MongoClient; accepts and ignores the connection URI
+class FakeMongoClient:
+    def __init__(self, *args, **kwargs):
+        self.lock = threading.Lock()
+        self.databases = {}
+
+    def __getitem__(self, name):
+        with self.lock:
+            return self.databases.setdefault(name, FakeDatabase(name))
+
+    def close(self):
+        pass
@@ -0,0 +1,392 @@
+import argparse
+import importlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from benchmarks.fakes import FakeModel, FakeMongoClient, interview_responder, lognormal_latency
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PDF = os.path.join(ROOT, 'Madhusmita Subudhi.pdf')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+# CLI scripts driven end to end through their main(); each reads answers from input()
+CLI_SCRIPTS = ('question4', 'question5', 'questiongenration', 'questiongeneration1')
+POOR_ANSWERS = ("I am not sure.", "I have not used that.", "Pass.")
+
+
+# Stand-in for gtts.gTTS: writes a tiny file instead of calling Google
+class FakeTTS:
+    def __init__(self, text, lang='en', **kwargs):
+        self.text = text
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(b'ID3')
+
+
+# Collects latencies per operation and computes percentiles
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, name, seconds, ok=True):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    @contextmanager
+    def time(self, name):
+        started = time.perf_counter()
+        outcome = {'ok': True}
+        try:
+            yield outcome
+        except Exception:
+            outcome['ok'] = False
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, outcome['ok'])
+
+    def summary(self, elapsed):
+        with self.lock:
+            return {name: summarize(values, self.errors.get(name, 0), elapsed)
+                    for name, values in sorted(self.samples.items())}
+
+
+# Nearest-rank percentile of an already sorted list
+def percentile(values, q):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))]
+
+
+def summarize(values, errors, elapsed):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'per_second': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(1000 * sum(values) / len(values), 2),
+        'p50_ms': round(1000 * percentile(values, 50), 2),
+        'p90_ms': round(1000 * percentile(values, 90), 2),
+        'p99_ms': round(1000 * percentile(values, 99), 2),
+        'max_ms': round(1000 * values[-1], 2),
+    }
+
+
+# Function to point every local store at a scratch directory. Must run before the scripts are
+# imported, since they read their settings at import time.
+def configure_environment(directory, args):
+    os.environ['QUESTION_BANK_PATH'] = os.path.join(directory, 'question_bank.db')
+    os.environ['SESSION_STORE_PATH'] = os.path.join(directory, 'interview_sessions.db')
+    os.environ['JOB_QUEUE_PATH'] = os.path.join(directory, 'jobs.db')
+    os.environ['LLM_CACHE_PATH'] = os.path.join(directory, 'llm_cache.db')
+    os.environ['GOOGLE_API_KEY'] = 'offline-benchmark'
+    os.environ['BULK_POOL'] = args.bulk_pool
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    if args.mongo_uri:
+        os.environ['MONGO_URI'] = args.mongo_uri
+
+
+# Function to replace Gemini, MongoDB (unless a real mongod URI was given), gTTS and audio playback
+# before any script is imported, and to give the shared gateway a quota the fake can saturate
+def install_fakes(model, args):
+    import google.generativeai as gen_ai
+    import gtts
+    import playsound
+    import pymongo
+
+    import llm_gateway
+
+    gen_ai.configure = lambda *a, **kwargs: None
+    gen_ai.GenerativeModel = lambda *a, **kwargs: model
+    gtts.gTTS = FakeTTS
+    playsound.playsound = lambda *a, **kwargs: None
+    if args.mongo_uri:
+        client = pymongo.MongoClient(args.mongo_uri)
+    else:
+        client = FakeMongoClient()
+        pymongo.MongoClient = lambda *a, **kwargs: client
+    llm_gateway.set_gateway(llm_gateway.LLMGateway(
+        requests_per_minute=args.rpm, burst=args.burst, base_backoff=args.backoff, max_backoff=args.backoff * 10,
+    ))
+    return client
+
+
+# A good answer restates the question with an explanation; a poor one says nothing relevant
+def make_answer(question, rng, good_rate):
+    if rng.random() < good_rate:
+        return (f"{question.rstrip('?')} is answered by explaining the core idea, giving a concrete example "
+                f"and noting the main trade-offs.")
+    return rng.choice(POOR_ANSWERS)
+
+
+def resume_payload(sample, index, distinct):
+    # Distinct trailing comments give distinct content hashes, so only repeats hit the text cache
+    return sample + f"\n% benchmark resume {index % distinct}\n".encode()
+
+
+def check(response, expected=200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+# One candidate through every interview route of question7, as the web front end would call them
+def route_interview(app, index, sample, recorder, args):
+    client = app.test_client()
+    rng = random.Random(args.seed + index)
+    person_id = f"bench{index:05d}"
+    started = time.perf_counter()
+    ok = False
+    try:
+        with recorder.time('POST /upload_resume'):
+            response = check(client.post('/upload_resume', data={
+                'person_id': person_id,
+                'resume': (io.BytesIO(resume_payload(sample, index, args.distinct_resumes)), 'resume.pdf'),
+            }, content_type='multipart/form-data'))
+        skills = sorted(response.get_json()['skills'])[:args.skills]
+
+        with recorder.time('POST /speak_introduction'):
+            check(client.post('/speak_introduction', json={'user_name': person_id, 'skills': skills}))
+
+        with recorder.time('POST /generate_questions'):
+            questions = check(client.post('/generate_questions', json={'skills': skills})).get_json()
+
+        for skill, levels in questions.items():
+            for level, question in levels.items():
+                with recorder.time('POST /analyze_answer'):
+                    check(client.post('/analyze_answer', json={
+                        'question': question, 'user_answer': make_answer(question, rng, args.good_answers),
+                        'skill': skill, 'person_id': person_id, 'level': level,
+                    }))
+
+        with recorder.time('POST /generate_hr_questions'):
+            check(client.post('/generate_hr_questions'))
+
+        with recorder.time('POST /get_overall_score'):
+            check(client.post('/get_overall_score', json={'person_id': person_id}))
+        ok = True
+    except Exception as e:
+        print(f"interview {person_id} failed: {e}", file=sys.stderr)
+    finally:
+        recorder.record('route interview', time.perf_counter() - started, ok)
+
+
+# The read-only and batch routes, called once the interviews have written their answers
+def route_reports(app, sample, recorder, args):
+    client = app.test_client()
+    for path in ('/leaderboard', '/leaderboard?skill=Python', '/llm_metrics', '/metrics'):
+        with recorder.time(f"GET {path.split('?')[0]}" + (' by skill' if '?' in path else '')):
+            check(client.get(path))
+
+    archive = io.BytesIO()
+    manifest = {}
+    with zipfile.ZipFile(archive, 'w') as bundle:
+        for index in range(args.bulk_files):
+            name = f"resume{index:04d}.pdf"
+            manifest[name] = f"bulk{index:05d}"
+            bundle.writestr(name, resume_payload(sample, 10000 + index, args.bulk_files))
+        bundle.writestr('manifest.json', json.dumps(manifest))
+    archive.seek(0)
+    with recorder.time('POST /upload_resumes'):
+        response = check(client.post('/upload_resumes', data={'archive': (archive, 'batch.zip')},
+                                     content_type='multipart/form-data'))
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+        if not lines or lines[-1].get('type') != 'summary' or lines[-1].get('failed'):
+            raise RuntimeError(f"Bulk upload did not finish cleanly: {lines[-1:]}")
+
+
+# Function to answer a CLI script's input() prompts the way a candidate at the terminal would
+def scripted_input(person_id, resume_path, rng, args, shown):
+    def respond(prompt=''):
+        if 'unfinished interview' in prompt:
+            return '2'
+        if 'Your Answer' in prompt:
+            return make_answer(shown.get('question', ''), rng, args.good_answers)
+        if prompt.startswith('Enter 1'):
+            return '1'
+        if 'resume' in prompt.lower():
+            return resume_path
+        return person_id
+    return respond
+
+
+# Swallows the script's prints but remembers the last question shown, so answers can address it
+def quiet_print(shown):
+    def capture(*values, **kwargs):
+        text = ' '.join(str(value) for value in values)
+        if text.rstrip().endswith('?'):
+            shown['question'] = text.split('Question: ')[-1].strip()
+    return capture
+
+
+# Runs are sequential: the CLI scripts keep interview state in module globals
+def cli_interviews(modules, recorder, args):
+    for run in range(args.cli_runs):
+        for name, module in modules.items():
+            shown = {}
+            rng = random.Random(args.seed + run)
+            module.input = scripted_input(f"cli{name}{run}", SAMPLE_PDF, rng, args, shown)
+            module.print = quiet_print(shown)
+            try:
+                with recorder.time(f"cli {name}"):
+                    module.main()
+            except Exception as e:
+                print(f"cli {name} run {run} failed: {e}", file=sys.stderr)
+            finally:
+                del module.input, module.print
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(directory, args)
+        latency = lognormal_latency(args.llm_median, args.llm_sigma, args.seed)
+        model = FakeModel(latency=latency, responder=interview_responder, rate_limit_rate=args.rate_limit,
+                          seed=args.seed)
+        install_fakes(model, args)
+
+        import llm_gateway
+        import question_parser
+        import relevance_filter
+        import resume_upload
+        question7 = importlib.import_module('question7')
+        with open(SAMPLE_PDF, 'rb') as file:
+            sample = file.read()
+
+        routes = Recorder()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            list(pool.map(lambda index: route_interview(question7.app, index, sample, routes, args),
+                          range(args.interviews)))
+        route_elapsed = time.perf_counter() - started
+        try:
+            route_reports(question7.app, sample, routes, args)
+        except Exception as e:
+            print(f"report routes failed: {e}", file=sys.stderr)
+        route_calls = model.call_count
+
+        cli = Recorder()
+        cli_started = time.perf_counter()
+        if args.cli_runs:
+            cli_interviews({name: importlib.import_module(name) for name in CLI_SCRIPTS}, cli, args)
+        cli_elapsed = time.perf_counter() - cli_started
+
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'tolerance', 'min_delta_ms')},
+            'routes': routes.summary(route_elapsed),
+            'cli': cli.summary(cli_elapsed),
+            'totals': {
+                'route_interviews_per_second': round(args.interviews / route_elapsed, 2),
+                'route_elapsed_seconds': round(route_elapsed, 3),
+                'cli_elapsed_seconds': round(cli_elapsed, 3),
+                'llm_calls_per_route_interview': round(route_calls / max(1, args.interviews), 2),
+                'model_calls': model.call_count,
+                'injected_rate_limits': model.rate_limited,
+                'gateway': llm_gateway.get_metrics(),
+                'question_parsing': question_parser.get_stats(),
+                'relevance_prefilter': relevance_filter.get_stats(),
+                'resume_uploads': resume_upload.get_stats(),
+            },
+        }
+
+
+def print_results(results):
+    for section in ('routes', 'cli'):
+        print(f"\n{section}")
+        print(f"{'operation':<30}{'count':>7}{'errors':>8}{'per s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+        for name, stats in results[section].items():
+            print(f"{name:<30}{stats['count']:>7}{stats['errors']:>8}{stats['per_second']:>9.2f}"
+                  f"{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    totals = results['totals']
+    print(f"\n{totals['route_interviews_per_second']} route interviews/s, "
+          f"{totals['llm_calls_per_route_interview']} LLM calls per interview, "
+          f"{totals['model_calls']} model calls, {totals['injected_rate_limits']} injected 429s")
+
+
+# Function to compare p50/p99 latency and error counts with an earlier result file. Returns the
+# regressions: slower by more than `tolerance` (a fraction) and by at least `min_delta_ms`, so jitter
+# on millisecond routes is not flagged, or more errors than before.
+def compare(results, previous, tolerance, min_delta_ms=0.0):
+    regressions = []
+    for section in ('routes', 'cli'):
+        for name, stats in results[section].items():
+            before = previous.get(section, {}).get(name)
+            if not before:
+                continue
+            for field in ('p50_ms', 'p99_ms'):
+                slower = stats[field] - before[field]
+                if before[field] and slower > before[field] * tolerance and slower >= min_delta_ms:
+                    regressions.append(f"{section} {name} {field}: {before[field]} -> {stats[field]}")
+            if stats['errors'] > before['errors']:
+                regressions.append(f"{section} {name} errors: {before['errors']} -> {stats['errors']}")
+    return regressions
+
+
+# Usage: python -m benchmarks.harness [--interviews 20] [--clients 4] [--rate-limit 0.05] [--compare old.json]
+def main():
+    parser = argparse.ArgumentParser(description="Offline interview benchmark with a fake Gemini and MongoDB.")
+    parser.add_argument('--interviews', type=int, default=20, help="candidates driven through the question7 routes")
+    parser.add_argument('--clients', type=int, default=4, help="concurrent route clients")
+    parser.add_argument('--skills', type=int, default=3, help="skills interviewed per candidate")
+    parser.add_argument('--cli-runs', type=int, default=1, help="interviews per CLI script (0 to skip)")
+    parser.add_argument('--distinct-resumes', type=int, default=5)
+    parser.add_argument('--bulk-files', type=int, default=10)
+    parser.add_argument('--bulk-pool', default='thread', choices=('thread', 'process'))
+    parser.add_argument('--good-answers', type=float, default=0.6, help="share of answers that address the question")
+    parser.add_argument('--llm-median', type=float, default=0.02, help="median fake Gemini latency in seconds")
+    parser.add_argument('--llm-sigma', type=float, default=0.5, help="log-normal spread of the latency")
+    parser.add_argument('--rate-limit', type=float, default=0.02, help="share of model calls failing with a 429")
+    parser.add_argument('--rpm', type=float, default=60000, help="gateway requests per minute")
+    parser.add_argument('--burst', type=int, default=100)
+    parser.add_argument('--backoff', type=float, default=0.01, help="gateway base backoff in seconds")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--mongo-uri', help="use a local mongod instead of the in-memory fake")
+    parser.add_argument('--output', help="result file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier result file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=10.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
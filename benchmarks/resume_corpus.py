@@ -0,0 +1,219 @@
+import json
+import os
+import random
+import io
+import sys
+import textwrap
+import zlib
+
+import skill_matcher
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'resumes')
+MANIFEST = 'manifest.json'
+# (pages, layout) per synthetic resume: 1-20 pages across the text layouts, plus scanned resumes
+# (image-only pages) and a mixed one whose last page is a scan
+SPECS = [
+    (1, 'single'), (1, 'two_column'), (1, 'positioned'), (2, 'single'), (2, 'two_column'), (3, 'positioned'),
+    (4, 'single'), (5, 'two_column'), (6, 'positioned'), (8, 'single'), (10, 'two_column'), (12, 'positioned'),
+    (15, 'single'), (18, 'two_column'), (20, 'positioned'), (1, 'scanned'), (2, 'scanned'), (3, 'mixed'),
+]
+SCAN_DPI = 120
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINES_PER_PAGE = 44
+FILLER = (
+    "Delivered projects on schedule while working closely with product owners.",
+    "Mentored new team members and ran weekly design reviews.",
+    "Reduced operating costs by reworking the nightly reporting jobs.",
+    "Coordinated releases across three time zones with minimal downtime.",
+    "Wrote internal documentation and onboarding guides for the platform team.",
+    "Presented quarterly results to senior leadership and stakeholders.",
+    "Improved response times for customer facing services by a third.",
+    "Led incident reviews and tracked follow up actions to completion.",
+    "Partnered with the finance team to automate monthly reconciliation.",
+    "Interviewed candidates and helped define the hiring rubric.",
+)
+ROLES = ("Senior Engineer", "Data Engineer", "Platform Lead", "Software Developer", "Analytics Consultant")
+COMPANIES = ("Northwind Labs", "Bluefin Systems", "Granite Analytics", "Harbor Digital", "Quartz Works")
+
+
+# Minimal PDF 1.4 writer: standard Helvetica fonts and Flate-compressed content streams, no dependencies
+class PdfWriter:
+    def __init__(self):
+        self.objects = []
+
+    def reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def set(self, number, body):
+        self.objects[number - 1] = body
+
+    def add(self, body):
+        number = self.reserve()
+        self.set(number, body)
+        return number
+
+    def add_stream(self, data, extra=b''):
+        compressed = zlib.compress(data, 9)
+        return self.add(b'<< /Length %d /Filter /FlateDecode%s >>\nstream\n' % (len(compressed), extra)
+                        + compressed + b'\nendstream')
+
+    def add_image(self, jpeg, width, height):
+        return self.add(b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray '
+                        b'/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n' % (width, height, len(jpeg))
+                        + jpeg + b'\nendstream')
+
+    def build(self, root):
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(self.objects, 1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(self.objects) + 1)
+        for offset in offsets:
+            output += b'%010d 00000 n \n' % offset
+        output += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            len(self.objects) + 1, root, xref)
+        return bytes(output)
+
+
+def escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1')
+
+
+def text_run(x, y, text, font='F1', size=10):
+    return b'BT /%s %d Tf %.1f %.1f Td (%s) Tj ET\n' % (font.encode(), size, x, y, escape(text))
+
+
+# Word-by-word placement with kerned halves, the way many layout-heavy exporters write text;
+# extractors have to infer spaces from the gaps between runs
+def positioned_run(x, y, text, font='F1', size=10):
+    parts = []
+    for word in text.split():
+        half = max(1, len(word) // 2)
+        parts.append(b'BT /%s %d Tf %.1f %.1f Td [(%s) -30 (%s)] TJ ET\n' % (
+            font.encode(), size, x, y, escape(word[:half]), escape(word[half:])))
+        x += 0.52 * size * len(word) + 0.3 * size
+    return b''.join(parts)
+
+
+# Skill names the matcher recognises in plain prose (skips patterns such as C# that never match a word end)
+def plantable_skills():
+    return [skill for skill in skill_matcher.default_matcher.skills
+            if skill in skill_matcher.find_skills(f"Worked with {skill} daily.")]
+
+
+# Function to write one resume's text as page lines: header and skills first, then experience entries
+# that mention the planted skills, spread to the last page so every page has to be read
+def resume_lines(index, pages, rng, skills):
+    lines = [f"CANDIDATE {index:03d}", f"Bengaluru, India  |  candidate{index:03d}@example.com",
+             "SUMMARY", rng.choice(FILLER), rng.choice(FILLER), "SKILLS"]
+    lines += [", ".join(skills[i:i + 4]) for i in range(0, len(skills), 4)]
+    lines.append("EXPERIENCE")
+    total = pages * LINES_PER_PAGE
+    project = 0
+    while len(lines) < total:
+        project += 1
+        skill = skills[project % len(skills)]
+        lines.append(f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)} ({2010 + project % 14})")
+        lines.append(f"Built a reporting service using {skill} for {rng.randint(2, 40)} internal teams.")
+        lines += [rng.choice(FILLER) for _ in range(rng.randint(2, 5))]
+    lines = lines[:total]
+    lines[-1] = f"Most recent work used {skills[-1]} and {skills[0]} in production."
+    return [lines[start:start + LINES_PER_PAGE] for start in range(0, total, LINES_PER_PAGE)]
+
+
+def page_content(lines, layout, page_number):
+    content = bytearray()
+    top = PAGE_HEIGHT - 50
+    if layout == 'two_column':
+        # The sidebar is drawn after the main column but sits to its left, so stream order != reading order
+        main, sidebar = lines[:LINES_PER_PAGE - 10], lines[LINES_PER_PAGE - 10:]
+        for row, line in enumerate(main):
+            content += text_run(220, top - row * 15, line, size=9)
+        for row, line in enumerate(sidebar):
+            for offset, piece in enumerate(textwrap.wrap(line, 36)):
+                content += text_run(40, top - row * 48 - offset * 11, piece, 'F2', 8)
+    else:
+        run = positioned_run if layout == 'positioned' else text_run
+        for row, line in enumerate(lines):
+            font = 'F2' if line.isupper() else 'F1'
+            content += run(50, top - row * 15.5, line, font)
+    content += text_run(PAGE_WIDTH / 2 - 10, 30, f"{page_number}", size=8)
+    return bytes(content)
+
+
+# Function to draw page lines onto a grayscale JPEG, like a scanner would; needs Pillow
+def scanned_image(lines):
+    from PIL import Image, ImageDraw, ImageFont
+    scale = SCAN_DPI / 72
+    image = Image.new('L', (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=int(10 * scale))
+    for row, line in enumerate(lines):
+        draw.text((50 * scale, (50 + row * 15.5) * scale), line, fill=0, font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=70)
+    return buffer.getvalue(), image.width, image.height
+
+
+# Function to build one resume as PDF bytes plus the plain text it was drawn from
+def build_resume(index, pages, layout, seed=0):
+    rng = random.Random(seed * 1000 + index)
+    skills = rng.sample(plantable_skills(), rng.randint(6, 12))
+    page_lines = resume_lines(index, pages, rng, skills)
+
+    writer = PdfWriter()
+    catalog, page_tree = writer.reserve(), writer.reserve()
+    regular = writer.add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    bold = writer.add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+    kids = []
+    for number, lines in enumerate(page_lines, 1):
+        if layout == 'scanned' or (layout == 'mixed' and number == len(page_lines)):
+            image = writer.add_image(*scanned_image(lines))
+            content = writer.add_stream(b'q %d 0 0 %d 0 0 cm /Im1 Do Q\n' % (PAGE_WIDTH, PAGE_HEIGHT))
+            resources = b'/XObject << /Im1 %d 0 R >>' % image
+        else:
+            content = writer.add_stream(page_content(lines, layout, number))
+            resources = b'/Font << /F1 %d 0 R /F2 %d 0 R >>' % (regular, bold)
+        kids.append(writer.add(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << %s >> /Contents %d 0 R >>' % (
+                page_tree, PAGE_WIDTH, PAGE_HEIGHT, resources, content)))
+    writer.set(page_tree, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)))
+    writer.set(catalog, b'<< /Type /Catalog /Pages %d 0 R >>' % page_tree)
+    text = "\n".join("\n".join(lines) for lines in page_lines)
+    return writer.build(catalog), text
+
+
+# Function to (re)generate the corpus and its manifest of expected skills per file
+def write_corpus(directory=CORPUS_DIR, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    manifest = {}
+    for index, (pages, layout) in enumerate(SPECS):
+        data, text = build_resume(index, pages, layout, seed)
+        name = f"resume_{index:02d}_{layout}_{pages}p.pdf"
+        with open(os.path.join(directory, name), 'wb') as file:
+            file.write(data)
+        manifest[name] = {'pages': pages, 'layout': layout, 'chars': len(text),
+                          'skills': sorted(skill_matcher.find_skills(text))}
+    with open(os.path.join(directory, MANIFEST), 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+# Function to load the corpus as (path, expected) pairs, generating it first if it is missing
+def load_corpus(directory=CORPUS_DIR):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        write_corpus(directory)
+    with open(path) as file:
+        manifest = json.load(file)
+    return [(os.path.join(directory, name), expected) for name, expected in sorted(manifest.items())]
+
+
+# Usage: python -m benchmarks.resume_corpus [directory]
+if __name__ == "__main__":
+    corpus = write_corpus(sys.argv[1] if len(sys.argv) > 1 else CORPUS_DIR)
+    print(f"Wrote {len(corpus)} resumes, {sum(entry['pages'] for entry in corpus.values())} pages")
@@ -0,0 +1,165 @@
+import argparse
+import random
+
+import numpy as np
+import pandas as pd
+
+import adaptive
+
+# Follow-ups in questiongeneration1 dig into the previous answer, so each one is treated as a step harder
+FOLLOW_UP_STEP = 0.5
+
+
+# Synthetic candidate: a general ability plus a per-skill offset, on the same scale as the level difficulties
+class Candidate:
+    def __init__(self, rng, skills, spread):
+        general = rng.gauss(0, 1)
+        self.ability = {skill: general + rng.gauss(0, spread) for skill in skills}
+
+    @property
+    def overall(self):
+        return sum(self.ability.values()) / len(self.ability)
+
+
+# Answers follow the engine's model, plus per-question difficulty noise the engine does not know about
+class Grader:
+    def __init__(self, rng, question_noise):
+        self.rng = rng
+        self.question_noise = question_noise
+
+    def relevant(self, ability, difficulty):
+        difficulty += self.rng.gauss(0, self.question_noise)
+        p = adaptive.SLIP / 2 + (1 - adaptive.SLIP) / (1 + np.exp(-(ability - difficulty)))
+        return self.rng.random() < p
+
+
+class Cost:
+    def __init__(self, grading_share):
+        self.grading_share = grading_share
+        self.questions = 0
+        self.generations = 0
+
+    def ask(self):
+        self.questions += 1
+
+    # Each answer costs a model answer plus, for answers the local prefilter cannot decide, a grading call
+    @property
+    def llm_calls(self):
+        return self.generations + self.questions * (1 + self.grading_share)
+
+
+# question4/question5: one batched generation per skill, then easy, normal and hard for every skill
+def fixed_levels(candidate, grader, cost, args):
+    scores = {}
+    for skill, ability in candidate.ability.items():
+        cost.generations += 1
+        answers = []
+        for level in adaptive.LEVELS:
+            cost.ask()
+            answers.append(grader.relevant(ability, adaptive.LEVEL_DIFFICULTY[level]))
+        scores[skill] = sum(answers) / len(answers)
+    return sum(scores.values()) / len(scores), scores
+
+
+# questiongeneration1: a primary question per skill, then up to 2 follow-ups while answers stay relevant
+def follow_ups(candidate, grader, cost, args):
+    scores = {}
+    for skill, ability in candidate.ability.items():
+        answers = []
+        difficulty = adaptive.LEVEL_DIFFICULTY['normal']
+        while len(answers) <= args.follow_ups:
+            cost.generations += 1
+            cost.ask()
+            answers.append(grader.relevant(ability, difficulty))
+            if not answers[-1]:
+                break
+            difficulty += FOLLOW_UP_STEP
+        scores[skill] = sum(answers) / len(answers)
+    return sum(scores.values()) / len(scores), scores
+
+
+# adaptive.py: one batched generation per skill it asks about; repeat levels come from the banked surplus
+def adaptive_engine(candidate, grader, cost, args):
+    interview = adaptive.AdaptiveInterview(list(candidate.ability), args.target_sd, args.max_questions,
+                                           args.max_per_skill)
+    while True:
+        picked = interview.next_question()
+        if picked is None:
+            break
+        skill, level = picked
+        if not interview.estimates[skill].answers:
+            cost.generations += 1
+        cost.ask()
+        interview.record(skill, level, grader.relevant(candidate.ability[skill], adaptive.LEVEL_DIFFICULTY[level]))
+    scores = {row['skill']: row['ability'] for row in interview.summary()}
+    return interview.ability, scores
+
+
+POLICIES = {'fixed_levels': fixed_levels, 'follow_ups': follow_ups, 'adaptive': adaptive_engine}
+
+
+def spearman(truth, estimate):
+    frame = pd.DataFrame({'truth': truth, 'estimate': estimate}).rank()
+    return float(frame['truth'].corr(frame['estimate']))
+
+
+# Function to run every policy on the same candidates (each with its own answer stream) and summarise
+# cost and ranking accuracy
+def simulate(args):
+    rng = random.Random(args.seed)
+    skill_names = [f"skill{index:02d}" for index in range(40)]
+    candidates = [Candidate(rng, rng.sample(skill_names, rng.randint(args.min_skills, args.max_skills)), args.spread)
+                  for _ in range(args.candidates)]
+    results = {}
+    for name, policy in POLICIES.items():
+        grader = Grader(random.Random(args.seed + 1), args.question_noise)
+        questions, calls, overall, per_skill_truth, per_skill_estimate = [], [], [], [], []
+        for candidate in candidates:
+            cost = Cost(args.grading_share)
+            score, scores = policy(candidate, grader, cost, args)
+            questions.append(cost.questions)
+            calls.append(cost.llm_calls)
+            overall.append(score)
+            for skill, value in scores.items():
+                per_skill_truth.append(candidate.ability[skill])
+                per_skill_estimate.append(value)
+        results[name] = {
+            'questions': float(np.mean(questions)),
+            'llm_calls': float(np.mean(calls)),
+            'minutes': float(np.mean(questions)) * args.minutes_per_question,
+            'ranking_spearman': spearman([candidate.overall for candidate in candidates], overall),
+            'skill_spearman': spearman(per_skill_truth, per_skill_estimate),
+        }
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate fixed and adaptive interview flows on synthetic candidates.")
+    parser.add_argument('--candidates', type=int, default=500)
+    parser.add_argument('--min-skills', type=int, default=3)
+    parser.add_argument('--max-skills', type=int, default=15)
+    parser.add_argument('--spread', type=float, default=0.7, help="per-skill ability spread around the candidate")
+    parser.add_argument('--question-noise', type=float, default=0.5, help="SD of true question difficulty per level")
+    parser.add_argument('--grading-share', type=float, default=0.5, help="share of answers needing a grading call")
+    parser.add_argument('--follow-ups', type=int, default=2)
+    parser.add_argument('--minutes-per-question', type=float, default=2.0)
+    parser.add_argument('--target-sd', type=float, default=adaptive.ADAPTIVE_TARGET_SD)
+    parser.add_argument('--max-questions', type=int, default=adaptive.ADAPTIVE_MAX_QUESTIONS)
+    parser.add_argument('--max-per-skill', type=int, default=adaptive.ADAPTIVE_MAX_PER_SKILL)
+    parser.add_argument('--seed', type=int, default=7)
+    return parser.parse_args(argv)
+
+
+# Usage: python -m benchmarks.simulate_interviews [--candidates N] [--max-questions N] ...
+def main(argv=None):
+    args = parse_args(argv)
+    results = simulate(args)
+    print(f"{args.candidates} candidates, {args.min_skills}-{args.max_skills} skills each")
+    print(f"{'policy':<14}{'questions':>10}{'LLM calls':>11}{'minutes':>9}{'ranking rho':>13}{'skill rho':>11}")
+    for name, row in results.items():
+        print(f"{name:<14}{row['questions']:>10.1f}{row['llm_calls']:>11.1f}{row['minutes']:>9.1f}"
+              f"{row['ranking_spearman']:>13.3f}{row['skill_spearman']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
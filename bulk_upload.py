@@ -0,0 +1,242 @@
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pymongo import UpdateOne
+
+import pdf_extract
+import resume_upload
+
+logger = logging.getLogger(__name__)
+
+# Bulk onboarding limits; parsing runs in a process pool because PDF extraction is CPU-bound
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "2000"))
+BULK_MAX_ARCHIVE_BYTES = int(os.getenv("BULK_MAX_ARCHIVE_BYTES", str(1024 * 1024 * 1024)))
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(os.cpu_count() or 2)))
+BULK_POOL = os.getenv("BULK_POOL", "process")
+BULK_WRITE_BATCH = int(os.getenv("BULK_WRITE_BATCH", "200"))
+PROFILE_DATABASE = os.getenv("PROFILE_DATABASE", "resume_profiles")
+PROFILE_COLLECTION = 'profiles'
+MANIFEST_NAMES = ('manifest.json', 'manifest.csv')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Raised for a batch that cannot be processed at all (bad manifest, bad archive, too many files)
+class BulkUploadError(ValueError):
+    pass
+
+
+# One file of a batch; `error` is set when it was rejected before parsing
+class BulkItem:
+    def __init__(self, filename, person_id=None, data=None, sha256=None, error=None):
+        self.filename = filename
+        self.person_id = person_id
+        self.data = data
+        self.sha256 = sha256
+        self.error = error
+
+
+# An uploaded file taken over from the request. Flask closes request.files as soon as the view returns,
+# before a streamed response is generated, so the stream is moved here and closed by the generator.
+class DetachedUpload:
+    def __init__(self, file):
+        self.filename = file.filename
+        self.stream = file.stream
+        file.stream = io.BytesIO()
+
+    def close(self):
+        self.stream.close()
+
+
+# Function to parse a person-id manifest: a JSON object {"file.pdf": "person_id"}, a JSON list of
+# {"file": ..., "person_id": ...} rows, or CSV rows of file,person_id (a header row is optional)
+def load_manifest(text):
+    text = (text or '').strip()
+    if not text:
+        return {}
+    if text[0] in '[{':
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise BulkUploadError(f"Manifest is not valid JSON: {e}")
+        if isinstance(data, dict):
+            return {os.path.basename(str(name)): str(person_id) for name, person_id in data.items()}
+        return {os.path.basename(str(row['file'])): str(row['person_id']) for row in data}
+    manifest = {}
+    for row in csv.reader(io.StringIO(text)):
+        if len(row) < 2 or row[0].strip().lower() in ('file', 'filename'):
+            continue
+        manifest[os.path.basename(row[0].strip())] = row[1].strip()
+    return manifest
+
+
+def _item(filename, stream, manifest):
+    filename = os.path.basename(filename)
+    person_id = manifest.get(filename)
+    if not person_id:
+        return BulkItem(filename, error="No person ID for this file in the manifest")
+    try:
+        with resume_upload.read_upload(stream) as upload:
+            return BulkItem(filename, person_id, upload.stream.read(), upload.sha256)
+    except ValueError as e:
+        return BulkItem(filename, person_id, error=str(e))
+
+
+# Function to read a multipart batch (a list of werkzeug FileStorage objects) lazily, one file at a time
+def iter_multipart(files, manifest):
+    if len(files) > BULK_MAX_FILES:
+        raise BulkUploadError(f"At most {BULK_MAX_FILES} files per batch.")
+    for file in files:
+        yield _item(file.filename, file, manifest)
+
+
+# Function to read the PDFs of a zip archive. A manifest.json/manifest.csv inside the archive is used
+# when no manifest was sent with the request. Sizes come from the zip directory, so oversized members
+# are rejected before they are decompressed.
+def iter_archive(stream, manifest=None):
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise BulkUploadError(f"Archive is not a valid zip file: {e}")
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if not manifest:
+        for info in members:
+            if os.path.basename(info.filename).lower() in MANIFEST_NAMES:
+                manifest = load_manifest(archive.read(info).decode('utf-8-sig'))
+                break
+    pdfs = [info for info in members if info.filename.lower().endswith('.pdf')]
+    if len(pdfs) > BULK_MAX_FILES:
+        raise BulkUploadError(f"At most {BULK_MAX_FILES} files per batch.")
+    if sum(info.file_size for info in pdfs) > BULK_MAX_ARCHIVE_BYTES:
+        raise BulkUploadError(f"Archive expands to more than {BULK_MAX_ARCHIVE_BYTES} bytes.")
+    for info in pdfs:
+        if info.file_size > resume_upload.RESUME_MAX_BYTES:
+            yield BulkItem(os.path.basename(info.filename), (manifest or {}).get(os.path.basename(info.filename)),
+                           error=f"Resume is larger than {resume_upload.RESUME_MAX_BYTES} bytes.")
+            continue
+        with archive.open(info) as member:
+            yield _item(info.filename, io.BytesIO(member.read()), manifest or {})
+
+
+# Runs in a worker process: PDF bytes in, text (or an error message) out
+def parse_pdf(data):
+    try:
+        return pdf_extract.extract_text(io.BytesIO(data)), None
+    except Exception as e:
+        return "", f"Error extracting text from PDF: {e}"
+
+
+# Function to return the shared parsing pool, falling back to threads where processes are unavailable
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if BULK_POOL == 'process':
+                try:
+                    _pool = ProcessPoolExecutor(max_workers=BULK_WORKERS)
+                except (OSError, NotImplementedError) as e:
+                    logger.warning("Process pool unavailable (%s); parsing resumes on threads.", e)
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=BULK_WORKERS)
+        return _pool
+
+
+# Buffers profile upserts and sends them as unordered bulk writes of BULK_WRITE_BATCH
+class ProfileWriter:
+    def __init__(self, collection, batch_size=BULK_WRITE_BATCH):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.operations = []
+        self.written = 0
+        self.errors = 0
+
+    def add(self, profile):
+        self.operations.append(UpdateOne({'person_id': profile['person_id']}, {'$set': profile}, upsert=True))
+        if len(self.operations) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.operations:
+            return
+        operations, self.operations = self.operations, []
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            self.written += result.upserted_count + result.matched_count
+        except Exception as e:
+            self.errors += len(operations)
+            logger.error("Error writing resume profiles to MongoDB: %s", e)
+
+
+def get_profile_collection(client):
+    collection = client[PROFILE_DATABASE][PROFILE_COLLECTION]
+    collection.create_index('person_id', unique=True)
+    return collection
+
+
+# Function to parse a batch across the pool and yield one result dict per file; rejected files are
+# reported immediately, parsed ones in upload order.
+# At most 2 x BULK_WORKERS files are in flight, so memory stays flat for large archives.
+# A final {"type": "summary"} dict reports totals once every profile has been written.
+def process_items(items, extract_skills, collection, workers=None):
+    pool = get_pool()
+    window = 2 * (workers or BULK_WORKERS)
+    writer = ProfileWriter(collection)
+    in_flight = deque()
+    counts = {'files': 0, 'ok': 0, 'failed': 0}
+    started = time.perf_counter()
+
+    def finish(item, text, error):
+        counts['files'] += 1
+        if not error and not text.strip():
+            error = "No text found in the resume."
+        if error:
+            counts['failed'] += 1
+            return {'type': 'result', 'file': item.filename, 'person_id': item.person_id, 'status': 'error',
+                    'error': error}
+        resume_upload.text_cache.put(item.sha256, text)
+        skills = sorted(extract_skills(text))
+        writer.add({
+            'person_id': item.person_id, 'file': item.filename, 'sha256': item.sha256, 'skills': skills,
+            'text_chars': len(text), 'updated_at': time.time(),
+        })
+        counts['ok'] += 1
+        return {'type': 'result', 'file': item.filename, 'person_id': item.person_id, 'status': 'ok',
+                'skills': skills}
+
+    def drain(limit):
+        while len(in_flight) > limit:
+            item, future = in_flight.popleft()
+            text, error = future.result()
+            yield finish(item, text, error)
+
+    for item in items:
+        if item.error:
+            yield finish(item, '', item.error)
+            continue
+        cached = resume_upload.text_cache.get(item.sha256)
+        if cached is not None:
+            yield finish(item, cached, None)
+            continue
+        in_flight.append((item, pool.submit(parse_pdf, item.data)))
+        item.data = None
+        yield from drain(window)
+    yield from drain(0)
+
+    writer.flush()
+    yield {'type': 'summary', **counts, 'written': writer.written, 'write_errors': writer.errors,
+           'elapsed_seconds': round(time.perf_counter() - started, 3)}
+
+
+# Function to format results as NDJSON lines for a streaming response
+def ndjson(results):
+    for result in results:
+        yield json.dumps(result) + "\n"
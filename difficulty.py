@@ -0,0 +1,68 @@
+import re
+
+import question_bank
+
+LEVELS = ('easy', 'normal', 'hard')
+
+# Phrases that usually mark recall, explanation and design/analysis questions respectively
+EASY_CUES = (
+    'what is', 'what are', 'what does', 'define', 'name ', 'list ', 'which ', 'full form',
+    'what do you mean', 'basic', 'stand for',
+)
+NORMAL_CUES = (
+    'explain', 'how does', 'how do', 'how can', 'difference between', 'when would you',
+    'when should', 'example', 'describe', 'why is', 'why do',
+)
+HARD_CUES = (
+    'design', 'optimi', 'trade-off', 'tradeoff', 'scal', 'internals', 'under the hood', 'concurren',
+    'thread', 'race condition', 'memory', 'performance', 'architect', 'implement', 'debug',
+    'edge case', 'distributed', 'complexity', 'how would you', 'troubleshoot', 'bottleneck',
+    'secure', 'migrat', 'consisten', 'fault',
+)
+TECHNICAL_TOKEN = re.compile(r'\w+(?:\.\w+)+|\w+\(\)|\b[a-z]+[A-Z]\w*|\b\w+_\w+')
+
+
+# Function to score how hard a question is from cheap lexical signals; higher means harder
+def score_difficulty(question):
+    text = question.lower()
+    words = text.split()
+    score = 0.0
+    score -= 1.0 * sum(cue in text for cue in EASY_CUES)
+    score += 0.5 * sum(cue in text for cue in NORMAL_CUES)
+    score += min(3.0, 1.2 * sum(cue in text for cue in HARD_CUES))
+    score += 0.05 * max(0, len(words) - 8)
+    score += 0.25 * (text.count(',') + text.count(' and ') + text.count(' while ') + text.count(' versus '))
+    score += 0.3 * len(TECHNICAL_TOKEN.findall(question))
+    return score
+
+
+# Function to rank every generated question and split the ranking into easy/normal/hard thirds.
+# Each bucket is ordered so its most typical question comes first.
+def bucket_questions(questions):
+    scored = sorted(((score_difficulty(q), q) for q in questions), key=lambda item: item[0])
+    size, extra = divmod(len(scored), 3)
+    bounds, start = [], 0
+    for index in range(3):
+        end = start + size + (1 if index < extra else 0)
+        bounds.append((start, end))
+        start = end
+
+    easy, normal, hard = (scored[start:end] for start, end in bounds)
+    if normal:
+        middle = normal[len(normal) // 2][0]
+        normal = sorted(normal, key=lambda item: abs(item[0] - middle))
+    hard = list(reversed(hard))
+    return {level: bucket for level, bucket in zip(LEVELS, (easy, normal, hard))}
+
+
+# Function to pick one question per level from the whole batch and bank the surplus for later interviews
+def categorize_questions(questions, skill=None):
+    buckets = bucket_questions(questions)
+    picked = tuple([bucket[0][1]] if bucket else [] for bucket in buckets.values())
+    if skill:
+        question_bank.add_questions(skill, [
+            (level, question, score)
+            for level, bucket in buckets.items()
+            for score, question in bucket[1:]
+        ])
+    return picked
@@ -0,0 +1,179 @@
+import logging
+import os
+import random
+import sys
+import threading
+
+import prompts
+import question_bank
+import question_parser
+
+logger = logging.getLogger(__name__)
+
+# HR round: questions come from pools per topic, generated once (or offline) and reused across candidates.
+# Answers are graded and stored like technical ones under the HR skill; a follow-up is only asked when a
+# relevant answer is too brief to judge.
+HR_SKILL = 'HR'
+HR_TOPICS = [topic.strip() for topic in os.getenv("HR_TOPICS", "teamwork,conflict,goals,company_fit").split(',')]
+HR_QUESTION_COUNT = int(os.getenv("HR_QUESTION_COUNT", "3"))
+HR_POOL_SIZE = int(os.getenv("HR_POOL_SIZE", "8"))
+HR_MAX_FOLLOW_UPS = int(os.getenv("HR_MAX_FOLLOW_UPS", "1"))
+# Relevant answers shorter than this many words get a follow-up asking for detail
+HR_DETAIL_WORDS = int(os.getenv("HR_DETAIL_WORDS", "40"))
+
+# What each topic's questions are about; {company} is filled in for company-specific topics
+TOPICS = {
+    'teamwork': "working in a team, collaborating with colleagues and sharing responsibility",
+    'conflict': "handling conflict, disagreements and difficult conversations at work",
+    'goals': "career goals, motivation and personal growth",
+    'company_fit': "why the candidate wants to join {company} and how they would fit its culture",
+}
+
+_rng = random.Random()
+
+
+# Questions drawn, pools generated, answers graded and follow-ups asked or saved
+class HRStats:
+    FIELDS = ('drawn', 'pool_fills', 'pool_misses', 'answers', 'follow_ups', 'follow_ups_skipped')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+
+    def record(self, field, amount=1):
+        with self.lock:
+            self.values[field] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+stats = HRStats()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Company-specific topics get a pool per company; the others share one pool
+def _company(topic, company):
+    return company if '{company}' in TOPICS.get(topic, '') else ''
+
+
+# Function to generate `size` questions for a topic and add them to its pool; returns how many were new.
+# `generate` sends a prompt and returns text.
+def fill_pool(topic, company, generate, size=None):
+    description = TOPICS.get(topic, topic).format(company=company)
+    prompt = prompts.render('hr_topic_questions', topic=description, count=size or HR_POOL_SIZE)
+    questions = question_parser.generate_questions(prompt, generate)
+    added = question_bank.add_hr_questions(topic, _company(topic, company), questions)
+    stats.record('pool_fills')
+    logger.info("Added %d HR questions to the '%s' pool.", added, topic)
+    return added
+
+
+# Function to draw one pooled question for a topic, generating the pool the first time it is empty
+def draw_question(topic, company, generate):
+    question = question_bank.draw_hr_question(topic, _company(topic, company))
+    if question is None:
+        stats.record('pool_misses')
+        fill_pool(topic, company, generate)
+        question = question_bank.draw_hr_question(topic, _company(topic, company))
+    if question:
+        stats.record('drawn')
+    return question
+
+
+# Function to choose the topics of an HR round: with room for more than one question the company-specific
+# topics are always asked (last), the others fill the remaining slots in random order
+def pick_topics(count):
+    fixed = [topic for topic in HR_TOPICS if '{company}' in TOPICS.get(topic, '')]
+    others = [topic for topic in HR_TOPICS if topic not in fixed]
+    if count <= len(fixed) or not others:
+        return _rng.sample(HR_TOPICS, min(count, len(HR_TOPICS)))
+    others = _rng.sample(others, len(others))
+    return [others[index % len(others)] for index in range(count - len(fixed))] + fixed
+
+
+# Function to draw `count` (topic, question) pairs from the pools; a question already picked for this round
+# (pools may overlap) is drawn again once
+def pick_questions(company, generate, count=None):
+    picked = []
+    for topic in pick_topics(HR_QUESTION_COUNT if count is None else count):
+        question = draw_question(topic, company, generate)
+        if question in [asked for _, asked in picked]:
+            question = draw_question(topic, company, generate)
+        if question and question not in [asked for _, asked in picked]:
+            picked.append((topic, question))
+    return picked
+
+
+# Function to decide whether an HR answer deserves a follow-up: off-topic answers do not (the topic is
+# settled), and neither do detailed ones; a relevant but brief answer does
+def needs_follow_up(answer, is_relevant):
+    needed = bool(is_relevant) and len((answer or '').split()) < HR_DETAIL_WORDS
+    if is_relevant and not needed:
+        stats.record('follow_ups_skipped')
+    return needed
+
+
+# Function to run the HR round. `ask(label, question)` returns the candidate's answer, `grade(question,
+# answer)` grades and stores it and returns its relevance, `generate(prompt)` returns text.
+# Returns the graded (question, answer, relevant) triples.
+def run_round(company, ask, grade, generate, count=None):
+    graded = []
+    for _, question in pick_questions(company, generate, count):
+        answer = ask("HR Question", question)
+        if not answer.strip():
+            continue
+        is_relevant = grade(question, answer)
+        stats.record('answers')
+        graded.append((question, answer, is_relevant))
+        follow_ups = 0
+        while follow_ups < HR_MAX_FOLLOW_UPS and needs_follow_up(answer, is_relevant):
+            follow_up = generate(prompts.render('hr_follow_up', question=question, answer=answer))
+            if not follow_up:
+                break
+            follow_ups += 1
+            stats.record('follow_ups')
+            answer = ask("HR Follow-up Question", follow_up)
+            if not answer.strip():
+                break
+            is_relevant = grade(follow_up, answer)
+            stats.record('answers')
+            graded.append((follow_up, answer, is_relevant))
+    return graded
+
+
+# Usage: python hr_interview.py fill [company] [--size N] | stats
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command != 'fill':
+        for (topic, company), count in sorted(question_bank.hr_pool_counts().items()):
+            print(f"{topic:<14}{company or '-':<20}{count:>6}")
+        return
+
+    from dotenv import load_dotenv
+    import google.generativeai as gen_ai
+
+    import job_matching
+    import llm_gateway
+
+    load_dotenv()
+    arguments = sys.argv[2:]
+    size = None
+    if '--size' in arguments:
+        index = arguments.index('--size')
+        size = int(arguments[index + 1])
+        del arguments[index:index + 2]
+    gen_ai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    model = gen_ai.GenerativeModel('gemini-pro')
+    company = arguments[0] if arguments else job_matching.company_name()
+    for topic in HR_TOPICS:
+        added = fill_pool(topic, company, lambda prompt: llm_gateway.generate(model, prompt).strip(), size)
+        print(f"{topic}: {added} new questions")
+
+
+if __name__ == "__main__":
+    main()
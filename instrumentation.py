@@ -0,0 +1,212 @@
+import bisect
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Timing spans and histograms for the interview hot path. With INSTRUMENTATION=0, timed() returns the
+# function unchanged and span() hands back a shared no-op context, so the disabled cost is one attribute check.
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "1") == "1"
+METRICS_PREFIX = 'interview_bot'
+# Latency buckets in seconds, from regex matching up to slow Gemini calls and TTS playback
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_report = contextvars.ContextVar('interview_report', default=None)
+
+
+# Cumulative Prometheus-style histogram per step name
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, name, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, totals = self.series.setdefault(name, ([0] * (len(self.buckets) + 1), [0, 0.0]))
+            counts[index] += 1
+            totals[0] += 1
+            totals[1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {name: (list(counts), list(totals)) for name, (counts, totals) in self.series.items()}
+
+
+# Monotonic counters, e.g. LLM token totals
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name, amount=1):
+        with self.lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+# Timings of a single interview, collected for the CLI's end-of-interview report
+class InterviewReport:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.steps.setdefault(name, []).append(seconds)
+
+    def count(self, name, amount):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def format(self):
+        total = time.perf_counter() - self.started
+        lines = [f"{'step':<24}{'count':>7}{'total s':>10}{'mean s':>9}{'max s':>9}{'share':>8}"]
+        for name, values in sorted(self.steps.items(), key=lambda item: -sum(item[1])):
+            spent = sum(values)
+            lines.append(
+                f"{name:<24}{len(values):>7}{spent:>10.3f}{spent / len(values):>9.3f}"
+                f"{max(values):>9.3f}{spent / total if total else 0:>8.1%}"
+            )
+        lines.append(f"{'interview':<24}{'':>7}{total:>10.3f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+
+histogram = Histogram()
+counters = Counters()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# Function to record one timing under `name` in the histogram and the current interview report
+def observe(name, seconds):
+    histogram.observe(name, seconds)
+    report = _report.get()
+    if report is not None:
+        report.add(name, seconds)
+
+
+# Function to add to a counter in the process totals and the current interview report
+def count(name, amount=1):
+    if not INSTRUMENTATION:
+        return
+    counters.add(name, amount)
+    report = _report.get()
+    if report is not None:
+        report.count(name, amount)
+
+
+@contextmanager
+def _span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+# Usage: with instrumentation.span('extract_skills'): ...
+def span(name):
+    if not INSTRUMENTATION:
+        return _NULL_SPAN
+    return _span(name)
+
+
+# Decorator form of span(); a no-op when instrumentation is disabled
+def timed(name):
+    def decorator(function):
+        if not INSTRUMENTATION:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# Function to collect the timings of everything run inside the block (in this thread or context)
+@contextmanager
+def interview_report():
+    report = InterviewReport()
+    token = _report.set(report)
+    try:
+        yield report
+    finally:
+        _report.reset(token)
+
+
+# Function to run a CLI entry point and print its timing report at the end
+def run_with_report(function):
+    with interview_report() as report:
+        try:
+            return function()
+        finally:
+            if INSTRUMENTATION and report.steps:
+                print("\nTiming report\n" + report.format())
+
+
+# Token counts for one Gemini reply: the SDK's usage metadata when present, a 4-chars-per-token estimate otherwise
+def token_counts(prompt, response, text):
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    response_tokens = getattr(usage, 'candidates_token_count', None)
+    if prompt_tokens is None:
+        prompt_tokens = max(1, len(prompt) // 4)
+    if response_tokens is None:
+        response_tokens = max(1, len(text or '') // 4)
+    return prompt_tokens, response_tokens
+
+
+def _metric_name(name):
+    return f"{METRICS_PREFIX}_{''.join(c if c.isalnum() else '_' for c in name)}"
+
+
+# Function to render all histograms and counters (plus any `extra` counters and `gauges`) in Prometheus text format
+def render_prometheus(extra=None, gauges=None):
+    lines = [
+        f"# HELP {METRICS_PREFIX}_step_seconds Time spent per interview step.",
+        f"# TYPE {METRICS_PREFIX}_step_seconds histogram",
+    ]
+    for name, (counts, (total_count, total_sum)) in sorted(histogram.snapshot().items()):
+        cumulative = 0
+        for bound, bucket_count in zip(list(histogram.buckets) + ['+Inf'], counts):
+            cumulative += bucket_count
+            lines.append(f'{METRICS_PREFIX}_step_seconds_bucket{{step="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{METRICS_PREFIX}_step_seconds_sum{{step="{name}"}} {total_sum:.6f}')
+        lines.append(f'{METRICS_PREFIX}_step_seconds_count{{step="{name}"}} {total_count}')
+
+    values = counters.snapshot()
+    values.update(extra or {})
+    for name, value in sorted(values.items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in sorted((gauges or {}).items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,96 @@
+import os
+import time
+from contextlib import contextmanager
+
+import llm_gateway
+
+# Per-interview budget: LLM calls made through the gateway and wall-clock seconds (0 = no limit).
+# A skill only starts when its expected cost still fits.
+INTERVIEW_LLM_BUDGET = int(os.getenv("INTERVIEW_LLM_BUDGET", "40"))
+INTERVIEW_TIME_BUDGET = float(os.getenv("INTERVIEW_TIME_BUDGET", "0"))
+
+
+# Accounts LLM calls and time per skill for one interview and decides whether another skill fits.
+# `calls_per_skill` is the script's worst case for a skill, used until a skill has been measured.
+class InterviewBudget:
+    def __init__(self, calls_per_skill, max_calls=None, max_seconds=None):
+        self.calls_per_skill = calls_per_skill
+        self.max_calls = INTERVIEW_LLM_BUDGET if max_calls is None else max_calls
+        self.max_seconds = INTERVIEW_TIME_BUDGET if max_seconds is None else max_seconds
+        # Counter of the track() block in progress, if any
+        self.tracking = None
+        self.started = time.perf_counter()
+        self.spent = {}
+        self.skipped = []
+
+    # Calls made inside this interview's track() blocks only, not the process-wide gateway total
+    @property
+    def calls(self):
+        spent = sum(entry['calls'] for entry in self.spent.values())
+        return spent + (self.tracking.calls if self.tracking is not None else 0)
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    # Expected calls and seconds for one more skill: the average of the skills so far, else the worst case
+    def estimate(self):
+        if not self.spent:
+            return self.calls_per_skill, 0.0
+        calls = sum(entry['calls'] for entry in self.spent.values()) / len(self.spent)
+        seconds = sum(entry['seconds'] for entry in self.spent.values()) / len(self.spent)
+        return max(calls, 1), seconds
+
+    # Function to return why `calls` more LLM calls (and `seconds`) would break the budget, or None
+    def over(self, calls, seconds=0.0):
+        if self.max_calls and self.calls + calls > self.max_calls:
+            return 'LLM call budget'
+        if self.max_seconds and self.seconds + seconds > self.max_seconds:
+            return 'time budget'
+        return None
+
+    # Function to check whether a new skill fits; a skill that does not is recorded as skipped
+    def allows_skill(self, skill):
+        reason = self.over(*self.estimate())
+        if reason:
+            self.skip(skill, reason)
+            return False
+        return True
+
+    def skip(self, skill, reason):
+        self.skipped.append((skill, reason))
+
+    # Usage: with budget.track(skill): ... -- charges the calls and time inside the block to the skill
+    @contextmanager
+    def track(self, skill):
+        started = time.perf_counter()
+        with llm_gateway.count_calls() as counter:
+            self.tracking = counter
+            try:
+                yield
+            finally:
+                self.tracking = None
+                entry = self.spent.setdefault(skill, {'calls': 0, 'seconds': 0.0, 'questions': 0})
+                entry['calls'] += counter.calls
+                entry['seconds'] += time.perf_counter() - started
+
+    def count_question(self, skill):
+        self.spent.setdefault(skill, {'calls': 0, 'seconds': 0.0, 'questions': 0})['questions'] += 1
+
+    def to_dict(self):
+        return {
+            'calls': self.calls, 'max_calls': self.max_calls, 'seconds': round(self.seconds, 3),
+            'max_seconds': self.max_seconds, 'skills': self.spent,
+            'skipped': [{'skill': skill, 'reason': reason} for skill, reason in self.skipped],
+        }
+
+    def format(self):
+        lines = [f"{'skill':<24}{'questions':>10}{'LLM calls':>11}{'seconds':>9}"]
+        for skill, entry in self.spent.items():
+            lines.append(f"{skill:<24}{entry['questions']:>10}{entry['calls']:>11}{entry['seconds']:>9.1f}")
+        limit_calls = self.max_calls or 'no limit'
+        limit_seconds = f"{self.max_seconds:.0f}s" if self.max_seconds else 'no limit'
+        lines.append(f"LLM calls: {self.calls} of {limit_calls}, time: {self.seconds:.0f}s of {limit_seconds}")
+        for skill, reason in self.skipped:
+            lines.append(f"skipped {skill}: {reason}")
+        return "\n".join(lines)
@@ -0,0 +1,264 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import app_logging
+import hr_interview
+
+# Checkpoint store for interviews in progress, so any worker (or a restarted CLI) can resume them
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "interview_sessions.db")
+SESSION_MAX_FOLLOW_UPS = int(os.getenv("SESSION_MAX_FOLLOW_UPS", "2"))
+
+# Interview phases, in the order a session moves through them
+SKILL = 'skill'
+FOLLOW_UP = 'follow_up'
+HR = 'hr'
+HR_FOLLOW_UP = 'hr_follow_up'
+FINISHED = 'finished'
+SKILL_PHASES = (SKILL, FOLLOW_UP)
+
+_lock = threading.RLock()
+_connection = None
+
+
+# Base error for invalid session transitions and store failures
+class SessionError(Exception):
+    pass
+
+
+# Raised when another worker checkpointed the session since it was loaded
+class SessionConflictError(SessionError):
+    pass
+
+
+# Compact, serialisable interview state. Question generation and grading stay in the scripts;
+# the session only records what was asked and decides what comes next.
+class InterviewSession:
+    FIELDS = (
+        'session_id', 'person_id', 'skills', 'phase', 'skill_index', 'level', 'follow_up_count',
+        'question', 'base_question', 'last_answer', 'pending', 'version', 'created_at', 'updated_at',
+    )
+
+    def __init__(self, session_id, person_id, skills, phase=None, skill_index=0, level=None,
+                 follow_up_count=0, question=None, base_question=None, last_answer=None,
+                 pending=None, version=0, created_at=None, updated_at=None):
+        self.session_id = session_id
+        self.person_id = person_id
+        self.skills = list(skills)
+        self.phase = phase or (SKILL if self.skills else HR)
+        self.skill_index = skill_index
+        self.level = level
+        self.follow_up_count = follow_up_count
+        self.question = question
+        self.base_question = base_question
+        self.last_answer = last_answer
+        self.pending = list(pending or [])
+        self.version = version
+        self.created_at = created_at or time.time()
+        self.updated_at = updated_at or self.created_at
+
+    @classmethod
+    def start(cls, person_id, skills):
+        return cls(uuid.uuid4().hex, person_id, skills)
+
+    @property
+    def current_skill(self):
+        if self.phase in SKILL_PHASES:
+            return self.skills[self.skill_index]
+        return None
+
+    @property
+    def finished(self):
+        return self.phase == FINISHED
+
+    # True when the next step is to generate a question rather than grade or wait for an answer
+    @property
+    def needs_question(self):
+        return not self.finished and self.question is None and not self.pending
+
+    # Function to record the question that was just generated for the current phase
+    def ask(self, question, level=None):
+        if not self.needs_question:
+            raise SessionError(f"Session {self.session_id} is not waiting for a question.")
+        self.question = question
+        self.level = level
+        if self.phase in (SKILL, HR):
+            self.base_question = question
+
+    # Function to record the candidate's answer; it waits in `pending` until graded (HR answers under the HR skill)
+    def submit_answer(self, answer):
+        if self.finished or self.question is None:
+            raise SessionError(f"Session {self.session_id} has no open question.")
+        self.last_answer = answer
+        self.pending.append({
+            'question': self.question,
+            'answer': answer,
+            'skill': self.current_skill or hr_interview.HR_SKILL,
+            'level': self.level,
+        })
+        self.question = None
+
+    # Function to apply the grade of the oldest pending answer and move to the next step.
+    # An HR answer only leads to a follow-up when hr_interview says one is needed.
+    def record_grade(self, is_relevant):
+        if not self.pending:
+            raise SessionError(f"Session {self.session_id} has no answer waiting for a grade.")
+        entry = self.pending.pop(0)
+        if self.phase == HR:
+            is_relevant = hr_interview.needs_follow_up(entry['answer'], is_relevant)
+        self._advance(is_relevant)
+
+    # Function to move on when no question could be generated for the current step
+    def skip(self):
+        self.question = None
+        self._advance(False)
+
+    # Function to end the skill questions early (e.g. the interview budget is spent) and go on to HR
+    def skip_remaining_skills(self):
+        if self.phase in SKILL_PHASES:
+            self.skill_index = len(self.skills)
+            self.follow_up_count = 0
+            self.base_question = None
+            self.level = None
+            self.phase = HR
+
+    # Same rules as the CLI loop: up to SESSION_MAX_FOLLOW_UPS follow-ups while answers stay relevant
+    def _advance(self, keep_going):
+        if self.phase in SKILL_PHASES:
+            if keep_going and self.follow_up_count < SESSION_MAX_FOLLOW_UPS:
+                self.phase = FOLLOW_UP
+                self.follow_up_count += 1
+                return
+            self.skill_index += 1
+            self.follow_up_count = 0
+            self.base_question = None
+            self.level = None
+            self.phase = SKILL if self.skill_index < len(self.skills) else HR
+        elif self.phase == HR:
+            self.phase = HR_FOLLOW_UP if keep_going else FINISHED
+        else:
+            self.phase = FINISHED
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    # Short view for API responses
+    def summary(self):
+        return {
+            'session_id': self.session_id,
+            'person_id': self.person_id,
+            'phase': self.phase,
+            'skill': self.current_skill,
+            'skills_done': min(self.skill_index, len(self.skills)),
+            'skills_total': len(self.skills),
+            'follow_up_count': self.follow_up_count,
+            'question': self.question,
+            'pending_grades': len(self.pending),
+            'finished': self.finished,
+        }
+
+
+# Function to open the store once per process and create the schema on first use
+def get_connection():
+    global _connection
+    with _lock:
+        if _connection is None:
+            _connection = sqlite3.connect(SESSION_STORE_PATH, check_same_thread=False, isolation_level=None)
+            _connection.execute("PRAGMA journal_mode=WAL")
+            _connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " person_id TEXT NOT NULL,"
+                " phase TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            _connection.execute("CREATE INDEX IF NOT EXISTS sessions_person ON sessions (person_id, updated_at)")
+        return _connection
+
+
+# Function to checkpoint a session. Writes are versioned, so a worker holding a stale copy
+# gets SessionConflictError instead of overwriting newer progress.
+def save_session(session):
+    expected = session.version
+    session.version += 1
+    session.updated_at = time.time()
+    state = json.dumps(session.to_dict())
+    try:
+        with _lock:
+            connection = get_connection()
+            if expected == 0:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO sessions (session_id, person_id, phase, state, version, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (session.session_id, session.person_id, session.phase, state, session.version, session.updated_at),
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE sessions SET phase = ?, state = ?, version = ?, updated_at = ?"
+                    " WHERE session_id = ? AND version = ?",
+                    (session.phase, state, session.version, session.updated_at, session.session_id, expected),
+                )
+    except sqlite3.Error as e:
+        session.version = expected
+        raise SessionError(f"Error saving session {session.session_id}: {e}")
+    if cursor.rowcount != 1:
+        session.version = expected
+        raise SessionConflictError(f"Session {session.session_id} was updated by another worker.")
+    return session
+
+
+# Function to load a session by id, or None if it does not exist
+def load_session(session_id):
+    with _lock:
+        row = get_connection().execute(
+            "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+    return InterviewSession.from_dict(json.loads(row[0])) if row else None
+
+
+# Function to find the most recent unfinished session for a person, so an interrupted interview can resume
+def find_active_session(person_id):
+    with _lock:
+        row = get_connection().execute(
+            "SELECT state FROM sessions WHERE person_id = ? AND phase != ? ORDER BY updated_at DESC LIMIT 1",
+            (person_id, FINISHED),
+        ).fetchone()
+    return InterviewSession.from_dict(json.loads(row[0])) if row else None
+
+
+# Function to bring a session to its next open question (or to the end), checkpointing after every step.
+# `grade(entry)` returns True/False for a pending answer; `generate(session)` returns the next question
+# ("" when generation failed, which skips the step). Work left by a crashed worker is picked up here too.
+def advance(session, generate, grade):
+    with app_logging.bind(interview_id=session.session_id):
+        while session.pending:
+            session.record_grade(grade(session.pending[0]))
+            save_session(session)
+        while session.needs_question:
+            question = generate(session)
+            if question:
+                session.ask(question)
+            else:
+                session.skip()
+            save_session(session)
+    return session
+
+
+# Function to record the answer to the open question and move on. With no open question, a worker
+# already stored this answer and stopped early, so that step is finished instead of recording it twice.
+def answer(session, user_answer, generate, grade):
+    if session.finished:
+        raise SessionError(f"Session {session.session_id} is already finished.")
+    if session.question is not None:
+        session.submit_answer(user_answer)
+        save_session(session)
+    return advance(session, generate, grade)
@@ -0,0 +1,192 @@
+import logging
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import bulk_upload
+import skill_matcher
+
+logger = logging.getLogger(__name__)
+
+# Job description the CLI scripts interview against (a text file) and the company HR questions ask about
+JOB_DESCRIPTION = os.getenv("JOB_DESCRIPTION", "")
+COMPANY_NAME = os.getenv("COMPANY_NAME", "")
+# A preferred ("nice to have") skill counts this much of a required one in the match score
+JOB_PREFERRED_WEIGHT = float(os.getenv("JOB_PREFERRED_WEIGHT", "0.5"))
+JOB_COLLECTION = 'job_profiles'
+
+# Lines that open a requirements block ("Requirements:", "Must have") or a preferred one ("Nice to have:")
+HEADING = re.compile(r'^\W*(requirement|qualification|must.have|skills|responsibilit|what you|about|'
+                     r'preferred|nice.to.have|good.to.have|bonus|desirable|plus)', re.IGNORECASE)
+PREFERRED = re.compile(r'\b(preferred|nice.to.have|good.to.have|bonus|desirable|a plus|is a plus)\b', re.IGNORECASE)
+
+_current_job = None
+
+
+# Skills one job asks for, split into required and preferred
+class JobProfile:
+    def __init__(self, job_id, title='', company='', required=(), preferred=(), description=''):
+        self.job_id = job_id
+        self.title = title
+        self.company = company
+        self.required = sorted(set(required))
+        self.preferred = sorted(set(preferred) - set(self.required))
+        self.description = description
+
+    @property
+    def skills(self):
+        return self.required + self.preferred
+
+    # Function to return the job's weight for each skill of a vocabulary (1 required, JOB_PREFERRED_WEIGHT
+    # preferred, 0 otherwise) and whether it is required
+    def weights(self, vocabulary):
+        required = {skill.lower() for skill in self.required}
+        preferred = {skill.lower() for skill in self.preferred}
+        keys = [skill.lower() for skill in vocabulary]
+        weights = np.array([1.0 if key in required else JOB_PREFERRED_WEIGHT if key in preferred else 0.0
+                            for key in keys], dtype=np.float32)
+        return weights, np.array([key in required for key in keys], dtype=np.float32)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id, 'title': self.title, 'company': self.company,
+            'required': self.required, 'preferred': self.preferred, 'description': self.description,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['job_id'], data.get('title', ''), data.get('company', ''), data.get('required', ()),
+                   data.get('preferred', ()), data.get('description', ''))
+
+
+# Function to read a job description with the resume skill matcher. Skills under a "Nice to have" /
+# "Preferred" heading, or on a line calling them a plus, are preferred; every other mention is required.
+def parse_job_description(text, job_id='', title='', company='', matcher=skill_matcher.default_matcher):
+    required, preferred = set(), set()
+    in_preferred = False
+    for line in text.splitlines():
+        found = matcher.find(line)
+        heading = HEADING.match(line)
+        if heading and (line.rstrip().endswith(':') or not found):
+            in_preferred = bool(PREFERRED.search(line) or heading.group(1).lower() == 'plus')
+            if not found:
+                continue
+        if in_preferred or PREFERRED.search(line):
+            preferred |= found
+        else:
+            required |= found
+    return JobProfile(job_id, title, company, required, preferred, text)
+
+
+# Candidates as a boolean candidate x skill matrix; `skills` is the column vocabulary
+class CandidateMatrix:
+    def __init__(self, person_ids, skills, matrix):
+        self.person_ids = person_ids
+        self.skills = skills
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.person_ids)
+
+
+# Function to build a CandidateMatrix from (person_id, skills) pairs. The vocabulary starts with the
+# matcher's skills; skills it does not know (e.g. from older profiles) get their own columns.
+def candidate_matrix(profiles, vocabulary=None):
+    columns = {skill.lower(): index for index, skill in enumerate(vocabulary or skill_matcher.default_matcher.skills)}
+    names = list(vocabulary or skill_matcher.default_matcher.skills)
+    person_ids, rows, cols = [], [], []
+    for person_id, skills in profiles:
+        row = len(person_ids)
+        person_ids.append(person_id)
+        for skill in skills or ():
+            key = skill.lower()
+            if key not in columns:
+                columns[key] = len(names)
+                names.append(skill)
+            rows.append(row)
+            cols.append(columns[key])
+    matrix = np.zeros((len(person_ids), len(names)), dtype=bool)
+    matrix[np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)] = True
+    return CandidateMatrix(np.asarray(person_ids, dtype=object), names, matrix)
+
+
+# Function to load every onboarded resume profile (see bulk_upload) as a CandidateMatrix in one projected scan
+def load_candidates(client, database=bulk_upload.PROFILE_DATABASE):
+    documents = client[database][bulk_upload.PROFILE_COLLECTION].find({}, {'_id': 0, 'person_id': 1, 'skills': 1})
+    return candidate_matrix((document['person_id'], document.get('skills')) for document in documents)
+
+
+# Function to score every candidate against every job with two matrix products. Returns candidate x job
+# arrays: the weighted share of the job's skills the candidate has, and the share of its required skills.
+def match_scores(candidates, jobs):
+    weights, required = zip(*(job.weights(candidates.skills) for job in jobs))
+    weights, required = np.stack(weights, axis=1), np.stack(required, axis=1)
+    matrix = candidates.matrix.astype(np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        score = np.nan_to_num((matrix @ weights) / weights.sum(axis=0))
+        # A job without required skills is fully covered by everyone
+        coverage = np.where(required.sum(axis=0) > 0, (matrix @ required) / required.sum(axis=0), 1.0)
+    return score, coverage
+
+
+# Function to rank all candidates for one job, best first: score (0-100) then required-skill coverage.
+# Matched and missing skills are only listed for the rows returned.
+def match_candidates(candidates, job, limit=None, min_score=0.0, min_coverage=0.0):
+    score, coverage = match_scores(candidates, [job])
+    score, coverage = score[:, 0].astype(np.float64) * 100, coverage[:, 0].astype(np.float64)
+    keep = np.flatnonzero((score >= min_score) & (coverage >= min_coverage))
+    order = keep[np.lexsort((candidates.person_ids[keep].astype(str), -coverage[keep], -score[keep]))]
+    ranks = np.arange(1, len(order) + 1)
+    if limit:
+        order, ranks = order[:limit], ranks[:limit]
+
+    weights, required = job.weights(candidates.skills)
+    names = np.asarray(candidates.skills, dtype=object)
+    rows = candidates.matrix[order]
+    return pd.DataFrame({
+        'person_id': candidates.person_ids[order],
+        'score': np.round(score[order], 2),
+        'required_coverage': np.round(coverage[order], 3),
+        'matched': [list(names[row & (weights > 0)]) for row in rows],
+        'missing': [list(names[~row & (required > 0)]) for row in rows],
+        'rank': ranks,
+    })
+
+
+def get_job_collection(client, database=bulk_upload.PROFILE_DATABASE):
+    collection = client[database][JOB_COLLECTION]
+    collection.create_index('job_id', unique=True)
+    return collection
+
+
+def save_job(collection, job):
+    collection.update_one({'job_id': job.job_id}, {'$set': {**job.to_dict(), 'updated_at': time.time()}},
+                          upsert=True)
+
+
+def load_job(collection, job_id):
+    document = collection.find_one({'job_id': job_id}, {'_id': 0})
+    return JobProfile.from_dict(document) if document else None
+
+
+# Function to return the job named by JOB_DESCRIPTION (read once), or None when it is not set
+def current_job():
+    global _current_job
+    if _current_job is None and JOB_DESCRIPTION:
+        try:
+            with open(JOB_DESCRIPTION, encoding='utf-8') as file:
+                text = file.read()
+        except OSError as e:
+            logger.error("Error reading job description %s: %s", JOB_DESCRIPTION, e)
+            return None
+        _current_job = parse_job_description(text, os.path.basename(JOB_DESCRIPTION), company=COMPANY_NAME)
+    return _current_job
+
+
+# Function to name the company for HR questions: COMPANY_NAME, else the job's company, else a neutral phrase
+def company_name(job=None):
+    job = job or current_job()
+    return COMPANY_NAME or (job.company if job else '') or 'this company'
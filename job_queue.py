@@ -0,0 +1,441 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import app_logging
+
+logger = logging.getLogger(__name__)
+
+# Background job settings; JOB_WORKERS=0 keeps the web process from running jobs itself
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.db")
+JOB_QUEUE_REDIS_URL = os.getenv("JOB_QUEUE_REDIS_URL", "redis://localhost:6379/0")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_STREAM_TIMEOUT = float(os.getenv("JOB_STREAM_TIMEOUT", "600"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "86400"))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINAL_STATUSES = (DONE, FAILED)
+
+
+# Raised when a job is submitted for a kind no handler was registered for
+class UnknownJobError(Exception):
+    pass
+
+
+# Job queue in a local SQLite file. Claimed jobs hold a lease; a job whose worker died is
+# handed out again once the lease expires, up to JOB_MAX_ATTEMPTS times. Apps sharing the file keep
+# their jobs apart by queue name.
+class SQLiteBackend:
+    def __init__(self, queue='default', path=JOB_QUEUE_PATH, lease_seconds=JOB_LEASE_SECONDS,
+                 max_attempts=JOB_MAX_ATTEMPTS):
+        self.queue = queue
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " queue TEXT NOT NULL DEFAULT 'default',"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " lease_until REAL,"
+            " owner TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        # Files created before queues and owners existed get the columns, their jobs landing in the default queue
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")]
+        if 'queue' not in columns:
+            self.connection.execute("ALTER TABLE jobs ADD COLUMN queue TEXT NOT NULL DEFAULT 'default'")
+        if 'owner' not in columns:
+            self.connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_queue_pick ON jobs (queue, status, created_at)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            " id INTEGER PRIMARY KEY,"
+            " job_id TEXT NOT NULL,"
+            " event TEXT NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, id)")
+
+    def enqueue(self, job_id, kind, payload):
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO jobs (id, queue, kind, payload, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, self.queue, kind, json.dumps(payload), QUEUED, now, now),
+            )
+
+    # Function to atomically take the oldest runnable job of this queue, or None when the queue is empty.
+    # The job's owner token identifies this claim: renew and finish only act for the current owner.
+    def claim(self):
+        now = time.time()
+        owner = uuid.uuid4().hex
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ?"
+                    " WHERE queue = ? AND status = ? AND lease_until < ? AND attempts >= ?",
+                    (FAILED, "Worker stopped before finishing the job.", now, self.queue, RUNNING, now,
+                     self.max_attempts),
+                )
+                row = self.connection.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs"
+                    " WHERE queue = ? AND (status = ? OR (status = ? AND lease_until < ?))"
+                    " ORDER BY created_at LIMIT 1",
+                    (self.queue, QUEUED, RUNNING, now),
+                ).fetchone()
+                if row:
+                    self.connection.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, owner = ?,"
+                        " updated_at = ? WHERE id = ?",
+                        (RUNNING, now + self.lease_seconds, owner, now, row[0]),
+                    )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'attempts': row[3] + 1, 'owner': owner}
+
+    # Function to extend the lease of a running job; False once another claim has taken it over
+    def renew(self, job_id, owner):
+        now = time.time()
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING, owner),
+            )
+        return cursor.rowcount > 0
+
+    def add_event(self, job_id, event):
+        with self.lock:
+            self.connection.execute("INSERT INTO job_events (job_id, event) VALUES (?, ?)", (job_id, json.dumps(event)))
+            self.connection.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    # Function to record a job's outcome; with an owner, only while that claim still holds the job
+    def finish(self, job_id, status, result=None, error=None, owner=None):
+        query = "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?"
+        params = [status, json.dumps(result), error, time.time(), job_id]
+        if owner is not None:
+            query += " AND owner = ? AND status = ?"
+            params += [owner, RUNNING]
+        with self.lock:
+            cursor = self.connection.execute(query, params)
+        return cursor.rowcount > 0
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, kind, status, result, error, attempts, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row[0], 'kind': row[1], 'status': row[2],
+            'result': json.loads(row[3]) if row[3] else None, 'error': row[4],
+            'attempts': row[5], 'created_at': row[6], 'updated_at': row[7],
+        }
+
+    # Function to list (event_id, event) pairs recorded after `after`
+    def events(self, job_id, after=0):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, event FROM job_events WHERE job_id = ? AND id > ? ORDER BY id", (job_id, after)
+            ).fetchall()
+        return [(event_id, json.loads(event)) for event_id, event in rows]
+
+
+# Same queue on Redis 6.2+ (or any server speaking its protocol), with the SQLite backend's guarantees: a claim
+# moves the job into the worker's own processing list and gives it a lease, and every claim first reaps jobs whose
+# lease expired, handing them out again up to JOB_MAX_ATTEMPTS times. Finished jobs expire after JOB_RESULT_TTL.
+class RedisBackend:
+    def __init__(self, queue='default', url=JOB_QUEUE_REDIS_URL, result_ttl=JOB_RESULT_TTL,
+                 lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        import redis
+        self.watch_error = redis.WatchError
+        self.queue = queue
+        self.queue_key = f"jobs:{queue}:queued"
+        self.leases_key = f"jobs:{queue}:leases"
+        # Last claim time of every worker, by processing list
+        self.workers_key = f"jobs:{queue}:workers"
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _key(self, job_id):
+        return f"job:{job_id}"
+
+    # One processing list per worker thread, so a dead worker's jobs can be found and requeued
+    def _processing_key(self):
+        return f"jobs:{self.queue}:processing:{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def enqueue(self, job_id, kind, payload):
+        now = time.time()
+        self.redis.hset(self._key(job_id), mapping={
+            'kind': kind, 'payload': json.dumps(payload), 'status': QUEUED, 'attempts': 0,
+            'created_at': now, 'updated_at': now,
+        })
+        self.redis.lpush(self.queue_key, job_id)
+
+    # Function to atomically take the oldest queued job, or None when the queue stays empty. As with SQLite,
+    # the owner token identifies this claim for renew and finish.
+    def claim(self):
+        self.reap()
+        processing = self._processing_key()
+        self.redis.hset(self.workers_key, processing, time.time())
+        job_id = self.redis.blmove(self.queue_key, processing, max(1, int(JOB_POLL_INTERVAL)), 'RIGHT', 'LEFT')
+        if job_id is None:
+            return None
+        now = time.time()
+        key = self._key(job_id)
+        owner = uuid.uuid4().hex
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.leases_key, {job_id: now + self.lease_seconds})
+        pipe.hincrby(key, 'attempts', 1)
+        pipe.hset(key, mapping={'status': RUNNING, 'worker': processing, 'owner': owner, 'updated_at': now})
+        pipe.hmget(key, 'kind', 'payload')
+        _, attempts, _, (kind, payload) = pipe.execute()
+        return {'id': job_id, 'kind': kind, 'payload': json.loads(payload), 'attempts': attempts, 'owner': owner}
+
+    # Function to requeue or fail the jobs of dead workers: jobs whose lease expired, and jobs a worker took
+    # off the queue but died before leasing (its processing list has not been claimed from for a lease period)
+    def reap(self, now=None):
+        now = time.time() if now is None else now
+        for job_id in self.redis.zrangebyscore(self.leases_key, '-inf', now):
+            # Whoever removes the job from its processing list owns it; a finished job is already gone from it
+            if self.redis.zrem(self.leases_key, job_id):
+                worker = self.redis.hget(self._key(job_id), 'worker')
+                if worker and self.redis.lrem(worker, 0, job_id):
+                    self._release(job_id, now)
+        for processing, seen in self.redis.hgetall(self.workers_key).items():
+            if float(seen) > now - self.lease_seconds:
+                continue
+            for job_id in self.redis.lrange(processing, 0, -1):
+                if self.redis.zscore(self.leases_key, job_id) is None and self.redis.lrem(processing, 0, job_id):
+                    self._release(job_id, now)
+            if not self.redis.llen(processing):
+                self.redis.hdel(self.workers_key, processing)
+
+    def _release(self, job_id, now):
+        key = self._key(job_id)
+        if int(self.redis.hget(key, 'attempts') or 0) >= self.max_attempts:
+            logger.warning("Job %s failed: its worker stopped %s times.", job_id, self.max_attempts)
+            self.finish(job_id, FAILED, error="Worker stopped before finishing the job.")
+            return
+        self.redis.hset(key, mapping={'status': QUEUED, 'updated_at': now})
+        # The tail is the next one out, as the oldest job should be
+        self.redis.rpush(self.queue_key, job_id)
+
+    # Function to extend the lease of a running job; False once another claim has taken it over
+    def renew(self, job_id, owner):
+        key = self._key(job_id)
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.hget(key, 'owner') != owner or pipe.hget(key, 'status') != RUNNING:
+                    return False
+                pipe.multi()
+                pipe.zadd(self.leases_key, {job_id: time.time() + self.lease_seconds}, xx=True)
+                pipe.hset(key, 'updated_at', time.time())
+                pipe.execute()
+            except self.watch_error:
+                return False
+        return True
+
+    def add_event(self, job_id, event):
+        self.redis.rpush(f"{self._key(job_id)}:events", json.dumps(event))
+        self.redis.hset(self._key(job_id), 'updated_at', time.time())
+
+    # Function to record a job's outcome; with an owner, only while that claim still holds the job
+    def finish(self, job_id, status, result=None, error=None, owner=None):
+        key = self._key(job_id)
+        with self.redis.pipeline() as pipe:
+            try:
+                # A claim or reap in between changes the job's hash and aborts the transaction
+                pipe.watch(key)
+                if owner is not None and (pipe.hget(key, 'owner') != owner or pipe.hget(key, 'status') != RUNNING):
+                    return False
+                worker = pipe.hget(key, 'worker')
+                pipe.multi()
+                pipe.hset(key, mapping={
+                    'status': status, 'result': json.dumps(result), 'error': error or '', 'updated_at': time.time(),
+                })
+                pipe.zrem(self.leases_key, job_id)
+                if worker:
+                    pipe.lrem(worker, 0, job_id)
+                pipe.expire(key, self.result_ttl)
+                pipe.expire(f"{key}:events", self.result_ttl)
+                pipe.execute()
+            except self.watch_error:
+                return False
+        return True
+
+    def get(self, job_id):
+        data = self.redis.hgetall(self._key(job_id))
+        if not data:
+            return None
+        return {
+            'job_id': job_id, 'kind': data['kind'], 'status': data['status'],
+            'result': json.loads(data['result']) if data.get('result') else None, 'error': data.get('error') or None,
+            'attempts': int(data['attempts']), 'created_at': float(data['created_at']),
+            'updated_at': float(data['updated_at']),
+        }
+
+    def events(self, job_id, after=0):
+        items = self.redis.lrange(f"{self._key(job_id)}:events", after, -1)
+        return [(after + index + 1, json.loads(item)) for index, item in enumerate(items)]
+
+
+# Function to build the backend chosen by JOB_QUEUE_BACKEND for one queue, falling back to SQLite
+def create_backend(queue='default'):
+    if JOB_QUEUE_BACKEND == 'redis':
+        try:
+            return RedisBackend(queue)
+        except ImportError as e:
+            logger.warning("Redis job queue unavailable (%s); using SQLite at %s.", e, JOB_QUEUE_PATH)
+    return SQLiteBackend(queue)
+
+
+# Pool of worker threads running registered handlers. A handler is called as handler(payload, report),
+# where report(event_dict) publishes a progress event; its return value becomes the job result.
+# Each app uses its own queue name, so its workers never take jobs registered by another app.
+class WorkerPool:
+    def __init__(self, queue='default', backend=None, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.backend = backend or create_backend(queue)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.threads = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    # Function to enqueue a job and return its id; in-process workers start on first use
+    def submit(self, kind, payload):
+        if kind not in self.handlers:
+            raise UnknownJobError(f"No handler registered for job kind '{kind}'.")
+        job_id = uuid.uuid4().hex
+        self.backend.enqueue(job_id, kind, payload)
+        if self.workers > 0:
+            self.start()
+        self.wakeup.set()
+        return job_id
+
+    def start(self, workers=None):
+        with self.lock:
+            if self.threads:
+                return
+            for index in range(workers or self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    # Function to run workers in the foreground, e.g. from a dedicated worker process
+    def run_forever(self, workers=None):
+        self.start(workers or max(1, self.workers))
+        try:
+            while not self.stopping.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def get(self, job_id):
+        return self.backend.get(job_id)
+
+    def events(self, job_id, after=0):
+        return self.backend.events(job_id, after)
+
+    def _work(self):
+        while not self.stopping.is_set():
+            try:
+                job = self.backend.claim()
+            except Exception as e:
+                logger.error("Error claiming job: %s", e)
+                job = None
+            if job is None:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+            self._run(job)
+
+    # Function to renew a job's lease every third of a lease while its handler runs, however long it goes
+    # without reporting progress; stops when `done` is set or the job was taken over
+    def _heartbeat(self, job_id, owner, done):
+        while not done.wait(self.backend.lease_seconds / 3):
+            try:
+                if not self.backend.renew(job_id, owner):
+                    logger.warning("Job %s was taken over by another worker.", job_id)
+                    return
+            except Exception as e:
+                logger.warning("Error renewing the lease of job %s: %s", job_id, e)
+
+    def _run(self, job):
+        job_id, owner = job['id'], job['owner']
+
+        def report(event):
+            self.backend.add_event(job_id, event)
+
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, owner, done), name=f"job-heartbeat-{job_id}",
+                         daemon=True).start()
+        handler = self.handlers.get(job['kind'])
+        try:
+            if handler is None:
+                raise UnknownJobError(f"No handler registered for job kind '{job['kind']}'.")
+            with app_logging.bind(job_id=job_id):
+                result = handler(job['payload'], report)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed: %s", job_id, job['kind'], e)
+            status, result, error = FAILED, None, str(e)
+        else:
+            status, error = DONE, None
+        finally:
+            done.set()
+        if not self.backend.finish(job_id, status, result=result, error=error, owner=owner):
+            logger.warning("Job %s lost its lease before finishing; its %s result is dropped.", job_id, status)
+
+
+# Function to yield a job's progress events as NDJSON lines, ending with its final status
+def stream_job(pool, job_id, timeout=JOB_STREAM_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    after = 0
+    while True:
+        for event_id, event in pool.events(job_id, after):
+            after = event_id
+            yield json.dumps({'type': 'event', **event}) + "\n"
+        job = pool.get(job_id)
+        if job is None or job['status'] in FINAL_STATUSES or time.monotonic() > deadline:
+            yield json.dumps({'type': 'status', 'job': job}) + "\n"
+            return
+        time.sleep(pool.poll_interval)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Response cache in front of Gemini: an in-process LRU over an on-disk SQLite store. Only prompts rendered from
+# a template with a TTL are cached; generation prompts stay fresh so candidates do not all get the same questions.
+LLM_CACHE = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "1024"))
+DAY = 24 * 60 * 60
+# Seconds a response stays valid, per prompt template; override with LLM_CACHE_TTLS="relevance=3600,..."
+CACHE_TTLS = {
+    'reference_answer': 30 * DAY,
+    'relevance': 7 * DAY,
+    'answer_feedback': 7 * DAY,
+}
+for _item in filter(None, os.getenv("LLM_CACHE_TTLS", "").split(',')):
+    _name, _, _ttl = _item.partition('=')
+    CACHE_TTLS[_name.strip()] = float(_ttl)
+
+_lock = threading.RLock()
+_connection = None
+
+
+# Hit and miss counters, in total and per template
+class CacheStats:
+    FIELDS = ('lookups', 'memory_hits', 'disk_hits', 'misses', 'expired', 'stores', 'errors')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+        self.templates = {}
+
+    def record(self, field, template=None):
+        with self.lock:
+            self.values[field] += 1
+            if template and field in ('memory_hits', 'disk_hits', 'misses'):
+                entry = self.templates.setdefault(template, {'hits': 0, 'misses': 0})
+                entry['misses' if field == 'misses' else 'hits'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+            values['templates'] = {name: dict(entry) for name, entry in self.templates.items()}
+        hits = values['memory_hits'] + values['disk_hits']
+        values['hit_rate'] = round(hits / values['lookups'], 4) if values['lookups'] else 0.0
+        return values
+
+
+stats = CacheStats()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Function to open the store once per process and create the schema on first use
+def get_connection():
+    global _connection
+    with _lock:
+        if _connection is None:
+            _connection = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False, isolation_level=None)
+            _connection.execute("PRAGMA journal_mode=WAL")
+            _connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " template TEXT,"
+                " prompt TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            _connection.execute("CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at)")
+        return _connection
+
+
+# Function to return how long a response to this prompt may be reused (0 = never): the TTL of its template
+def ttl_for(prompt):
+    if not LLM_CACHE:
+        return 0
+    return CACHE_TTLS.get(getattr(prompt, 'template', None), 0)
+
+
+# Function to turn a gateway key (model, template@version, normalized prompt) into a fixed-size digest
+def digest(key):
+    return hashlib.sha256(json.dumps([str(part) for part in key]).encode('utf-8')).hexdigest()
+
+
+# Two-tier cache: a bounded LRU of (expires_at, response) in memory, backed by the SQLite store
+class ResponseCache:
+    def __init__(self, capacity=LLM_CACHE_MEMORY_SIZE, clock=time.time):
+        self.capacity = capacity
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+
+    def _remember(self, digest_key, expires_at, response):
+        with self.lock:
+            self.items[digest_key] = (expires_at, response)
+            self.items.move_to_end(digest_key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+    # Function to return the cached response for a gateway key, or None
+    def get(self, key):
+        template = key[1]
+        digest_key = digest(key)
+        now = self.clock()
+        stats.record('lookups')
+        with self.lock:
+            entry = self.items.get(digest_key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.items.move_to_end(digest_key)
+                    stats.record('memory_hits', template)
+                    return entry[1]
+                del self.items[digest_key]
+        try:
+            with _lock:
+                row = get_connection().execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ?", (digest_key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Error reading the LLM response cache: %s", e)
+            stats.record('errors')
+            row = None
+        if row is None or row[1] <= now:
+            if row is not None:
+                stats.record('expired')
+            stats.record('misses', template)
+            return None
+        self._remember(digest_key, row[1], row[0])
+        stats.record('disk_hits', template)
+        return row[0]
+
+    def put(self, key, response, ttl):
+        digest_key = digest(key)
+        now = self.clock()
+        self._remember(digest_key, now + ttl, response)
+        try:
+            with _lock:
+                get_connection().execute(
+                    "INSERT OR REPLACE INTO responses (key, model, template, prompt, response, created_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (digest_key, str(key[0]), key[1], key[2], response, now, now + ttl),
+                )
+            stats.record('stores')
+        except sqlite3.Error as e:
+            logger.error("Error writing the LLM response cache: %s", e)
+            stats.record('errors')
+
+    def clear_memory(self):
+        with self.lock:
+            self.items.clear()
+
+
+cache = ResponseCache()
+
+
+def get(key):
+    return cache.get(key)
+
+
+def put(key, response, ttl):
+    cache.put(key, response, ttl)
+
+
+# Function to delete expired responses from the store; returns how many were removed
+def purge(now=None):
+    with _lock:
+        connection = get_connection()
+        before = connection.total_changes
+        connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now or time.time(),))
+        return connection.total_changes - before
+
+
+# Function to count stored responses per template, split into live and expired
+def stored_counts(now=None):
+    with _lock:
+        rows = get_connection().execute(
+            "SELECT COALESCE(template, 'adhoc'), SUM(expires_at > ?), SUM(expires_at <= ?) FROM responses"
+            " GROUP BY template", (now or time.time(), now or time.time()),
+        ).fetchall()
+    return {template: {'live': live or 0, 'expired': expired or 0} for template, live, expired in rows}
+
+
+# Function to precompute the reference answer of every banked question (optionally one skill) that is not
+# cached yet, through the shared gateway quota; returns (generated, already cached, failed)
+def warm(model, skill=None, limit=None):
+    import llm_gateway
+    import prompts
+    import question_bank
+
+    generated = cached = failed = 0
+    for _, _, question in question_bank.all_questions(skill)[:limit]:
+        prompt = prompts.render('reference_answer', question=question)
+        if get(llm_gateway.cache_key(model, prompt)) is not None:
+            cached += 1
+            continue
+        try:
+            llm_gateway.generate(model, prompt)
+            generated += 1
+        except llm_gateway.LLMError as e:
+            logger.error("Error warming the reference answer for %r: %s", question, e)
+            failed += 1
+    return generated, cached, failed
+
+
+# Usage: python llm_cache.py stats | purge | warm [skill] [--limit N]
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'purge':
+        print(f"Removed {purge()} expired responses from {LLM_CACHE_PATH}")
+    elif command == 'warm':
+        from dotenv import load_dotenv
+        import google.generativeai as gen_ai
+
+        load_dotenv()
+        arguments = sys.argv[2:]
+        limit = None
+        if '--limit' in arguments:
+            index = arguments.index('--limit')
+            limit = int(arguments[index + 1])
+            del arguments[index:index + 2]
+        gen_ai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        model = gen_ai.GenerativeModel('gemini-pro')
+        generated, cached, failed = warm(model, arguments[0] if arguments else None, limit)
+        print(f"Reference answers: {generated} generated, {cached} already cached, {failed} failed")
+    else:
+        print(f"{'template':<20}{'live':>8}{'expired':>9}")
+        for template, counts in sorted(stored_counts().items()):
+            print(f"{template:<20}{counts['live']:>8}{counts['expired']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import instrumentation
+import llm_cache
+import prompts
+
+# Quota and retry settings shared by every Gemini caller in the process
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BASE_BACKOFF = float(os.getenv("LLM_BASE_BACKOFF", "1"))
+LLM_MAX_BACKOFF = float(os.getenv("LLM_MAX_BACKOFF", "30"))
+LLM_MAX_WAIT = float(os.getenv("LLM_MAX_WAIT", "60"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+LLM_SHARE_TTL = float(os.getenv("LLM_SHARE_TTL", "5"))
+
+_call_counter = contextvars.ContextVar('llm_call_counter', default=None)
+
+
+# LLM calls made in one context, e.g. one interview. Work handed to other threads with contextvars.copy_context
+# (speculative follow-ups) is counted too; other interviews and background jobs have their own context.
+class CallCounter:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def add(self):
+        with self.lock:
+            self.calls += 1
+        if self.parent is not None:
+            self.parent.add()
+
+
+# Usage: with llm_gateway.count_calls() as counter: ... -- counts the calls made inside the block; an enclosing
+# counter keeps counting them too
+@contextmanager
+def count_calls():
+    counter = CallCounter(_call_counter.get())
+    token = _call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_counter.reset(token)
+
+
+# Base error for every failure surfaced by the gateway
+class LLMError(Exception):
+    pass
+
+
+# Raised when the quota is still exhausted after all retries
+class RateLimitError(LLMError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Raised without calling the model while the circuit breaker is open
+class CircuitOpenError(LLMError):
+    pass
+
+
+# Process-wide token bucket sized to the requests-per-minute quota
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Reserve one token and return how long the caller has to wait for it
+    def reserve(self):
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    # Give back a reserved token the caller will not use, e.g. because it gave up waiting for it
+    def refund(self):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    # Share of the burst that is free right now: 1.0 is a full bucket, 0.0 means the next call waits
+    def headroom(self):
+        with self.lock:
+            now = self.clock()
+            if self.blocked_until > now:
+                return 0.0
+            self._refill(now)
+            return max(0.0, self.tokens) / self.capacity
+
+    # Stop handing out tokens until the server says the quota is back
+    def block_for(self, seconds):
+        with self.lock:
+            now = self.clock()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+# Opens after repeated upstream failures so callers fail fast during outages
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold, cooldown, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    # Outcome says nothing about upstream health (429, bad request); free the probe slot
+    def record_neutral(self):
+        with self.lock:
+            self.probe_in_flight = False
+
+    # Returns True when this failure opened the breaker
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self.probe_in_flight = False
+                return opened
+            return False
+
+
+# Thread-safe counters for retries, throttling and breaker activity
+class GatewayMetrics:
+    FIELDS = (
+        'requests', 'calls', 'successes', 'failures', 'retries', 'rate_limited',
+        'throttled_seconds', 'breaker_rejections', 'breaker_opens',
+        'coalesced', 'shared_hits', 'cache_hits',
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.values = {field: 0 for field in self.FIELDS}
+
+    def add(self, field, amount=1):
+        with self.lock:
+            self.values[field] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+# One in-flight request that followers with the same key wait on
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# Concurrent callers with the same key share one in-flight call; results can linger for a short TTL
+class SingleFlight:
+    LEADER, SHARED, CACHED = "leader", "shared", "cached"
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.results = {}
+
+    def _purge(self, now):
+        for key in [key for key, (expires, _) in self.results.items() if expires <= now]:
+            del self.results[key]
+
+    # Returns (value, role) where role says whether this caller did the work
+    def do(self, key, fn, ttl=0.0):
+        with self.lock:
+            now = self.clock()
+            cached = self.results.get(key)
+            if cached and cached[0] > now:
+                return cached[1], self.CACHED
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, self.SHARED
+
+        try:
+            flight.value = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+                now = self.clock()
+                self._purge(now)
+                if flight.error is None and ttl > 0:
+                    self.results[key] = (now + ttl, flight.value)
+            flight.event.set()
+        return flight.value, self.LEADER
+
+
+# Collapse whitespace and case so trivially different prompts share a flight
+def normalize_prompt(prompt):
+    return " ".join(prompt.split()).lower()
+
+
+# Function to key a response by model, template version (for prompts from the registry) and normalized prompt,
+# so responses produced under an older template version are never reused
+def cache_key(model, prompt):
+    return getattr(model, 'model_name', id(model)), getattr(prompt, 'key', None), normalize_prompt(prompt)
+
+
+# Pull an HTTP status out of google.api_core, requests or plain exceptions
+def get_status_code(error):
+    for candidate in (getattr(error, 'code', None), getattr(error, 'status_code', None),
+                      getattr(getattr(error, 'response', None), 'status_code', None)):
+        if isinstance(candidate, int):
+            return candidate
+        value = getattr(candidate, 'value', None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_rate_limit_error(error):
+    status = get_status_code(error)
+    if status is not None:
+        return status == 429
+    message = str(error)
+    return "429" in message or "Resource has been exhausted" in message
+
+
+def is_transient_error(error):
+    status = get_status_code(error)
+    if status is not None:
+        return status in (500, 502, 503, 504)
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+# Seconds the server asked us to wait, from a Retry-After header or RetryInfo detail
+def get_retry_after(error):
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    for detail in getattr(error, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return getattr(delay, 'seconds', 0) + getattr(delay, 'nanos', 0) / 1e9
+    return getattr(error, 'retry_after', None)
+
+
+class LLMGateway:
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, burst=LLM_BURST,
+                 max_retries=LLM_MAX_RETRIES, base_backoff=LLM_BASE_BACKOFF,
+                 max_backoff=LLM_MAX_BACKOFF, max_wait=LLM_MAX_WAIT,
+                 breaker_threshold=LLM_BREAKER_THRESHOLD, breaker_cooldown=LLM_BREAKER_COOLDOWN,
+                 clock=time.monotonic, sleep=time.sleep, rng=None):
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.bucket = TokenBucket(requests_per_minute, burst, clock=clock)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown, clock=clock)
+        self.metrics = GatewayMetrics()
+        self.flight = SingleFlight(clock=clock)
+
+    # Decorrelated jitter: next delay is drawn between the base and 3x the previous one
+    def _next_backoff(self, previous):
+        return min(self.max_backoff, self.rng.uniform(self.base_backoff, previous * 3))
+
+    def _wait(self, seconds, waited):
+        if waited + seconds > self.max_wait:
+            self.metrics.add('failures')
+            raise RateLimitError(f"Gave up after waiting {waited:.1f}s for the LLM quota.", retry_after=seconds)
+        if seconds > 0:
+            self.metrics.add('throttled_seconds', seconds)
+            self.sleep(seconds)
+        return waited + seconds
+
+    # Function to tell optional work (e.g. speculative calls) how much quota is free; 0.0 while the breaker is open
+    def headroom(self):
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            return 0.0
+        return self.bucket.headroom()
+
+    # Send a prompt through the response cache, shared quota, retry policy and circuit breaker.
+    # Prompts from a template with a cache TTL are answered from llm_cache; fresh=True skips the lookup and
+    # replaces the cached response. With coalesce=True identical prompts in flight (or answered within
+    # share_ttl) reuse one result.
+    def generate(self, model, prompt, max_retries=None, coalesce=False, share_ttl=None, fresh=False):
+        self.metrics.add('requests')
+        cache_ttl = llm_cache.ttl_for(prompt)
+        if cache_ttl:
+            key = cache_key(model, prompt)
+        if cache_ttl and not fresh:
+            text = llm_cache.get(key)
+            if text is not None:
+                self.metrics.add('cache_hits')
+                return text
+        if coalesce:
+            text = self._coalesced(model, prompt, max_retries, share_ttl)
+        else:
+            text = self._generate(model, prompt, max_retries)
+        if cache_ttl and text.strip():
+            llm_cache.put(key, text, cache_ttl)
+        return text
+
+    def _coalesced(self, model, prompt, max_retries, share_ttl):
+        key = cache_key(model, prompt)
+        ttl = LLM_SHARE_TTL if share_ttl is None else share_ttl
+        text, role = self.flight.do(key, lambda: self._generate(model, prompt, max_retries), ttl=ttl)
+        if role == SingleFlight.SHARED:
+            self.metrics.add('coalesced')
+        elif role == SingleFlight.CACHED:
+            self.metrics.add('shared_hits')
+        return text
+
+    # llm_generate covers the whole call including quota waits and retries; llm_call each attempt
+    def _generate(self, model, prompt, max_retries):
+        with instrumentation.span('llm_generate'):
+            return self._generate_with_retries(model, prompt, max_retries)
+
+    def _generate_with_retries(self, model, prompt, max_retries):
+        max_retries = self.max_retries if max_retries is None else max_retries
+        backoff = self.base_backoff
+        waited = 0.0
+        self.metrics.add('calls')
+        counter = _call_counter.get()
+        if counter is not None:
+            counter.add()
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.metrics.add('breaker_rejections')
+                self.metrics.add('failures')
+                raise CircuitOpenError("LLM circuit breaker is open; failing fast.")
+            try:
+                waited = self._wait(self.bucket.reserve(), waited)
+            except RateLimitError:
+                # A caller that gives up must not leave the bucket in debt for everyone after it
+                self.bucket.refund()
+                raise
+            try:
+                with instrumentation.span('llm_call'):
+                    response = model.start_chat().send_message(prompt)
+                    text = response.text
+            except Exception as e:
+                retryable = is_rate_limit_error(e) or is_transient_error(e)
+                if is_rate_limit_error(e):
+                    self.metrics.add('rate_limited')
+                    retry_after = get_retry_after(e)
+                    if retry_after:
+                        self.bucket.block_for(retry_after)
+                else:
+                    retry_after = None
+                if is_transient_error(e):
+                    if self.breaker.record_failure():
+                        self.metrics.add('breaker_opens')
+                else:
+                    self.breaker.record_neutral()
+                if not retryable or attempt >= max_retries:
+                    self.metrics.add('failures')
+                    if is_rate_limit_error(e):
+                        raise RateLimitError(f"Rate limit persisted after {attempt + 1} attempts: {e}",
+                                             retry_after=retry_after) from e
+                    raise LLMError(f"LLM request failed: {e}") from e
+                attempt += 1
+                self.metrics.add('retries')
+                instrumentation.count('llm_retries_total')
+                backoff = self._next_backoff(backoff)
+                waited = self._wait(max(backoff, retry_after or 0.0), waited)
+                continue
+            self.breaker.record_success()
+            self.metrics.add('successes')
+            prompt_tokens, response_tokens = instrumentation.token_counts(prompt, response, text)
+            prompts.record_usage(prompt, prompt_tokens, response_tokens)
+            if instrumentation.INSTRUMENTATION:
+                instrumentation.count('llm_prompt_tokens_total', prompt_tokens)
+                instrumentation.count('llm_response_tokens_total', response_tokens)
+            return text
+
+
+_default_gateway = None
+_default_lock = threading.Lock()
+
+
+# Lazily build the gateway shared by every module in this process
+def get_gateway():
+    global _default_gateway
+    with _default_lock:
+        if _default_gateway is None:
+            _default_gateway = LLMGateway()
+        return _default_gateway
+
+
+# Swap the shared gateway, e.g. for one wired to a fake clock in tests
+def set_gateway(gateway):
+    global _default_gateway
+    with _default_lock:
+        _default_gateway = gateway
+
+
+def generate(model, prompt, max_retries=None, coalesce=False, share_ttl=None, fresh=False):
+    return get_gateway().generate(model, prompt, max_retries=max_retries,
+                                  coalesce=coalesce, share_ttl=share_ttl, fresh=fresh)
+
+
+def headroom():
+    return get_gateway().headroom()
+
+
+def get_metrics():
+    return get_gateway().metrics.snapshot()
@@ -0,0 +1,258 @@
+import hashlib
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from PyPDF2 import PdfReader, PdfWriter
+
+import instrumentation
+import resume_upload
+
+logger = logging.getLogger(__name__)
+
+# OCR fallback for pages without a text layer (scanned resumes). Text-layer pages never reach it; image-only
+# pages are rendered and recognised in a separate process pool so the CPU work never holds the request GIL.
+OCR_ENABLED = os.getenv("OCR_ENABLED", "1") == "1"
+# auto prefers Tesseract (tesserocr, or pytesseract plus the tesseract binary), then RapidOCR (pip-only, ONNX on CPU)
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# Directory holding <lang>.traineddata; unset uses Tesseract's own default
+OCR_TESSDATA = os.getenv("OCR_TESSDATA") or os.getenv("TESSDATA_PREFIX")
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "20"))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "60"))
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "1024"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_engine = None
+_warned = False
+
+
+# Counts resumes and pages that needed OCR, and the worker time spent on them
+class OcrStats:
+    FIELDS = ('resumes', 'resumes_ocr', 'pages', 'cache_hits', 'failed', 'timed_out', 'unavailable')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+        self.seconds = 0.0
+
+    def record(self, field, amount=1):
+        with self.lock:
+            self.values[field] += amount
+
+    def add_seconds(self, seconds):
+        with self.lock:
+            self.seconds += seconds
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+            seconds = self.seconds
+        values['ocr_seconds'] = round(seconds, 3)
+        values['pages_per_second'] = round(values['pages'] / seconds, 2) if seconds else 0.0
+        values['ocr_share'] = round(values['resumes_ocr'] / values['resumes'], 4) if values['resumes'] else 0.0
+        return values
+
+
+stats = OcrStats()
+# OCR text by page hash, so the same scanned page is recognised once
+cache = resume_upload.TextCache(OCR_CACHE_SIZE)
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Tesseract through tesserocr (in-process, one API handle per worker), else pytesseract and the tesseract binary
+class TesseractEngine:
+    name = 'tesseract'
+
+    def __init__(self):
+        try:
+            import tesserocr
+        except ImportError:
+            import pytesseract
+            self.api = None
+            self.pytesseract = pytesseract
+            return
+        if OCR_TESSDATA:
+            self.api = tesserocr.PyTessBaseAPI(path=OCR_TESSDATA, lang=OCR_LANG)
+        else:
+            self.api = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+
+    def text(self, image):
+        if self.api is None:
+            config = f'--tessdata-dir "{OCR_TESSDATA}"' if OCR_TESSDATA else ''
+            return self.pytesseract.image_to_string(image, lang=OCR_LANG, config=config)
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+
+# RapidOCR (PaddleOCR models on onnxruntime); CPU only and installable with pip alone
+class RapidOcrEngine:
+    name = 'rapidocr'
+
+    def __init__(self):
+        import numpy as np
+        from rapidocr_onnxruntime import RapidOCR
+        self.np = np
+        self.engine = RapidOCR()
+
+    def text(self, image):
+        result, _ = self.engine(self.np.asarray(image.convert('RGB')))
+        return "\n".join(line[1] for line in result or [])
+
+
+ENGINES = {TesseractEngine.name: TesseractEngine, RapidOcrEngine.name: RapidOcrEngine}
+
+
+def _installed(name):
+    if importlib.util.find_spec('PIL') is None:
+        return False
+    if name == TesseractEngine.name:
+        if importlib.util.find_spec('tesserocr') is not None:
+            import tesserocr
+            _, languages = tesserocr.get_languages(*([OCR_TESSDATA] if OCR_TESSDATA else []))
+            if set(OCR_LANG.split('+')) <= set(languages):
+                return True
+        return importlib.util.find_spec('pytesseract') is not None and shutil.which('tesseract') is not None
+    return importlib.util.find_spec('rapidocr_onnxruntime') is not None
+
+
+# Function to pick the OCR engine without loading it (models load in the workers), or None if none is installed
+def engine_name():
+    if OCR_ENGINE != 'auto':
+        return OCR_ENGINE if _installed(OCR_ENGINE) else None
+    return next((name for name in ENGINES if _installed(name)), None)
+
+
+# Runs in a worker: render a single-page PDF (PDFium when installed, else its largest embedded image)
+def render_page(page_pdf):
+    from PIL import Image
+    try:
+        import pypdfium2
+    except ImportError:
+        pypdfium2 = None
+    if pypdfium2 is not None:
+        document = pypdfium2.PdfDocument(page_pdf)
+        try:
+            return document[0].render(scale=OCR_DPI / 72).to_pil()
+        finally:
+            document.close()
+    images = PdfReader(io.BytesIO(page_pdf)).pages[0].images
+    if not images:
+        return None
+    return Image.open(io.BytesIO(max(images, key=lambda image: len(image.data)).data))
+
+
+# Runs in a worker process: OCR one page and report how long it took
+def ocr_page(page_pdf, name):
+    global _engine
+    started = time.perf_counter()
+    if _engine is None or _engine.name != name:
+        _engine = ENGINES[name]()
+    image = render_page(page_pdf)
+    text = _engine.text(image) if image is not None else ""
+    return text, time.perf_counter() - started
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _pool
+
+
+# Function to cut the given pages out as standalone single-page PDFs; the bytes double as the page hash input
+def split_pages(source, indexes):
+    reader = PdfReader(source)
+    for index in indexes:
+        writer = PdfWriter()
+        writer.add_page(reader.pages[index])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        yield index, buffer.getvalue()
+
+
+def _finish(key, future):
+    try:
+        text, seconds = future.result()
+    except Exception as e:
+        stats.record('failed')
+        logger.warning("OCR failed for page %s: %s", key[:12], e)
+        return
+    stats.record('pages')
+    stats.add_seconds(seconds)
+    instrumentation.observe('ocr_page', seconds)
+    cache.put(key, text)
+
+
+# Function to fill the empty entries of `texts` (one per page) with OCR text. Only pages without a text layer
+# are rendered, at most OCR_MAX_PAGES per resume. Results are cached by page hash; pages still running after
+# OCR_TIMEOUT stay empty for this call but land in the cache for the next one.
+# Inside a pool worker (e.g. bulk onboarding) the OCR runs inline rather than in a nested pool.
+def fill_empty_pages(source, texts, inline=None):
+    global _warned
+    empty = [index for index, text in enumerate(texts) if not text.strip()][:OCR_MAX_PAGES]
+    stats.record('resumes')
+    if not empty:
+        return texts
+    stats.record('resumes_ocr')
+    name = engine_name()
+    if name is None:
+        stats.record('unavailable', len(empty))
+        if not _warned:
+            _warned = True
+            logger.warning("Resume pages have no text layer and no OCR engine is installed (OCR_ENGINE=%s).", OCR_ENGINE)
+        return texts
+
+    if inline is None:
+        inline = multiprocessing.parent_process() is not None
+    texts = list(texts)
+    pending = {}
+    for index, page_pdf in split_pages(source, empty):
+        key = hashlib.sha256(page_pdf).hexdigest()
+        cached = cache.get(key)
+        if cached is not None:
+            stats.record('cache_hits')
+            texts[index] = cached
+            continue
+        if inline:
+            try:
+                text, seconds = ocr_page(page_pdf, name)
+            except Exception as e:
+                stats.record('failed')
+                logger.warning("OCR failed for page %s: %s", key[:12], e)
+                continue
+            stats.record('pages')
+            stats.add_seconds(seconds)
+            instrumentation.observe('ocr_page', seconds)
+            cache.put(key, text)
+            texts[index] = text
+            continue
+        future = get_pool().submit(ocr_page, page_pdf, name)
+        future.add_done_callback(lambda done, key=key: _finish(key, done))
+        pending[index] = (key, future)
+
+    if pending:
+        done, not_done = wait([future for _, future in pending.values()], timeout=OCR_TIMEOUT)
+        if not_done:
+            stats.record('timed_out', len(not_done))
+            logger.warning("OCR of %d page(s) did not finish within %ss.", len(not_done), OCR_TIMEOUT)
+        for index, (key, future) in pending.items():
+            if future in done:
+                try:
+                    texts[index] = future.result(timeout=0)[0]
+                except Exception:
+                    pass
+    return texts
@@ -0,0 +1,197 @@
+import io
+import logging
+import os
+import threading
+
+from PyPDF2 import PdfReader
+
+import ocr
+
+logger = logging.getLogger(__name__)
+
+# Text extraction backend: auto picks the fastest one installed (pypdfium2, then PyPDF2);
+# pypdf2, pypdfium2 and pdfminer force one. pypdfium2 and pdfminer.six are optional installs.
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+AUTO_ORDER = ('pypdfium2', 'pypdf2')
+# Pages are joined with a newline so the last word of a page never runs into the first word of the next
+PAGE_SEPARATOR = "\n"
+# Characters of text kept per PDF (0 = no limit). Reading stops at the cap unless a skill scanner is
+# passed, which still sees every page, so skills late in a long portfolio are found.
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+
+_backends = {}
+_missing = set()
+_lock = threading.Lock()
+
+
+# Raised for an unknown backend name or a backend whose library is not installed
+class BackendUnavailableError(ValueError):
+    pass
+
+
+# PyPDF2 3.x: always available; pages without a text layer come back as ""
+class PyPDF2Backend:
+    name = 'pypdf2'
+
+    def pages(self, source):
+        reader = PdfReader(source)
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            # Drop the objects parsed for this page (content streams, fonts) so long PDFs do not accumulate them
+            reader.resolved_objects.clear()
+            yield text
+
+
+# pypdfium2 (PDFium, C): several times faster than PyPDF2 and keeps reading order on multi-column layouts.
+# PDFium is not thread-safe, so calls into it are serialized; use processes for parallel parsing.
+class PdfiumBackend:
+    name = 'pypdfium2'
+
+    def __init__(self):
+        import pypdfium2
+        self.pdfium = pypdfium2
+        self.lock = threading.Lock()
+
+    def _page_text(self, document, index):
+        with self.lock:
+            page = document[index]
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range().replace("\r\n", "\n")
+            finally:
+                text_page.close()
+                page.close()
+
+    def pages(self, source):
+        with self.lock:
+            document = self.pdfium.PdfDocument(source)
+            count = len(document)
+        try:
+            for index in range(count):
+                yield self._page_text(document, index)
+        finally:
+            with self.lock:
+                document.close()
+
+
+# pdfminer.six in fast mode: layout analysis is skipped (laparams=None), which is most of its cost
+class PdfminerBackend:
+    name = 'pdfminer'
+
+    def __init__(self):
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        self.TextConverter = TextConverter
+        self.PDFPageInterpreter = PDFPageInterpreter
+        self.PDFResourceManager = PDFResourceManager
+        self.PDFPage = PDFPage
+
+    def pages(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                yield from self.pages(file)
+            return
+        manager = self.PDFResourceManager(caching=True)
+        for page in self.PDFPage.get_pages(source):
+            output = io.StringIO()
+            device = self.TextConverter(manager, output, laparams=None)
+            try:
+                self.PDFPageInterpreter(manager, device).process_page(page)
+            finally:
+                device.close()
+            yield output.getvalue()
+
+
+BACKENDS = {
+    PyPDF2Backend.name: PyPDF2Backend,
+    PdfiumBackend.name: PdfiumBackend,
+    PdfminerBackend.name: PdfminerBackend,
+}
+
+
+def _load(name):
+    if name not in BACKENDS:
+        raise BackendUnavailableError(f"Unknown PDF backend '{name}'. Choose from: {', '.join(BACKENDS)}.")
+    if name not in _backends:
+        try:
+            _backends[name] = BACKENDS[name]()
+        except ImportError as e:
+            raise BackendUnavailableError(f"PDF backend '{name}' is not installed: {e}")
+    return _backends[name]
+
+
+# Function to return a backend by name (default PDF_BACKEND). With "auto", or when the configured
+# backend is not installed, the first available one in AUTO_ORDER is used.
+def get_backend(name=None):
+    name = (name or PDF_BACKEND).lower()
+    with _lock:
+        if name != 'auto':
+            try:
+                return _load(name)
+            except BackendUnavailableError as e:
+                if name not in _missing:
+                    _missing.add(name)
+                    logger.warning("%s Falling back to automatic selection.", e)
+        for candidate in AUTO_ORDER:
+            try:
+                return _load(candidate)
+            except BackendUnavailableError:
+                continue
+    raise BackendUnavailableError("No PDF backend is available.")
+
+
+# Function to list the backends that can be loaded in this environment
+def available_backends():
+    names = []
+    for name in BACKENDS:
+        try:
+            with _lock:
+                _load(name)
+            names.append(name)
+        except BackendUnavailableError:
+            pass
+    return names
+
+
+# Function to yield the text of each page of a PDF path or binary stream, one page at a time
+def extract_pages(source, backend=None):
+    return get_backend(backend).pages(source)
+
+
+# Function to extract the text of a whole PDF from a path or binary stream, one page at a time and keeping
+# at most max_chars characters (default PDF_MAX_CHARS). `scanner` (skill_matcher.ChunkScanner) is fed every
+# page, including those past the cap. Pages without a text layer go to the OCR fallback (OCR_ENABLED).
+def extract_text(source, backend=None, max_chars=None, scanner=None):
+    limit = PDF_MAX_CHARS if max_chars is None else max_chars
+    position = source.tell() if hasattr(source, 'seek') else None
+    texts = []
+    kept = 0
+    pages = extract_pages(source, backend)
+    try:
+        for text in pages:
+            if scanner is not None:
+                scanner.feed(text + PAGE_SEPARATOR)
+            if limit and kept >= limit:
+                continue
+            if limit:
+                text = text[:limit - kept]
+            kept += len(text) + len(PAGE_SEPARATOR)
+            texts.append(text)
+            if limit and kept >= limit and scanner is None:
+                logger.debug("PDF text capped at %d characters after %d page(s).", limit, len(texts))
+                break
+    finally:
+        pages.close()
+
+    if ocr.OCR_ENABLED:
+        if position is not None:
+            source.seek(position)
+        filled = ocr.fill_empty_pages(source, texts)
+        if scanner is not None:
+            for before, after in zip(texts, filled):
+                if not before.strip() and after.strip():
+                    scanner.feed(after + PAGE_SEPARATOR)
+        texts = filled
+    text = PAGE_SEPARATOR.join(texts)
+    return text[:limit] if limit else text
@@ -0,0 +1,272 @@
+import logging
+import os
+import re
+import string
+import threading
+
+import instrumentation
+import relevance_filter
+
+logger = logging.getLogger(__name__)
+
+# Token budgets for text embedded in prompts (4 characters per token, as in instrumentation.token_counts).
+# Long answers are summarized (the sentences closest to the question, in order) or cut to head and tail.
+PROMPT_ANSWER_TOKENS = int(os.getenv("PROMPT_ANSWER_TOKENS", "300"))
+PROMPT_QUESTION_TOKENS = int(os.getenv("PROMPT_QUESTION_TOKENS", "120"))
+PROMPT_SHORTEN_MODE = os.getenv("PROMPT_SHORTEN_MODE", "summarize")
+CHARS_PER_TOKEN = 4
+ELLIPSIS = " ... "
+SENTENCE = re.compile(r'(?<=[.!?])\s+')
+# Spoken answers arrive without punctuation, so long sentences are split into clauses of this many words
+CLAUSE_WORDS = 25
+
+_formatter = string.Formatter()
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+# A rendered prompt: a plain string that remembers the template (and version) it came from
+class Prompt(str):
+    template = None
+    version = None
+
+    @property
+    def key(self):
+        return f"{self.template}@v{self.version}" if self.template else None
+
+    # Function to append text (e.g. an output contract) and keep the template identity
+    def with_suffix(self, suffix):
+        return _prompt(str(self) + suffix, self.template, self.version)
+
+
+def _prompt(text, template, version):
+    prompt = Prompt(text)
+    prompt.template, prompt.version = template, version
+    return prompt
+
+
+# Per-template counters: renders, fields shortened to fit a budget, calls and tokens
+class PromptStats:
+    FIELDS = ('renders', 'shortened', 'calls', 'prompt_tokens', 'response_tokens')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def add(self, key, field, amount=1):
+        with self.lock:
+            entry = self.values.setdefault(key, {name: 0 for name in self.FIELDS})
+            entry[field] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return {key: dict(entry) for key, entry in self.values.items()}
+
+
+stats = PromptStats()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Function to cut text to a token budget, keeping its head and tail
+def truncate(text, max_tokens):
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    keep = max(0, limit - len(ELLIPSIS))
+    head = text[:keep * 2 // 3].rsplit(' ', 1)[0]
+    tail = text[len(text) - keep // 3:].split(' ', 1)[-1]
+    return head + ELLIPSIS + tail
+
+
+# Content words of a text, with a plural "s" dropped so "lists" matches "list"
+def _words(text):
+    words = {word.strip('.') for word in relevance_filter.WORD.findall(text.lower())} - relevance_filter.STOPWORDS
+    return {word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word for word in words}
+
+
+def _sentences(text):
+    for sentence in SENTENCE.split(' '.join(text.split())):
+        words = sentence.split()
+        for start in range(0, len(words), CLAUSE_WORDS):
+            yield ' '.join(words[start:start + CLAUSE_WORDS])
+
+
+# Function to fit text into a token budget without an LLM call. Sentences (or clauses of unpunctuated speech)
+# are picked greedily by the words they share with `query` (the question) plus the words not yet covered, so
+# repeated filler loses to the part that says something new; the picks are kept in their original order.
+def summarize(text, max_tokens, query=''):
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    sentences = list(_sentences(text))
+    words = [_words(sentence) for sentence in sentences]
+    wanted = _words(query)
+    chosen, covered, used = set(), set(), 0
+    while True:
+        best, best_gain = None, 0
+        for index, sentence in enumerate(sentences):
+            if index in chosen or used + len(sentence) + len(ELLIPSIS) > limit:
+                continue
+            gain = 2 * len(wanted & words[index]) + len(words[index] - covered)
+            if gain > best_gain:
+                best, best_gain = index, gain
+        if best is None:
+            break
+        chosen.add(best)
+        covered |= words[best]
+        used += len(sentences[best]) + len(ELLIPSIS)
+    if not chosen:
+        return truncate(text, max_tokens)
+    parts, previous = [], -1
+    for index in sorted(chosen):
+        if index != previous + 1:
+            parts.append('...')
+        parts.append(sentences[index])
+        previous = index
+    if previous != len(sentences) - 1:
+        parts.append('...')
+    return ' '.join(parts)
+
+
+# A versioned prompt template, parsed once. `budgets` maps a field to its token budget; `query` names the
+# field a summary should stay close to. Bump `version` whenever the wording changes so cached responses
+# for the old wording are not reused.
+class PromptTemplate:
+    def __init__(self, name, version, text, budgets=None, query=None, max_tokens=None):
+        self.name = name
+        self.version = version
+        self.text = text
+        self.parts = [(literal, field) for literal, field, _, _ in _formatter.parse(text)]
+        self.fields = {field for _, field in self.parts if field}
+        self.budgets = budgets or {}
+        self.query = query
+        self.max_tokens = max_tokens
+
+    @property
+    def key(self):
+        return f"{self.name}@v{self.version}"
+
+    def _shorten(self, field, value, budget, values):
+        if budget is None or estimate_tokens(value) <= budget:
+            return value
+        stats.add(self.key, 'shortened')
+        if PROMPT_SHORTEN_MODE == 'summarize':
+            return summarize(value, budget, values.get(self.query, ''))
+        return truncate(value, budget)
+
+    def _join(self, values):
+        return ''.join(literal + (values[field] if field else '') for literal, field in self.parts)
+
+    def render(self, **values):
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' needs {', '.join(sorted(missing))}.")
+        values = {field: str(values[field]) for field in self.fields}
+        shaped = {field: self._shorten(field, value, self.budgets.get(field), values)
+                  for field, value in values.items()}
+        text = self._join(shaped)
+        # Still over the template budget: take the overflow out of the budgeted fields, largest first
+        if self.max_tokens and estimate_tokens(text) > self.max_tokens:
+            overflow = estimate_tokens(text) - self.max_tokens
+            for field in sorted(self.fields & self.budgets.keys(), key=lambda name: -len(shaped[name])):
+                budget = max(1, estimate_tokens(shaped[field]) - overflow)
+                overflow -= estimate_tokens(shaped[field]) - budget
+                shaped[field] = self._shorten(field, shaped[field], budget, values)
+                if overflow <= 0:
+                    break
+            text = self._join(shaped)
+        stats.add(self.key, 'renders')
+        return _prompt(text, self.name, self.version)
+
+
+REGISTRY = {}
+
+
+def register(name, version, text, budgets=None, query=None, max_tokens=None):
+    REGISTRY[name] = PromptTemplate(name, version, text, budgets, query, max_tokens)
+    return REGISTRY[name]
+
+
+def get(name):
+    return REGISTRY[name]
+
+
+# Function to render a registered template: prompts.render('relevance', question=..., answer=...)
+def render(name, **values):
+    return REGISTRY[name].render(**values)
+
+
+# Function to record the tokens of one LLM call under its template (prompts not from the registry are "adhoc")
+def record_usage(prompt, prompt_tokens, response_tokens):
+    key = getattr(prompt, 'key', None) or 'adhoc'
+    stats.add(key, 'calls')
+    stats.add(key, 'prompt_tokens', prompt_tokens)
+    stats.add(key, 'response_tokens', response_tokens)
+    name = getattr(prompt, 'template', None) or 'adhoc'
+    instrumentation.count(f"prompt_tokens.{name}", prompt_tokens)
+    instrumentation.count(f"response_tokens.{name}", response_tokens)
+    logger.debug("Prompt %s: %d prompt tokens, %d response tokens.", key, prompt_tokens, response_tokens)
+
+
+ANSWER = {'answer': PROMPT_ANSWER_TOKENS, 'question': PROMPT_QUESTION_TOKENS}
+
+register('skill_questions', 1, (
+    "Generate a list of specific interview questions directly related to the skill '{skill}'. "
+    "Only list clear, direct questions without any extra text."
+), budgets={'skill': 20})
+register('skill_question', 1, "Generate a question about {skill}.", budgets={'skill': 20})
+register('resume_questions', 1, "Generate a list of questions based on the following skills:\n\nSkills:\n{skills}",
+         budgets={'skills': 200})
+register('skill_batch', 1, (
+    "You are generating technical interview questions for several skills at once. "
+    "For every skill listed below, write exactly one easy, one normal and one hard interview question. "
+    "Each question must be a single clear, direct sentence ending with a question mark, without numbering or extra text.\n"
+    "Respond with only a JSON object, no markdown, keyed by the exact skill name, where each value is an object "
+    "with the keys \"easy\", \"normal\" and \"hard\".\n"
+    "Skills: {skills}"
+))
+register('reference_answer', 1, (
+    "Generate a short and direct answer for the following question: {question}. "
+    "Include only one answer and provide an example related to that answer."
+), budgets={'question': PROMPT_QUESTION_TOKENS}, max_tokens=160)
+register('reference_answers', 1, (
+    "Generate a short and direct answer for each of the following interview questions. "
+    "Include only one answer per question and provide an example related to that answer.\n"
+    "Respond with only a JSON object, no markdown, keyed by the question number (\"1\", \"2\", ...), "
+    "where each value is the answer text.\n\n"
+    "Questions:\n{questions}"
+))
+register('relevance', 1, (
+    "Evaluate the following answer to determine if it is relevant to the question provided.\n"
+    "Question: {question}\n"
+    "Answer: {answer}\n"
+    "Is the answer relevant to the question? Respond with 'Yes' if it is relevant, otherwise respond with 'No'."
+), budgets=ANSWER, query='question', max_tokens=480)
+register('answer_feedback', 1, (
+    "Evaluate the following answer to determine if it appropriately addresses the given question. "
+    "Provide feedback on whether the answer is relevant and complete.\n\n"
+    "Question: {question}\n"
+    "Answer: {answer}\n"
+    "Feedback:"
+), budgets=ANSWER, query='question', max_tokens=480)
+register('follow_up', 1, (
+    "You are an expert follow-up question generator. Based on the question: {question} and the user's answer: "
+    "{answer}, generate a follow-up question that delves deeper into that particular topic."
+), budgets=ANSWER, query='question', max_tokens=480)
+register('hr_topic_questions', 1, (
+    "Generate {count} different HR interview questions about {topic}. Each question must be a single clear, "
+    "open question a candidate can answer from their own experience."
+), budgets={'topic': 40})
+register('hr_follow_up', 1, (
+    "Based on the HR question: {question} and the user's answer: {answer}, generate a follow-up question "
+    "to explore the user's response further."
+), budgets=ANSWER, query='question', max_tokens=480)
+register('question_repair', 1, (
+    "Your previous reply could not be parsed. Return the same interview questions as only a JSON object "
+    'matching {{"questions": ["<question ending with ?>", ...]}} with no markdown.\n\nPrevious reply:\n{reply}'
+), budgets={'reply': 500})
@@ -4,6 +4,9 @@ import streamlit as st
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
 from PyPDF2 import PdfReader
+import instrumentation
+import llm_gateway
+import prompts
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +29,7 @@ resume_texts = []
 skills = []
 
 # Function to extract text from PDF resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file):
     pdf_reader = PdfReader(file)
     text = ""
@@ -34,6 +38,7 @@ def extract_text_from_pdf(file):
     return text
 
 # Function to extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     # Simple skill extraction based on patterns or keywords
     
@@ -60,14 +65,13 @@ def generate_questions_based_on_skills():
         return "No skills found in the resume."
     
     # Prepare prompt to generate questions
-    prompt = "Generate a list of questions based on the following skills:\n\n"
-    prompt += "Skills:\n" + ', '.join(skills)
+    prompt = prompts.render('resume_questions', skills=', '.join(skills))
     
     # Generate questions using Gemini-Pro model
-    gemini_response = model.start_chat().send_message(prompt)
+    gemini_response_text = llm_gateway.generate(model, prompt)
     
     # Return generated questions
-    return gemini_response.text
+    return gemini_response_text
 
 # Display the page title
 st.title("Resume Skill Question Generator")
@@ -1,12 +1,17 @@
 import os
 import re
-import time
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
+import app_logging
+import instrumentation
+import llm_gateway
+import pdf_extract
+import prompts
+import question_parser
 
 # Load environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -20,21 +25,18 @@ skills = []
 questions = []  # To store generated questions
 
 # Function to extract text from PDF resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file_path):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""  # Handle NoneType if text extraction fails
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(file_path)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # Function to extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     try:
         # Simple skill extraction based on patterns or keywords
@@ -47,68 +49,50 @@ def extract_skills(text):
             if re.search(pattern, text, re.IGNORECASE):
                 skills_found.add(pattern.replace(r'\b', ''))
         
-        print(f"Skills extracted: {skills_found}")
+        logger.debug("Skills extracted: %s", skills_found)
         return list(skills_found)
     except Exception as e:
-        print(f"Error extracting skills: {e}")
+        logger.error("Error extracting skills: %s", e)
         return []
 
 # Function to update resume texts and skills
 def update_resume(file_path):
     global resume_texts, skills
-    print("Extracting text from the resume...")
+    logger.debug("Extracting text from the resume...")
     resume_text = extract_text_from_pdf(file_path)
     resume_texts = [resume_text]
     
     if resume_text.strip() == "":
-        print("No text found in the resume.")
+        logger.warning("No text found in the resume.")
         return
 
-    print("Extracting skills from the resume text...")
+    logger.debug("Extracting skills from the resume text...")
     skills = extract_skills(resume_text)
 
-# Function to generate questions based on skills with retry and exponential backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2  # Starting backoff time in seconds
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit: {e}. Retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2  # Double the wait time for the next retry
-            else:
-                print(f"Error generating questions: {e}")
-                break
-    return ""
+# Function to generate questions through the shared LLM gateway (quota, jittered retries, circuit breaker)
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce)
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
 
 # Function to generate an analysis prompt for evaluating answers
 def generate_analysis_prompt(question, answer):
-    return (
-        f"Evaluate the following answer to determine if it appropriately addresses the given question. "
-        f"Provide feedback on whether the answer is relevant and complete.\n\n"
-        f"Question: {question}\n"
-        f"Answer: {answer}\n"
-        f"Feedback:"
-    )
+    return prompts.render('answer_feedback', question=question, answer=answer)
 
 # Function to analyze the answer
 def analyze_answer(question, answer):
     prompt = generate_analysis_prompt(question, answer)
     try:
-        response = model.start_chat().send_message(prompt)
-        feedback = response.text.strip()
-        print(f"Feedback: {feedback}")
+        feedback = llm_gateway.generate(model, prompt).strip()
+        logger.debug("Feedback: %s", feedback)
         # If feedback suggests the answer is relevant, return True, otherwise return False
         if "relevant" in feedback.lower() or "appropriate" in feedback.lower():
             return True
         return False
     except Exception as e:
-        print(f"Error analyzing answer: {e}")
+        logger.error("Error analyzing answer: %s", e)
         return False
 
 # Function to generate questions based on skills
@@ -118,22 +102,12 @@ def generate_questions_based_on_skills(skill):
         return "No skills found in the resume."
 
     # Prepare prompt to generate specific interview questions based on a skill
-    prompt = (
-        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
-        f"Do not include any extra text, headings, or phrases like 'Interview Questions'. Only list clear, direct questions."
-        f"Ensure that the questions are listed without any numbering, headings, or extra text. "
-        f"While providing or generating the question do not provide any numbering to the questions."
-        f"I dont need any line also i just need the question without any prefixs with numbers as such."
-    )
-
+    prompt = prompts.render('skill_questions', skill=skill)
 
-    gemini_response_text = generate_questions_with_backoff(prompt)
-
-    if not gemini_response_text:
-        return []
 
-    # Filter responses to include only valid, clean questions
-    questions = [q.strip() for q in gemini_response_text.split('\n') if q.strip() and q.strip()[-1] == '?']
+    # Parse the JSON reply, repairing or re-asking once when the output is malformed
+    questions = question_parser.generate_questions(
+        prompt, lambda p: generate_questions_with_backoff(p, coalesce=True))
     return questions
 
 # Function to validate if the response is a direct question
@@ -198,4 +172,4 @@ def main():
     print("\nThank you for your responses! Analysis completed.")
 
 if __name__ == "__main__":
-    main()
+    instrumentation.run_with_report(main)
@@ -1,14 +1,19 @@
 import os
 import re
-import time
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
+import app_logging
+import instrumentation
+import llm_gateway
+import pdf_extract
+import prompts
+import question_parser
 
 
 # Load environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -24,21 +29,18 @@ questions = []
 
 
 # Function to extract text from PDF resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file_path):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""  # Handle NoneType if text extraction fails
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(file_path)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # Function to extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     try:
         # Simple skill extraction based on patterns or keywords
@@ -51,71 +53,54 @@ def extract_skills(text):
             if re.search(pattern, text, re.IGNORECASE):
                 skills_found.add(pattern.replace(r'\b', ''))
         
-        print(f"Skills extracted: {skills_found}")
+        logger.debug("Skills extracted: %s", skills_found)
         return list(skills_found)
     except Exception as e:
-        print(f"Error extracting skills: {e}")
+        logger.error("Error extracting skills: %s", e)
         return []
 
 # Function to update resume texts and skills
 def update_resume(file_path):
     global resume_texts, skills
-    print("Extracting text from the resume...")
+    logger.debug("Extracting text from the resume...")
     resume_text = extract_text_from_pdf(file_path)
     resume_texts = [resume_text]
     
     if resume_text.strip() == "":
-        print("No text found in the resume.")
+        logger.warning("No text found in the resume.")
         return
 
-    print("Extracting skills from the resume text...")
+    logger.debug("Extracting skills from the resume text...")
     skills = extract_skills(resume_text)
 
-# Function to generate questions based on skills with retry and exponential backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2  # Starting backoff time in seconds
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit: {e}. Retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2  # Double the wait time for the next retry
-            else:
-                print(f"Error generating questions: {e}")
-                break
-    return ""
+# Function to generate questions through the shared LLM gateway (quota, jittered retries, circuit breaker)
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce)
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
 
 # Function to generate an analysis prompt for evaluating answers
 def generate_analysis_prompt(question, answer):
-    return (
-        f"Evaluate the following answer to determine if it is relevant to the question provided. "
-        f"Question: {question}\n"
-        f"Answer: {answer}\n"
-        f"Is the answer relevant to the question? Respond with 'Yes' if it is relevant, otherwise respond with 'No'."
-    )
+    return prompts.render('relevance', question=question, answer=answer)
 
 # Function to analyze the answer
 def analyze_answer(question, answer):
     prompt = generate_analysis_prompt(question, answer)
     try:
-        response = model.start_chat().send_message(prompt)
-        feedback = response.text.strip().lower()
-        print(f"Model response: {feedback}")  # Log the model's response
+        feedback = llm_gateway.generate(model, prompt).strip().lower()
+        logger.debug("Model response: %s", feedback)  # Log the model's response
 
         # Check if the response is either 'yes' or 'no'
         if feedback in ['yes', 'no']:
             return feedback == 'yes'
         else:
-            print("Unexpected response format. Expected 'Yes' or 'No'.")
+            logger.warning("Unexpected response format. Expected 'Yes' or 'No'.")
             return False
 
     except Exception as e:
-        print(f"Error analyzing answer: {e}")
+        logger.error("Error analyzing answer: %s", e)
         return False
 
 # Function to generate questions based on skills
@@ -125,21 +110,11 @@ def generate_questions_based_on_skills(skill):
         return "No skills found in the resume."
 
     # Prepare prompt to generate specific interview questions based on a skill
-    prompt = (
-        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
-        f"Do not include any extra text, headings, or phrases like 'Interview Questions'. Only list clear, direct questions."
-        f"Ensure that the questions are listed without any numbering, headings, or extra text. "
-        f"While providing or generating the question do not provide any numbering to the questions."
-        f"I don't need any line also I just need the question without any prefixes with numbers."
-    )
-
-    gemini_response_text = generate_questions_with_backoff(prompt)
-
-    if not gemini_response_text:
-        return []
+    prompt = prompts.render('skill_questions', skill=skill)
 
-    # Filter responses to include only valid, clean questions
-    questions = [q.strip() for q in gemini_response_text.split('\n') if q.strip() and q.strip()[-1] == '?']
+    # Parse the JSON reply, repairing or re-asking once when the output is malformed
+    questions = question_parser.generate_questions(
+        prompt, lambda p: generate_questions_with_backoff(p, coalesce=True))
     return questions
 
 # Function to validate if the response is a direct question
@@ -228,6 +203,7 @@ db = client['resume_analysis']  # Name of the database
 collection = db['questions_answers']
 
 
+@instrumentation.timed('store_to_mongodb')
 def store_to_mongodb(question, answer, skill):
     try:
         document = {
@@ -236,13 +212,13 @@ def store_to_mongodb(question, answer, skill):
             'answer': answer
         }
         collection.insert_one(document)
-        print(f"Stored question and answer for skill '{skill}' into MongoDB.")
+        logger.debug("Stored question and answer for skill '%s' into MongoDB.", skill)
     except Exception as e:
-        print(f"Error storing data into MongoDB: {e}")
+        logger.error("Error storing data into MongoDB: %s", e)
         
         
         
         
         
 if __name__ == "__main__":
-    main()
+    instrumentation.run_with_report(main)
@@ -1,18 +1,31 @@
 import os
 import re
-import time
 import pandas as pd
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
+import app_logging
+import difficulty
+import instrumentation
+import interview_budget
+import llm_gateway
+import pdf_extract
+import prompts
+import question_bank
+import question_parser
+import reference_answers
+import relevance_filter
+import skill_ranking
 
 
 #environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")  # MongoDB connection URI from environment variables
+# Worst-case LLM calls per skill: one question batch, then a model answer and a grading call per level
+CALLS_PER_SKILL = 7
 
 # Gemini-Pro AI model
 gen_ai.configure(api_key=GOOGLE_API_KEY)
@@ -26,21 +39,18 @@ questions = []
 client = MongoClient(MONGO_URI)
 
 # extract text from resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file_path):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""  
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(file_path)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     try:
         # Simple skill extraction based on patterns or keywords
@@ -53,84 +63,75 @@ def extract_skills(text):
             if re.search(pattern, text, re.IGNORECASE):
                 skills_found.add(pattern.replace(r'\b', ''))
         
-        print(f"Skills extracted: {skills_found}")
+        logger.debug("Skills extracted: %s", skills_found)
         return list(skills_found)
     except Exception as e:
-        print(f"Error extracting skills: {e}")
+        logger.error("Error extracting skills: %s", e)
         return []
 
 # update resume texts and skills
 def update_resume(file_path, person_id):
     global resume_texts, skills
-    print("Extracting text from the resume...")
+    logger.debug("Extracting text from the resume...")
     resume_text = extract_text_from_pdf(file_path)
     resume_texts = [resume_text]
     
     if resume_text.strip() == "":
-        print("No text found in the resume.")
+        logger.warning("No text found in the resume.")
         return
 
-    print("Extracting skills from the resume text...")
+    logger.debug("Extracting skills from the resume text...")
     skills = extract_skills(resume_text)
     # creating folder for the particular personinside the database
     db = client['resume_analysis']  
     collection = db[person_id]
     return collection
 
-# Function to generate questions with retry and exponential backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2  
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit: {e}. Retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2  
-            else:
-                print(f"Error generating questions: {e}")
-                break
-    return ""
+# Function to order skills by resume evidence and job-profile fit, keeping the top INTERVIEW_MAX_SKILLS
+def prioritize_skills(budget):
+    ranked, dropped = skill_ranking.top_skills(resume_texts[0], skills)
+    for item in dropped:
+        budget.skip(item.skill, "ranked below the top skills")
+    print("\nSkills by priority:", ', '.join(f"{item.skill} ({item.score:.2f})" for item in ranked))
+    return [item.skill for item in ranked]
+
+# Function to generate questions through the shared LLM gateway (quota, jittered retries, circuit breaker)
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
 
 # Function to generate an analysis prompt for evaluating answers
 def generate_analysis_prompt(question, answer):
-    return (
-        f"Evaluate the following answer to determine if it is relevant to the question provided."
-        f"Question: {question}\n"
-        f"Answer: {answer}\n"
-        f"Is the answer relevant to the question? Respond with 'Yes' if it is relevant, otherwise respond with 'No'."
-    )
+    return prompts.render('relevance', question=question, answer=answer)
 
 # Function to analyze the answer and store the result
 def analyze_answer(question, user_answer, skill, collection):
-    # Generate the model's answer with an example
-    prompt = (
-        f"Generate a short and direct answer for the following question: {question}. "
-        f"Include only one answer and provide an example related to that answer."
-    )
+    # The model's answer with an example: precomputed for banked questions, otherwise generated now
     try:
-        model_answer = model.start_chat().send_message(prompt).text.strip()
-        print(f"Model generated answer: {model_answer}")
-
-        # Generate feedback on user's answer
-        analysis_prompt = generate_analysis_prompt(question, user_answer)
-        response = model.start_chat().send_message(analysis_prompt)
-        feedback = response.text.strip().lower()
-        print(f"Model response: {feedback}")
-
-        # Check if the response is either 'yes' or 'no'
-        is_relevant = feedback == 'yes'
+        model_answer, context_vector = reference_answers.answer_for(model, question)
+        logger.debug("Model generated answer: %s", model_answer)
+
+        # Decide clear cases locally; only ambiguous answers cost a grading call
+        is_relevant, similarity = relevance_filter.prefilter(question, user_answer, model_answer,
+                                                             context_vector=context_vector)
+        if is_relevant is None:
+            analysis_prompt = generate_analysis_prompt(question, user_answer)
+            feedback = llm_gateway.generate(model, analysis_prompt).strip().lower()
+            logger.debug("Model response: %s", feedback)
+            is_relevant = feedback == 'yes'
+        else:
+            logger.debug("Relevance decided locally (similarity %.2f): %s", similarity, is_relevant)
         store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection)
         return is_relevant, model_answer
     except Exception as e:
-        print(f"Error analyzing answer: {e}")
+        logger.error("Error analyzing answer: %s", e)
         return False, ""
 
 # Function to store data into MongoDB
+@instrumentation.timed('store_to_mongodb')
 def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection):
     try:
         document = {
@@ -141,43 +142,34 @@ def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, co
             'relevant': is_relevant
         }
         collection.insert_one(document)
-        print(f"Stored question, user answer, model answer, and relevance for skill '{skill}' into MongoDB collection '{collection.name}'.")
+        logger.debug("Stored question, user answer, model answer, and relevance for skill '%s' into MongoDB collection '%s'.", skill, collection.name)
     except Exception as e:
-        print(f"Error storing data into MongoDB: {e}")
-
-# Function to categorize questions into easy, normal, and hard levels
-def categorize_questions(questions):
-    # Mock categorization: Splitting questions into easy, normal, and hard
-    easy, normal, hard = [], [], []
-    if len(questions) >= 3:
-        easy = [questions[0]]  # First question as easy
-        normal = [questions[1]] if len(questions) > 1 else []  # Second question as normal
-        hard = [questions[2]] if len(questions) > 2 else []  # Third question as hard
-    else:
-        # If there are fewer questions, adjust categorization
-        easy = questions[:1]
-        normal = questions[1:2]
-        hard = questions[2:3]
-    return easy, normal, hard
+        logger.error("Error storing data into MongoDB: %s", e)
+
+# Function to rank all generated questions by difficulty and bank the surplus for later interviews
+def categorize_questions(questions, skill=None):
+    return difficulty.categorize_questions(questions, skill)
 
 # Function to generate questions based on skills with categorization
 def generate_questions_based_on_skills(skill):
     if not skills:
         return "No skills found in the resume."
 
-    prompt = (
-        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
-        f"Only list clear, direct questions without any extra text."
-    )
+    # Serve a full set from the question bank before spending an LLM call
+    banked = question_bank.draw_set(skill)
+    if banked:
+        return banked
 
-    gemini_response_text = generate_questions_with_backoff(prompt)
+    prompt = prompts.render('skill_questions', skill=skill)
 
-    if not gemini_response_text:
-        return [], [], []
+    # Parse the JSON reply, repairing or re-asking once when the output is malformed
+    questions = question_parser.generate_questions(
+        prompt, lambda p: generate_questions_with_backoff(p, coalesce=True))
 
-    questions = [q.strip() for q in gemini_response_text.split('\n') if q.strip() and q.strip()[-1] == '?']
+    if not questions:
+        return [], [], []
     
-    easy, normal, hard = categorize_questions(questions)
+    easy, normal, hard = categorize_questions(questions, skill)
     return easy, normal, hard
 
 # Function to validate if the response is a direct question
@@ -213,7 +205,7 @@ def generate_overall_score(collection):
         print(f"\nOverall Relevance Score: {score}/10")
 
     except Exception as e:
-        print(f"Error generating overall score: {e}")
+        logger.error("Error generating overall score: %s", e)
 
 # Main function to run the application
 def main():
@@ -234,36 +226,29 @@ def main():
         return
 
     print("\nSkills extracted from the resume:", ', '.join(skills))
-
-    # Iterate over skills to generate and ask questions at different levels
-    for skill in skills:
-        print(f"\nGenerating questions for skill: {skill}")
-        easy_questions, normal_questions, hard_questions = generate_questions_based_on_skills(skill)
-        
-        # Handle easy questions
-        if easy_questions:
-            easy_question = easy_questions[0]
-            print(f"\nQuestion 1: {easy_question}")
-            easy_answer = input("Your Answer: ")
-            analyze_answer(easy_question, easy_answer, skill, collection)
-
-        # Handle normal questions
-        if normal_questions:
-            normal_question = normal_questions[0]
-            print(f"\nQuestion 2: {normal_question}")
-            normal_answer = input("Your Answer: ")
-            analyze_answer(normal_question, normal_answer, skill, collection)
-
-        # Handle hard questions
-        if hard_questions:
-            hard_question = hard_questions[0]
-            print(f"\nQuestion 3: {hard_question}")
-            hard_answer = input("Your Answer: ")
-            analyze_answer(hard_question, hard_answer, skill, collection)
+    budget = interview_budget.InterviewBudget(CALLS_PER_SKILL)
+
+    # Iterate over the highest-priority skills that fit the budget and ask questions at different levels
+    for skill in prioritize_skills(budget):
+        if not budget.allows_skill(skill):
+            continue
+        with budget.track(skill):
+            print(f"\nGenerating questions for skill: {skill}")
+            easy_questions, normal_questions, hard_questions = generate_questions_based_on_skills(skill)
+
+            # Ask the first question of each level
+            for number, level_questions in enumerate((easy_questions, normal_questions, hard_questions), 1):
+                if level_questions:
+                    question = level_questions[0]
+                    print(f"\nQuestion {number}: {question}")
+                    answer = input("Your Answer: ")
+                    budget.count_question(skill)
+                    analyze_answer(question, answer, skill, collection)
 
     # Generate overall score
     generate_overall_score(collection)
+    print("\nBudget report\n" + budget.format())
 
 if __name__ == "__main__":
-    main()
+    instrumentation.run_with_report(main)
 
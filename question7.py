@@ -1,20 +1,39 @@
+import json
 import os
-import re
-import time
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
 from gtts import gTTS
 import playsound
 import tempfile
+import app_logging
+import batch_scoring
+import bulk_upload
+import difficulty
+import hr_interview
+import instrumentation
+import job_matching
+import llm_cache
+import llm_gateway
+import ocr
+import pdf_extract
+import prompts
+import question_bank
+import question_batch
+import question_parser
+import reference_answers
+import relevance_filter
+import resume_upload
+import skill_matcher
 
 # Load environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
+QUESTION_BATCH_MODE = os.getenv("QUESTION_BATCH_MODE", "1") == "1"
 
 # Configure Gemini-Pro AI model
 gen_ai.configure(api_key=GOOGLE_API_KEY)
@@ -25,108 +44,89 @@ client = MongoClient(MONGO_URI)
 
 # Flask app initialization
 app = Flask(__name__)
-
-# Function to extract text from PDF
-def extract_text_from_pdf(file_path):
+app_logging.init_app(app)
+# Reject oversized bodies before they are read: the bulk limit app-wide, the single-resume limit per route
+app.config['MAX_CONTENT_LENGTH'] = bulk_upload.BULK_MAX_ARCHIVE_BYTES
+SINGLE_UPLOAD_MAX_BYTES = resume_upload.RESUME_MAX_BYTES + 64 * 1024
+
+# Function to extract text from a PDF file path or binary stream; `scanner` collects skills from every page
+@instrumentation.timed('extract_text_from_pdf')
+def extract_text_from_pdf(source, scanner=None):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(source, scanner=scanner)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
-# Function to extract skills from resume text
-def extract_skills(text):
-    skill_patterns = [
-        r'\bPython\b', r'\bJava\b', r'\bJavaScript\b', r'\bSQL\b', r'\bMachine Learning\b',
-        r'\bData Science\b', r'\bDjango\b', r'\bReact\b', r'\bNode.js\b', r'\bHTML\b', r'\bCSS\b',
-        r'\bC++\b', r'\bC#\b', r'\bRuby\b', r'\bKotlin\b', r'\bTypeScript\b', r'\bAngular\b',
-        r'\bFlask\b', r'\bSpring Boot\b', r'\bAWS\b', r'\bAzure\b', r'\bGoogle Cloud\b', r'\bDocker\b',
-        r'\bKubernetes\b', r'\bGit\b', r'\bJenkins\b', r'\bLinux\b', r'\bREST API\b', r'\bGraphQL\b',
-        r'\bjQuery\b', r'\bNext.js\b', r'\bExpress.js\b', r'\bMongoDB\b', r'\bGraphQL\b', r'\bFlutter\b',
-        r'\bReact Native\b', r'\bHadoop\b', r'\bJIRA\b', r'\bSalesforce\b', r'\bPower BI\b',
-        r'\bBash\b', r'\bShell Scripting\b', r'\bBig Data\b', r'\bData Analytics\b',
-        r'\bData Visualization\b', r'\bR\b', r'\bMATLAB\b', r'\bScikit-learn\b', r'\bNLTK\b', r'\bOpenCV\b',
-        r'\bApache\b', r'\bFastAPI\b'
-    ]
-    skills_found = set()
-    for pattern in skill_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            skills_found.add(pattern.replace(r'\b', ''))
-    print(f"Skills extracted: {skills_found}")
+# Function to extract skills from resume text, or take them from a scanner that already read the whole PDF
+@instrumentation.timed('extract_skills')
+def extract_skills(text, scanner=None):
+    if scanner is not None and scanner.chars:
+        skills_found = scanner.close()
+    else:
+        skills_found = skill_matcher.find_skills(text)
+    logger.debug("Skills extracted: %s", skills_found)
     return list(skills_found)
 
 # Function to update resume text and skills
-def update_resume(file_path, person_id):
-    print("Extracting text from the resume...")
-    resume_text = extract_text_from_pdf(file_path)
+def update_resume(source, person_id):
+    logger.debug("Extracting text from the resume...")
+    # Skills come from every page as it is parsed; the kept text is capped at PDF_MAX_CHARS.
+    # A cached resume is matched against its kept text.
+    scanner = skill_matcher.default_matcher.scanner()
+    resume_text = resume_upload.resume_text(source, lambda pdf: extract_text_from_pdf(pdf, scanner))
     if resume_text.strip() == "":
-        print("No text found in the resume.")
+        logger.warning("No text found in the resume.")
         return None, []
 
-    print("Extracting skills from the resume text...")
-    skills = extract_skills(resume_text)
+    logger.debug("Extracting skills from the resume text...")
+    skills = extract_skills(resume_text, scanner)
 
     # Creating folder for the particular person inside the database
     db = client['resume_analysis']
     collection = db[person_id]
     return collection, skills
 
-# Function to generate questions with retry and exponential backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit: {e}. Retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2
-            else:
-                print(f"Error generating questions: {e}")
-                break
-    return ""
+# Function to generate questions through the shared LLM gateway (quota, jittered retries, circuit breaker)
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
 
 
 # Function to store data into MongoDB
-def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection, hr_question=False):
+@instrumentation.timed('store_to_mongodb')
+def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection, hr_question=False, level=None):
     try:
+        entry = {'question': question, 'user_answer': user_answer, 'model_answer': model_answer, 'relevant': is_relevant}
+        if level:
+            entry['level'] = level.lower()
         existing_document = collection.find_one({'skill': skill})
         if existing_document:
             collection.update_one(
                 {'skill': 'HR'} if hr_question else {'skill': skill},
-                {'$push': {'questions': {'question': question, 'user_answer': user_answer, 'model_answer': model_answer, 'relevant': is_relevant}}}
+                {'$push': {'questions': entry}}
             )
         else:
             document = {
                 'skill': 'HR' if hr_question else skill,
-                'questions': [{'question': question, 'user_answer': user_answer, 'model_answer': model_answer, 'relevant': is_relevant}]
+                'questions': [entry]
             }
             collection.insert_one(document)
-        print(f"Stored data for skill '{skill}' in MongoDB collection '{collection.name}'.")
+        logger.debug("Stored data for skill '%s' in MongoDB collection '%s'.", skill, collection.name)
     except Exception as e:
-        print(f"Error storing data in MongoDB: {e}")
-        
-BASE_FOLDER = r'C:\Users\SPURGE\HRMANAGEMENT22'
-UPLOAD_FOLDER = os.path.join(BASE_FOLDER, 'temp_file')
+        logger.error("Error storing data in MongoDB: %s", e)
 
-# Ensure the upload folder exists
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
 
 @app.route('/upload_resume', methods=['POST'])
 def upload_resume():
     try:
+        if (request.content_length or 0) > SINGLE_UPLOAD_MAX_BYTES:
+            return jsonify({"error": f"Resume is larger than {resume_upload.RESUME_MAX_BYTES} bytes."}), 413
         if 'resume' not in request.files:
             return jsonify({"error": "No resume file found"}), 400
         
@@ -138,78 +138,91 @@ def upload_resume():
         if not person_id:
             return jsonify({"error": "Person ID is required"}), 400
         
-        file_path = os.path.join(UPLOAD_FOLDER, file.filename)
+        # Parse straight from the request stream; nothing is written under a shared path
+        with resume_upload.read_upload(file) as upload:
+            collection, skills = update_resume(upload, person_id)
+
+        return jsonify({"message": "Resume processed successfully", "skills": skills, "sha256": upload.sha256}), 200
+    except resume_upload.UploadTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except resume_upload.InvalidUploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Ensure the UPLOAD_FOLDER exists
-        if not os.path.exists(UPLOAD_FOLDER):
-            os.makedirs(UPLOAD_FOLDER)
-        
-        file.save(file_path)
-        
-        # Process the file (assuming update_resume is defined elsewhere)
-        collection, skills = update_resume(file_path, person_id)
-        
-        os.remove(file_path)
-        return jsonify({"message": "Resume processed successfully", "skills": skills}), 200
+# Bulk onboarding: many resumes as multipart "resumes" files or one zip "archive", plus a "manifest"
+# (file or form field) mapping file names to person IDs. Results stream back as NDJSON, one line per file.
+@app.route('/upload_resumes', methods=['POST'])
+def upload_resumes():
+    uploads = []
+    streaming = False
+    try:
+        manifest_file = request.files.get('manifest')
+        manifest_text = manifest_file.read().decode('utf-8-sig') if manifest_file else request.form.get('manifest')
+        manifest = bulk_upload.load_manifest(manifest_text)
+
+        if 'archive' in request.files:
+            uploads = [bulk_upload.DetachedUpload(request.files['archive'])]
+            items = bulk_upload.iter_archive(uploads[0].stream, manifest)
+        elif request.files.getlist('resumes'):
+            if not manifest:
+                return jsonify({"error": "A manifest mapping file names to person IDs is required"}), 400
+            uploads = [bulk_upload.DetachedUpload(file) for file in request.files.getlist('resumes')]
+            items = bulk_upload.iter_multipart(uploads, manifest)
+        else:
+            return jsonify({"error": "No resumes or archive found"}), 400
+
+        # Pull the first item now so a bad archive is reported as an error instead of a broken stream
+        first = next(items, None)
+        if first is None:
+            return jsonify({"error": "No PDF files found in the upload"}), 400
+
+        def all_items():
+            try:
+                yield first
+                yield from items
+            finally:
+                for upload in uploads:
+                    upload.close()
+
+        collection = bulk_upload.get_profile_collection(client)
+        results = bulk_upload.process_items(all_items(), extract_skills, collection)
+        streaming = True
+        return Response(stream_with_context(bulk_upload.ndjson(results)), mimetype='application/x-ndjson')
+    except bulk_upload.BulkUploadError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        if not streaming:
+            for upload in uploads:
+                upload.close()
 
 def generate_questions_based_on_skills(skill):
     if not skill:
         return [], [], []
 
-    prompt = (
-        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
-        f"Only list clear, direct questions without any extra text."
-    )
+    # Serve a full set from the question bank before spending an LLM call
+    banked = question_bank.draw_set(skill)
+    if banked:
+        return banked
 
-    # Generate questions using the backoff mechanism
-    gemini_response_text = generate_questions_with_backoff(prompt)
+    prompt = prompts.render('skill_questions', skill=skill)
 
-    if not gemini_response_text:
-        return [], [], []
+    # Parse the JSON reply, repairing or re-asking once when the output is malformed
+    questions = question_parser.generate_questions(
+        prompt, lambda p: generate_questions_with_backoff(p, coalesce=True))
 
-    # Process and clean up the questions
-    questions = [q.strip() for q in gemini_response_text.split('\n') if q.strip()]
-    questions = [re.sub(r'^[\*\d+\.]+[\s\-]*', '', q).strip() for q in questions]
-    questions = [q for q in questions if q and q[-1] == '?']
+    if not questions:
+        return [], [], []
 
     # Categorize questions into easy, normal, and hard
-    easy, normal, hard = categorize_questions(questions)
-    return easy, normal, hard
-
-# Function to categorize questions based on their order
-def categorize_questions(questions):
-    easy, normal, hard = [], [], []
-    if len(questions) >= 3:
-        easy = [questions[0]] 
-        normal = [questions[1]] if len(questions) > 1 else []  
-        hard = [questions[2]] if len(questions) > 2 else []  
-    else:
-        easy = questions[:1]
-        normal = questions[1:2]
-        hard = questions[2:3]
+    easy, normal, hard = categorize_questions(questions, skill)
     return easy, normal, hard
 
-# Function to generate questions with backoff mechanism
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2
-    while retries < max_retries:
-        try:
-            # Example call to your model; replace with actual call if necessary
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit: {e}. Retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2
-            else:
-                print(f"Error generating questions: {e}")
-                break
-    return ""
+# Function to rank all generated questions by difficulty and bank the surplus for later interviews
+def categorize_questions(questions, skill=None):
+    return difficulty.categorize_questions(questions, skill)
 
 # API endpoint to generate questions based on skill
 @app.route('/generate_questions', methods=['POST'])
@@ -224,13 +237,26 @@ def generate_questions_api():
         # Dictionary to store questions for each skill
         questions_per_skill = {}
 
+        # Batched mode asks for several skills in one structured prompt and falls back per skill
+        if data.get('batched', QUESTION_BATCH_MODE):
+            questions_per_skill = question_batch.generate_batched_questions(
+                skills,
+                lambda prompt: generate_questions_with_backoff(prompt, coalesce=True),
+                generate_questions_based_on_skills,
+            )
+            missing = [skill for skill in skills if skill not in questions_per_skill]
+            if missing:
+                logger.warning("Failed to generate a full set for %s.", ', '.join(missing))
+                return jsonify({"error": f"Failed to generate a balanced set of questions for {missing[0]}."}), 400
+            return jsonify(questions_per_skill), 200
+
         for skill in skills:
             # Generate questions for each skill
             easy, normal, hard = generate_questions_based_on_skills(skill)
 
             # Check if each category has at least one question
             if not easy or not normal or not hard:
-                print(f"Failed to generate a full set for {skill}. Easy: {easy}, Normal: {normal}, Hard: {hard}")
+                logger.warning("Failed to generate a full set for %s. Easy: %s, Normal: %s, Hard: %s", skill, easy, normal, hard)
                 return jsonify({"error": f"Failed to generate a balanced set of questions for {skill}."}), 400
 
             # Store the questions for each skill
@@ -256,13 +282,19 @@ def analyze_answer():
         user_answer = data['user_answer']
         skill = data['skill']
         person_id = data['person_id']
+        level = data.get('level')
+        # "fresh": true skips the response cache, e.g. to regrade after a disputed result
+        fresh = bool(data.get('fresh'))
         collection = client['resume_analysis'][person_id]
-        prompt = f"Your a expert answer generator. Generate a direct answer for the following question: {question}. The answer generated should be medium and understandable."
-        model_answer = model.start_chat().send_message(prompt).text.strip()
-        analysis_prompt = f"Evaluate the following answer to determine if it is relevant. Question: {question} Answer: {user_answer} Is the answer relevant? Respond with 'Yes' or 'No'."
-        feedback = model.start_chat().send_message(analysis_prompt).text.strip().lower()
-        is_relevant = feedback == 'yes'
-        store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection)
+        model_answer, context_vector = reference_answers.answer_for(model, question, fresh=fresh)
+        # Decide clear cases locally; only ambiguous answers cost a grading call
+        is_relevant, _ = relevance_filter.prefilter(question, user_answer, model_answer,
+                                                    context_vector=context_vector)
+        if is_relevant is None:
+            analysis_prompt = prompts.render('relevance', question=question, answer=user_answer)
+            feedback = llm_gateway.generate(model, analysis_prompt, fresh=fresh).strip().lower()
+            is_relevant = feedback == 'yes'
+        store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection, level=level)
         return jsonify({"relevant": is_relevant, "model_answer": model_answer}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -271,10 +303,15 @@ def analyze_answer():
 @app.route('/generate_hr_questions', methods=['POST'])
 def generate_hr_questions():
     try:
-        prompt = "Generate a list of HR-related interview questions that evaluate communication skills, teamwork, conflict resolution, and leadership."
-        response_text = generate_questions_with_backoff(prompt)
-        questions = [q.strip() for q in response_text.split('\n') if q.strip() and q.endswith('?')]
-        return jsonify({"hr_questions": questions}), 200
+        data = request.get_json(silent=True) or {}
+        # Drawn from the HR pools by topic; a pool is only generated the first time it is empty
+        picked = hr_interview.pick_questions(
+            job_matching.company_name(), lambda p: generate_questions_with_backoff(p, coalesce=True),
+            int(data.get('count', hr_interview.HR_QUESTION_COUNT)))
+        return jsonify({
+            "hr_questions": [question for _, question in picked],
+            "topics": [topic for topic, _ in picked],
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -283,21 +320,83 @@ def generate_hr_questions():
 def get_overall_score():
     try:
         person_id = request.json['person_id']
-        collection = client['resume_analysis'][person_id]
-        documents = list(collection.find({}))
-        total_score = 0
-        total_questions = 0
-        for doc in documents:
-            questions = doc.get('questions', [])
-            for q in questions:
-                if q.get('relevant') is not None:
-                    total_score += int(q.get('relevant'))
-                    total_questions += 1
-        overall_score = (total_score / total_questions) * 100 if total_questions > 0 else 0
+        scores = batch_scoring.score_answers(batch_scoring.load_answers(client, [person_id]))
+        candidates = scores['candidates']
+        overall_score = float(candidates['score'].iloc[0]) if len(candidates) else 0
         return jsonify({"overall_score": overall_score}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Endpoint to rank every candidate in the hiring round, optionally by a single skill
+@app.route('/leaderboard', methods=['GET'])
+def leaderboard():
+    try:
+        limit = int(request.args.get('limit', 50))
+        skill = request.args.get('skill')
+        scores = batch_scoring.score_answers(batch_scoring.load_answers(client))
+        if skill:
+            board = scores['skills'][scores['skills']['skill'].str.lower() == skill.lower()]
+            board = board.sort_values(['score', 'answers'], ascending=False)
+        else:
+            board = scores['candidates']
+        return jsonify({"leaderboard": json.loads(board.head(limit).to_json(orient='records'))}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Endpoint to store a job description; its required and preferred skills are read with the resume skill matcher
+@app.route('/job_profiles', methods=['POST'])
+def create_job_profile():
+    try:
+        data = request.json or {}
+        if not data.get('job_id') or not data.get('description'):
+            return jsonify({"error": "job_id and description are required"}), 400
+        job = job_matching.parse_job_description(
+            data['description'], data['job_id'], data.get('title', ''), data.get('company', ''))
+        job_matching.save_job(job_matching.get_job_collection(client), job)
+        return jsonify({"job_id": job.job_id, "required": job.required, "preferred": job.preferred}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Endpoint to rank every onboarded resume against a stored job before any interview is run
+@app.route('/job_profiles/<job_id>/matches', methods=['GET'])
+def job_matches(job_id):
+    try:
+        job = job_matching.load_job(job_matching.get_job_collection(client), job_id)
+        if job is None:
+            return jsonify({"error": "Job profile not found"}), 404
+        limit = int(request.args.get('limit', 50))
+        min_score = float(request.args.get('min_score', 0))
+        min_coverage = float(request.args.get('min_coverage', 0))
+        candidates = job_matching.load_candidates(client)
+        matches = job_matching.match_candidates(candidates, job, limit, min_score, min_coverage)
+        return jsonify({
+            "job_id": job.job_id, "candidates": len(candidates),
+            "matches": json.loads(matches.to_json(orient='records')),
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Endpoint to expose LLM gateway retry/throttling counters and question parse-failure rates
+@app.route('/llm_metrics', methods=['GET'])
+def llm_metrics():
+    return jsonify({
+        **llm_gateway.get_metrics(),
+        "question_parsing": question_parser.get_stats(),
+        "relevance_prefilter": relevance_filter.get_stats(),
+        "resume_uploads": resume_upload.get_stats(),
+        "ocr": ocr.get_stats(),
+        "prompts": prompts.get_stats(),
+        "response_cache": llm_cache.get_stats(),
+        "reference_answers": reference_answers.get_stats(),
+        "hr": hr_interview.get_stats(),
+    }), 200
+
+# Prometheus scrape endpoint: step latency histograms, token counters and gateway counters
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    gateway = {f"llm_{name}_total": value for name, value in llm_gateway.get_metrics().items()}
+    return Response(instrumentation.render_prometheus(gateway), mimetype='text/plain; version=0.0.4')
+
 # Ensure the static directory exists
 TEMP_DIR = tempfile.gettempdir()
 AUDIO_FILE_PATH = os.path.join(TEMP_DIR, 'response.mp3')
@@ -333,6 +432,7 @@ def speak_introduction_route():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@instrumentation.timed('speak')
 def speak(text):
     try:
         # Convert text to speech and save to the temporary path
@@ -348,7 +448,7 @@ def speak(text):
                 os.remove(AUDIO_FILE_PATH)
                 
     except Exception as e:
-        print(f"Error speaking text: {e}")
+        logger.error("Error speaking text: %s", e)
 
 # Run the Flask application
 if __name__ == '__main__':
@@ -0,0 +1,267 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# On-disk bank of generated questions that were not used by the interview they were generated for
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "question_bank.db")
+QUESTION_BANK_MAX_SERVES = int(os.getenv("QUESTION_BANK_MAX_SERVES", "1"))
+
+LEVELS = ('easy', 'normal', 'hard')
+
+_lock = threading.RLock()
+_connection = None
+
+
+# Function to open the bank once per process and create the schema on first use
+def get_connection():
+    global _connection
+    with _lock:
+        if _connection is None:
+            _connection = sqlite3.connect(QUESTION_BANK_PATH, check_same_thread=False, isolation_level=None)
+            _connection.execute("PRAGMA journal_mode=WAL")
+            _connection.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                " id INTEGER PRIMARY KEY,"
+                " skill TEXT NOT NULL,"
+                " level TEXT NOT NULL,"
+                " question TEXT NOT NULL,"
+                " score REAL,"
+                " served INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " UNIQUE(skill, question))"
+            )
+            _connection.execute("CREATE INDEX IF NOT EXISTS questions_pick ON questions (skill, level, served)")
+            # Model answers per question text, tagged with the prompt template version that produced them
+            _connection.execute(
+                "CREATE TABLE IF NOT EXISTS reference_answers ("
+                " question_key TEXT PRIMARY KEY,"
+                " question TEXT NOT NULL,"
+                " answer TEXT NOT NULL,"
+                " template TEXT NOT NULL,"
+                " embedding BLOB,"
+                " created_at REAL NOT NULL)"
+            )
+            # Pooled HR questions per topic; unlike technical questions they are reused across interviews,
+            # least served first. `company` is only set for company-specific topics.
+            _connection.execute(
+                "CREATE TABLE IF NOT EXISTS hr_questions ("
+                " id INTEGER PRIMARY KEY,"
+                " topic TEXT NOT NULL,"
+                " company TEXT NOT NULL DEFAULT '',"
+                " question TEXT NOT NULL,"
+                " served INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " UNIQUE(topic, company, question))"
+            )
+        return _connection
+
+
+def _skill_key(skill):
+    return skill.strip().lower()
+
+
+# Function to store surplus questions as (level, question, score) tuples; duplicates are ignored
+def add_questions(skill, leveled_questions):
+    rows = [(_skill_key(skill), level, question, score, time.time())
+            for level, question, score in leveled_questions]
+    if not rows:
+        return 0
+    try:
+        with _lock:
+            connection = get_connection()
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO questions (skill, level, question, score, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return connection.total_changes - before
+    except sqlite3.Error as e:
+        logger.error("Error adding questions to the bank: %s", e)
+        return 0
+
+
+# Function to take one easy, normal and hard question for a skill, or None if any level is empty.
+# Nothing is marked as served unless the full set is available.
+def draw_set(skill):
+    try:
+        with _lock:
+            connection = get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                picked = []
+                for level in LEVELS:
+                    row = connection.execute(
+                        "SELECT id, question FROM questions WHERE skill = ? AND level = ? AND served < ?"
+                        " ORDER BY served, id LIMIT 1",
+                        (_skill_key(skill), level, QUESTION_BANK_MAX_SERVES),
+                    ).fetchone()
+                    if row is None:
+                        connection.execute("ROLLBACK")
+                        return None
+                    picked.append(row)
+                connection.executemany("UPDATE questions SET served = served + 1 WHERE id = ?",
+                                       [(row[0],) for row in picked])
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return tuple([question] for _, question in picked)
+    except sqlite3.Error as e:
+        logger.error("Error drawing questions from the bank: %s", e)
+        return None
+
+
+# Function to take one banked question for a skill at one level, or None if there is none
+def draw_question(skill, level):
+    try:
+        with _lock:
+            connection = get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT id, question FROM questions WHERE skill = ? AND level = ? AND served < ?"
+                    " ORDER BY served, id LIMIT 1",
+                    (_skill_key(skill), level, QUESTION_BANK_MAX_SERVES),
+                ).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE questions SET served = served + 1 WHERE id = ?", (row[0],))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return row[1] if row else None
+    except sqlite3.Error as e:
+        logger.error("Error drawing a question from the bank: %s", e)
+        return None
+
+
+# Function to list every banked question, served or not, as (skill, level, question) tuples
+def all_questions(skill=None):
+    query, parameters = "SELECT skill, level, question FROM questions", ()
+    if skill:
+        query, parameters = query + " WHERE skill = ?", (_skill_key(skill),)
+    with _lock:
+        return get_connection().execute(query + " ORDER BY id", parameters).fetchall()
+
+
+def _question_key(question):
+    return ' '.join(question.lower().split())
+
+
+# Function to add HR questions to a topic's pool; duplicates are ignored
+def add_hr_questions(topic, company, questions):
+    rows = [(topic, _skill_key(company), question, time.time()) for question in questions]
+    if not rows:
+        return 0
+    try:
+        with _lock:
+            connection = get_connection()
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO hr_questions (topic, company, question, created_at) VALUES (?, ?, ?, ?)", rows)
+            return connection.total_changes - before
+    except sqlite3.Error as e:
+        logger.error("Error adding HR questions to the pool: %s", e)
+        return 0
+
+
+# Function to take the least served HR question of a topic, or None if its pool is empty
+def draw_hr_question(topic, company=''):
+    try:
+        with _lock:
+            connection = get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT id, question FROM hr_questions WHERE topic = ? AND company = ? ORDER BY served, id LIMIT 1",
+                    (topic, _skill_key(company)),
+                ).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE hr_questions SET served = served + 1 WHERE id = ?", (row[0],))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return row[1] if row else None
+    except sqlite3.Error as e:
+        logger.error("Error drawing an HR question from the pool: %s", e)
+        return None
+
+
+# Function to count pooled HR questions per (topic, company)
+def hr_pool_counts():
+    with _lock:
+        rows = get_connection().execute(
+            "SELECT topic, company, COUNT(*) FROM hr_questions GROUP BY topic, company").fetchall()
+    return {(topic, company): count for topic, company, count in rows}
+
+
+# Function to store reference answers as (question, answer, template, embedding bytes or None) tuples,
+# replacing any older answer for the same question
+def save_references(rows):
+    rows = [(_question_key(question), question, answer, template, embedding, time.time())
+            for question, answer, template, embedding in rows]
+    if not rows:
+        return 0
+    try:
+        with _lock:
+            get_connection().executemany(
+                "INSERT OR REPLACE INTO reference_answers (question_key, question, answer, template, embedding,"
+                " created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+    except sqlite3.Error as e:
+        logger.error("Error storing reference answers: %s", e)
+        return 0
+
+
+# Function to return (answer, embedding bytes or None) stored for a question by `template`, or None
+def get_reference(question, template):
+    try:
+        with _lock:
+            return get_connection().execute(
+                "SELECT answer, embedding FROM reference_answers WHERE question_key = ? AND template = ?",
+                (_question_key(question), template),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.error("Error reading a reference answer: %s", e)
+        return None
+
+
+# Function to list banked questions (optionally for one skill) with no reference answer from `template` yet.
+# Without a skill the pooled HR questions are included too.
+def questions_without_reference(template, skill=None, limit=None):
+    missing = ("SELECT question FROM {table} WHERE NOT EXISTS (SELECT 1 FROM reference_answers r"
+               " WHERE r.question_key = LOWER({table}.question) AND r.template = ?)")
+    queries = [(missing.format(table='questions'), (template,))]
+    if skill:
+        queries[0] = (queries[0][0] + " AND skill = ?", (template, _skill_key(skill)))
+    else:
+        queries.append((missing.format(table='hr_questions'), (template,)))
+    with _lock:
+        rows = [row for query, parameters in queries
+                for row in get_connection().execute(query + " ORDER BY id", parameters).fetchall()]
+    pending, seen = [], set()
+    for (question,) in rows:
+        if _question_key(question) not in seen and not get_reference(question, template):
+            seen.add(_question_key(question))
+            pending.append(question)
+    return pending[:limit]
+
+
+# Function to count questions still available per skill and level
+def available_counts():
+    with _lock:
+        rows = get_connection().execute(
+            "SELECT skill, level, COUNT(*) FROM questions WHERE served < ? GROUP BY skill, level",
+            (QUESTION_BANK_MAX_SERVES,),
+        ).fetchall()
+    counts = {}
+    for skill, level, count in rows:
+        counts.setdefault(skill, {})[level] = count
+    return counts
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+
+import prompts
+import question_parser
+
+logger = logging.getLogger(__name__)
+
+# Batched mode settings: skills per prompt and a cap on prompt size before a batch is split
+QUESTION_BATCH_SIZE = int(os.getenv("QUESTION_BATCH_SIZE", "5"))
+QUESTION_BATCH_MAX_PROMPT_CHARS = int(os.getenv("QUESTION_BATCH_MAX_PROMPT_CHARS", "2000"))
+
+LEVELS = ('easy', 'normal', 'hard')
+
+
+# Function to build one structured prompt asking for easy/normal/hard questions for several skills
+def build_batch_prompt(skills):
+    return prompts.render('skill_batch', skills=json.dumps(list(skills)))
+
+
+# Function to split skills into batches that respect both the skill count and the prompt size limit
+def split_batches(skills, batch_size=None, max_prompt_chars=None):
+    batch_size = max(1, batch_size or QUESTION_BATCH_SIZE)
+    max_prompt_chars = max_prompt_chars or QUESTION_BATCH_MAX_PROMPT_CHARS
+    batches, current = [], []
+    for skill in skills:
+        candidate = current + [skill]
+        if current and (len(candidate) > batch_size or len(build_batch_prompt(candidate)) > max_prompt_chars):
+            batches.append(current)
+            candidate = [skill]
+        current = candidate
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Function to validate a batched response; returns the complete skills and the ones that need a fallback
+def parse_batch_response(text, skills):
+    question_parser.stats.record('responses')
+    try:
+        data = question_parser.extract_json_object(text)
+    except ValueError as e:
+        logger.warning("Could not parse batched questions: %s", e)
+        question_parser.stats.record('failed')
+        return {}, list(skills)
+
+    lookup = {str(key).strip().lower(): value for key, value in data.items()} if isinstance(data, dict) else {}
+    parsed, missing = {}, []
+    for skill in skills:
+        entry = lookup.get(skill.lower())
+        if not isinstance(entry, dict):
+            missing.append(skill)
+            continue
+        questions = {level: question_parser.clean_question(entry.get(level) or '') for level in LEVELS}
+        if all(questions.values()):
+            parsed[skill] = questions
+        else:
+            missing.append(skill)
+    question_parser.stats.record('json_ok' if parsed else 'failed')
+    return parsed, missing
+
+
+# Function to generate easy/normal/hard questions for many skills with one prompt per batch.
+# `generate` sends a prompt and returns text; `fallback` returns (easy, normal, hard) lists for one skill.
+def generate_batched_questions(skills, generate, fallback, batch_size=None):
+    results = {}
+    for batch in split_batches(skills, batch_size):
+        response_text = generate(build_batch_prompt(batch))
+        parsed, missing = parse_batch_response(response_text, batch) if response_text else ({}, list(batch))
+        results.update(parsed)
+
+        for skill in missing:
+            logger.info("Falling back to a single-skill prompt for %s.", skill)
+            easy, normal, hard = fallback(skill)
+            if easy and normal and hard:
+                results[skill] = {'easy': easy[0], 'normal': normal[0], 'hard': hard[0]}
+    return results
@@ -0,0 +1,171 @@
+import json
+import logging
+import re
+import threading
+
+import prompts
+
+logger = logging.getLogger(__name__)
+
+# Output contract appended to every question-generation prompt
+JSON_INSTRUCTIONS = (
+    "\nRespond with only a JSON object, no markdown and no extra text, matching this schema: "
+    '{"questions": ["<question ending with ?>", ...]}'
+)
+
+UNWANTED_PATTERNS = ('interview questions', 'technical skills', 'summary:')
+PREFIX_PATTERN = re.compile(r'^\s*(?:(?:[-*•](?=\s)|\d+[.)]|[A-Za-z][.)](?=\s))\s*)*')
+# Markdown is only removed where it is formatting: heading or quote markers at the start, emphasis wrapped around
+# the whole question, and inline bold or code spans. '#' and '_' inside words (C#, __init__, #include) are kept.
+HEADING_PATTERN = re.compile(r'^\s*(?:#{1,6}|>)\s+')
+WRAPPED_PATTERN = re.compile(r'^(\*\*|__|\*|_)(?=\S)(.*)(?<=\S)\1$')
+INLINE_PATTERN = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|`([^`]+)`')
+
+
+# Raised when neither the JSON contract nor the repair pass yields any question
+class QuestionParseError(ValueError):
+    pass
+
+
+# Counts how each response was parsed so the failure rate can be tracked
+class ParseStats:
+    FIELDS = ('responses', 'json_ok', 'repaired', 'retried', 'failed')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+
+    def record(self, field):
+        with self.lock:
+            self.values[field] += 1
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+        responses = values['responses'] or 1
+        values['json_failure_rate'] = round(1 - values['json_ok'] / responses, 4) if values['responses'] else 0.0
+        values['failure_rate'] = round(values['failed'] / responses, 4) if values['responses'] else 0.0
+        return values
+
+
+stats = ParseStats()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Function to add the JSON output contract to a question-generation prompt
+def with_schema(prompt):
+    if isinstance(prompt, prompts.Prompt):
+        return prompt.with_suffix(JSON_INSTRUCTIONS)
+    return prompt + JSON_INSTRUCTIONS
+
+
+# Function to pull the JSON value out of a response that may be wrapped in code fences or prose
+def extract_json_object(text):
+    text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+    starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+    if not starts:
+        raise ValueError("No JSON object found in response.")
+    start = min(starts)
+    end = text.rfind('}' if text[start] == '{' else ']')
+    if end <= start:
+        raise ValueError("Unterminated JSON in response.")
+    return json.loads(text[start:end + 1])
+
+
+# Function to drop markdown formatting around and inside a line, along with its bullets and numbering
+def strip_markdown(text):
+    text, previous = ' '.join(str(text).split()), None
+    while text != previous:
+        previous = text
+        text = PREFIX_PATTERN.sub('', HEADING_PATTERN.sub('', text)).strip()
+        wrapped = WRAPPED_PATTERN.match(text)
+        if wrapped:
+            text = wrapped.group(2).strip()
+    return INLINE_PATTERN.sub(lambda match: match.group(1) or match.group(2), text)
+
+
+# Function to normalise one question: drop bullets, numbering and markdown, reject headings
+def clean_question(question):
+    question = strip_markdown(question)
+    if not question.endswith('?'):
+        return None
+    if any(pattern in question.lower() for pattern in UNWANTED_PATTERNS):
+        return None
+    return question
+
+
+def _dedupe(questions):
+    seen, unique = set(), []
+    for question in questions:
+        if question and question.lower() not in seen:
+            seen.add(question.lower())
+            unique.append(question)
+    return unique
+
+
+# Fast path: validate a reply that follows the JSON contract
+def parse_json_questions(text):
+    data = extract_json_object(text)
+    items = data.get('questions') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("JSON reply has no 'questions' list.")
+    return _dedupe(clean_question(item) for item in items if isinstance(item, str))
+
+
+# Repair path for free text: rejoin questions that wrap across lines, then clean each one
+def repair_questions(text):
+    questions, current = [], ''
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('```'):
+            current = ''
+            continue
+        wrapped = current and not current.endswith(('.', ':', '!'))
+        if wrapped and PREFIX_PATTERN.match(line).end() == 0:
+            current = f"{current} {line}"
+        else:
+            current = line
+        if strip_markdown(current).endswith('?'):
+            questions.append(current)
+            current = ''
+    return _dedupe(clean_question(q) for q in questions)
+
+
+# Function to parse one reply: JSON contract first, free-text repair second
+def parse_questions(text):
+    stats.record('responses')
+    try:
+        questions = parse_json_questions(text)
+        if questions:
+            stats.record('json_ok')
+            return questions
+    except ValueError:
+        pass
+
+    questions = repair_questions(text)
+    if questions:
+        stats.record('repaired')
+        return questions
+    raise QuestionParseError("Reply contained no usable questions.")
+
+
+# Function to generate a list of questions with the JSON contract, repairing or re-asking once on bad output.
+# `generate` sends a prompt and returns the reply text ("" on failure).
+def generate_questions(prompt, generate, max_repairs=1):
+    reply = generate(with_schema(prompt))
+    for attempt in range(max_repairs + 1):
+        if not reply:
+            break
+        try:
+            return parse_questions(reply)
+        except QuestionParseError as e:
+            if attempt == max_repairs:
+                break
+            logger.warning("Malformed question output (%s); asking the model to repair it.", e)
+            stats.record('retried')
+            reply = generate(prompts.render('question_repair', reply=reply))
+    stats.record('failed')
+    return []
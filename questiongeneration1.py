@@ -1,47 +1,56 @@
+import contextlib
 import os
 import re
-import time
 import pandas as pd
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
 from gtts import gTTS 
 import playsound  
 import speech_recognition as sr 
+import app_logging
+import hr_interview
+import instrumentation
+import interview_budget
+import interview_session
+import job_matching
+import llm_gateway
+import pdf_extract
+import prompts
+import reference_answers
+import relevance_filter
+import skill_ranking
+import speculation
 
 # Environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
+# Worst-case LLM calls per skill: a primary question and two follow-ups, each with a model answer and a grade
+CALLS_PER_SKILL = 9
 
 # Gemini-Pro AI model
 gen_ai.configure(api_key=GOOGLE_API_KEY)
 model = gen_ai.GenerativeModel('gemini-pro')
 
-resume_texts = []
-skills = []
-
 # MongoDB
 client = MongoClient(MONGO_URI)
 
 # Extract text from resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file_path):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(file_path)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # Extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     skill_patterns = [
         r'\bPython\b', r'\bJava\b', r'\bJavaScript\b', r'\bSQL\b', r'\bMachine Learning\b',
@@ -58,9 +67,10 @@ def extract_skills(text):
     for pattern in skill_patterns:
         if re.search(pattern, text, re.IGNORECASE):
             skills_found.add(pattern.replace(r'\b', ''))
-    print(f"Skills extracted: {skills_found}")
+    logger.debug("Skills extracted: %s", skills_found)
     return list(skills_found)
 
+@instrumentation.timed('speak')
 def speak(text):
     try:
         tts = gTTS(text=text, lang='en')
@@ -69,7 +79,7 @@ def speak(text):
         playsound.playsound(audio_file)
         os.remove(audio_file)
     except Exception as e:
-        print(f"Error in text-to-speech conversion: {e}")
+        logger.error("Error in text-to-speech conversion: %s", e)
 
 def speak_introduction(user_name, skills):
     skills_list = ', '.join(skills)
@@ -81,70 +91,61 @@ def speak_introduction(user_name, skills):
     print(intro_text)
     speak(intro_text)
 
-# Update resume texts and skills
-def update_resume(file_path, person_id):
-    global resume_texts, skills
+# Update resume texts and skills; skills come back by priority, cut to the top INTERVIEW_MAX_SKILLS
+def update_resume(file_path, person_id, budget=None):
     resume_text = extract_text_from_pdf(file_path)
-    resume_texts = [resume_text]
     skills = extract_skills(resume_text)
+    ranked, dropped = skill_ranking.top_skills(resume_text, skills)
+    if budget is not None:
+        for item in dropped:
+            budget.skip(item.skill, "ranked below the top skills")
     db = client['resume_analysis']
     collection = db[person_id]
-    return collection
-
-# Generate questions with retry and backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2
-            else:
-                break
-    return ""
-
-# Generate follow-up questions based on answers
+    return collection, [item.skill for item in ranked]
+
+# Generate questions through the shared LLM gateway
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
+
+# Follow-ups started while the answer they follow is still being graded
+follow_ups = speculation.Speculator(generate_questions_with_backoff)
+
+def follow_up_prompt(question, user_answer):
+    return prompts.render('follow_up', question=question, answer=user_answer)
+
+# Generate follow-up questions based on answers, reusing one generated speculatively during grading
 def generate_followup_question(question, user_answer):
-    prompt = (
-        f"Your an expert follow-up question generator.Based on the question: {question} and the user's answer: {user_answer}, generate a follow-up question "
-        "that delves deeper into the that particular topic."
-    )
-    return generate_questions_with_backoff(prompt)
+    return follow_ups.take(follow_up_prompt(question, user_answer))
 
+# Draw the HR question from the pooled questions per topic instead of generating one per interview
 def generate_hr_question():
-    hr_prompt = "Generate a relevant HR question. Consider common HR topics such as teamwork, challenges, strengths, or experience."
-    return generate_questions_with_backoff(hr_prompt)
+    picked = hr_interview.pick_questions(job_matching.company_name(), generate_questions_with_backoff, 1)
+    return picked[0][1] if picked else ""
 
 # Generate a follow-up question for HR responses
 def generate_hr_followup_question(hr_question, hr_answer):
-    hr_followup_prompt = (
-        f"Based on the HR question: {hr_question} and the user's answer: {hr_answer}, generate a follow-up question "
-        "to explore the user's response further."
-    )
+    hr_followup_prompt = prompts.render('hr_follow_up', question=hr_question, answer=hr_answer)
     return generate_questions_with_backoff(hr_followup_prompt)
 
 # Analyze the user's answer
 def analyze_answer(question, user_answer, skill, collection):
-    prompt = (
-        f"Generate a concise answer for the following question: {question}. "
-        f"Include an example to make the answer understandable."
-    )
-    model_answer = generate_questions_with_backoff(prompt)
-    analysis_prompt = (
-        f"Evaluate the user's answer: {user_answer} to the question: {question}. "
-        "Respond with 'Yes' if the answer is relevant, otherwise respond with 'No'."
-    )
-    feedback = generate_questions_with_backoff(analysis_prompt).lower()
-    is_relevant = feedback == 'yes'
+    model_answer, context_vector = reference_answers.answer_for(model, question, generate_questions_with_backoff)
+    # Decide clear cases locally; only ambiguous answers cost a grading call
+    is_relevant, _ = relevance_filter.prefilter(question, user_answer, model_answer,
+                                                context_vector=context_vector)
+    if is_relevant is None:
+        analysis_prompt = prompts.render('relevance', question=question, answer=user_answer)
+        feedback = generate_questions_with_backoff(analysis_prompt).lower()
+        is_relevant = feedback == 'yes'
     store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection)
     return is_relevant, model_answer
 
 # Store data in MongoDB
+@instrumentation.timed('store_to_mongodb')
 def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection):
     document = {
         'skill': skill,
@@ -156,29 +157,56 @@ def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, co
         }]
     }
     collection.insert_one(document)
-    print(f"Stored data for skill '{skill}'.")
-
-# Generate and ask questions based on skills
-def generate_questions_based_on_skills(skill, collection):
-    # Skill-based Question
-    primary_prompt = f"Generate a question about {skill}."
-    primary_question = generate_questions_with_backoff(primary_prompt)
-    print(f"Skill Question: {primary_question}")
-    speak(primary_question)
-    user_answer = get_user_answer()
-    is_relevant, _ = analyze_answer(primary_question, user_answer, skill, collection)
-
-    follow_up_count = 0
-    while is_relevant and follow_up_count < 2:
-        follow_up_question = generate_followup_question(primary_question, user_answer)
-        if follow_up_question:
-            print(f"Follow-up Question: {follow_up_question}")
-            speak(follow_up_question)
-            user_answer = get_user_answer()
-            is_relevant, _ = analyze_answer(follow_up_question, user_answer, skill, collection)
-            follow_up_count += 1
-        else:
-            break
+    logger.debug("Stored data for skill '%s'.", skill)
+
+# Generate the primary question for a skill
+def generate_questions_based_on_skills(skill):
+    primary_prompt = prompts.render('skill_question', skill=skill)
+    return generate_questions_with_backoff(primary_prompt, coalesce=True)
+
+# Generate the question the interview session is waiting for. A new skill only starts while the
+# interview budget can afford it; otherwise the interview moves on to HR.
+def generate_session_question(session, budget=None):
+    if session.phase == interview_session.SKILL and budget is not None:
+        reason = budget.over(*budget.estimate())
+        if reason:
+            for skill in session.skills[session.skill_index:]:
+                budget.skip(skill, reason)
+            session.skip_remaining_skills()
+    if session.phase == interview_session.SKILL:
+        with budget_track(budget, session.current_skill):
+            return generate_questions_based_on_skills(session.current_skill)
+    if session.phase == interview_session.FOLLOW_UP:
+        with budget_track(budget, session.current_skill):
+            return generate_followup_question(session.base_question, session.last_answer)
+    if session.phase == interview_session.HR:
+        return generate_hr_question()
+    return generate_hr_followup_question(session.base_question, session.last_answer)
+
+# Charge the calls inside the block to a skill when a budget is kept
+def budget_track(budget, skill):
+    return budget.track(skill) if budget is not None else contextlib.nullcontext()
+
+# Labels printed before each kind of question
+QUESTION_LABELS = {
+    interview_session.SKILL: "Skill Question",
+    interview_session.FOLLOW_UP: "Follow-up Question",
+    interview_session.HR: "HR Question",
+    interview_session.HR_FOLLOW_UP: "HR Follow-up Question",
+}
+
+# Resume an unfinished interview for this person, or start a new one from the resume
+def start_or_resume_session(file_path, person_id, budget=None):
+    session = interview_session.find_active_session(person_id)
+    if session:
+        choice = input("An unfinished interview was found. Enter 1 to resume it or 2 to start over: ").strip()
+        if choice != '2':
+            print(f"Resuming interview {session.session_id}.")
+            return client['resume_analysis'][person_id], session
+    collection, skills = update_resume(file_path, person_id, budget)
+    session = interview_session.InterviewSession.start(person_id, skills)
+    interview_session.save_session(session)
+    return collection, session
 
 # Capture user's answer
 def get_user_answer():
@@ -191,6 +219,7 @@ def get_user_answer():
         return input("Your Answer: ")
 
 # Capture spoken answer
+@instrumentation.timed('capture_spoken_answer')
 def capture_spoken_answer():
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
@@ -200,7 +229,7 @@ def capture_spoken_answer():
     try:
         return recognizer.recognize_google(audio)
     except Exception as e:
-        print(f"Error capturing speech: {e}")
+        logger.error("Error capturing speech: %s", e)
         return ""
     
 def extract_username_from_person_id(person_id):
@@ -213,32 +242,42 @@ def extract_username_from_person_id(person_id):
 def main():
     file_path = input("Enter the resume file path: ")
     person_id = input("Enter the person ID: ")
-    collection = update_resume(file_path, person_id)
+    budget = interview_budget.InterviewBudget(CALLS_PER_SKILL)
+    collection, session = start_or_resume_session(file_path, person_id, budget)
     
     user_name = extract_username_from_person_id(person_id)
     
-    speak_introduction(user_name, skills)
-
-    # Ask skill-based questions first
-    for skill in skills:
-        generate_questions_based_on_skills(skill, collection)
-
-    # Ask HR questions
-    hr_question = generate_hr_question()
-    print(f"HR Question: {hr_question}")
-    speak(hr_question)
-    user_answer = get_user_answer()
-    hr_followup_question = generate_hr_followup_question(hr_question, user_answer)
-    if hr_followup_question:
-        print(f"HR Follow-up Question: {hr_followup_question}")
-        speak(hr_followup_question)
-        user_answer = get_user_answer()
+    speak_introduction(user_name, session.skills)
+
+    def grade(entry):
+        with budget.track(entry['skill']):
+            is_relevant, _ = analyze_answer(entry['question'], entry['answer'], entry['skill'], collection)
+        return is_relevant
+
+    # The follow-up is generated alongside the grade and dropped if the answer was not relevant
+    grade = speculation.grade_with_follow_up(session, grade, follow_ups, follow_up_prompt)
+
+    def generate(session):
+        return generate_session_question(session, budget)
+
+    # Skill questions and their follow-ups first, then HR; the session is checkpointed after every step
+    interview_session.advance(session, generate, grade)
+    while not session.finished:
+        print(f"{QUESTION_LABELS[session.phase]}: {session.question}")
+        speak(session.question)
+        if session.phase in interview_session.SKILL_PHASES:
+            budget.count_question(session.current_skill)
+        session.submit_answer(get_user_answer())
+        interview_session.save_session(session)
+        interview_session.advance(session, generate, grade)
         
         
     thank_you_message = "Thank You, for taking the interview. Have a great day!"
     print(thank_you_message)
     speak(thank_you_message)
+    print("\nBudget report\n" + budget.format())
+    print(f"Speculative follow-ups: {speculation.get_stats()}")
         
 
 if __name__ == "__main__":
-    main()
+    instrumentation.run_with_report(main)
@@ -1,18 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import os
 import re
-import time
+import sys
 import pandas as pd
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
 from gtts import gTTS
 import playsound
 import speech_recognition as sr
+import app_logging
+import hr_interview
+import instrumentation
+import interview_session
+import job_matching
+import job_queue
+import llm_gateway
+import pdf_extract
+import prompts
+import reference_answers
+import relevance_filter
+import speculation
 
 # Environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
@@ -25,23 +37,24 @@ model = gen_ai.GenerativeModel('gemini-pro')
 client = MongoClient(MONGO_URI)
 
 app = Flask(__name__)
+app_logging.init_app(app)
+
+# Interviews run on a worker pool; routes only enqueue jobs and report on them
+jobs = job_queue.WorkerPool('questiongeneration2')
 
 # Extract text from resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file_path):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(file_path)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # Extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     skill_patterns = [
         r'\bPython\b', r'\bJava\b', r'\bJavaScript\b', r'\bSQL\b', r'\bMachine Learning\b',
@@ -52,10 +65,11 @@ def extract_skills(text):
     for pattern in skill_patterns:
         if re.search(pattern, text, re.IGNORECASE):
             skills_found.add(pattern.replace(r'\b', ''))
-    print(f"Skills extracted: {skills_found}")
+    logger.debug("Skills extracted: %s", skills_found)
     return list(skills_found)
 
 # Text-to-Speech conversion
+@instrumentation.timed('speak')
 def speak(text):
     try:
         tts = gTTS(text=text, lang='en')
@@ -64,7 +78,7 @@ def speak(text):
         playsound.playsound(audio_file)
         os.remove(audio_file)
     except Exception as e:
-        print(f"Error in text-to-speech conversion: {e}")
+        logger.error("Error in text-to-speech conversion: %s", e)
 
 # Update resume texts and skills
 def update_resume(file_path, person_id):
@@ -74,40 +88,29 @@ def update_resume(file_path, person_id):
     collection = db[person_id]
     return collection, skills
 
-# Generate questions with retry and backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2
-            else:
-                break
-    return ""
+# Generate questions through the shared LLM gateway
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
 
 # Analyze the user's answer
 def analyze_answer(question, user_answer, skill, collection):
-    prompt = (
-        f"Generate a concise answer for the following question: {question}. "
-        f"Include an example to make the answer understandable."
-    )
-    model_answer = generate_questions_with_backoff(prompt)
-    analysis_prompt = (
-        f"Evaluate the user's answer: {user_answer} to the question: {question}. "
-        "Respond with 'Yes' if the answer is relevant, otherwise respond with 'No'."
-    )
-    feedback = generate_questions_with_backoff(analysis_prompt).lower()
-    is_relevant = feedback == 'yes'
+    model_answer, context_vector = reference_answers.answer_for(model, question, generate_questions_with_backoff)
+    # Decide clear cases locally; only ambiguous answers cost a grading call
+    is_relevant, _ = relevance_filter.prefilter(question, user_answer, model_answer,
+                                                context_vector=context_vector)
+    if is_relevant is None:
+        analysis_prompt = prompts.render('relevance', question=question, answer=user_answer)
+        feedback = generate_questions_with_backoff(analysis_prompt).lower()
+        is_relevant = feedback == 'yes'
     store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection)
     return is_relevant, model_answer
 
 # Store data in MongoDB
+@instrumentation.timed('store_to_mongodb')
 def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection):
     document = {
         'skill': skill,
@@ -119,17 +122,94 @@ def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, co
         }]
     }
     collection.insert_one(document)
-    print(f"Stored data for skill '{skill}'.")
+    logger.debug("Stored data for skill '%s'.", skill)
 
 # Generate and ask questions based on skills
-def generate_questions_based_on_skills(skill, collection):
-    primary_prompt = f"Generate a question about {skill}."
-    primary_question = generate_questions_with_backoff(primary_prompt)
-    print(f"Skill Question: {primary_question}")
+def generate_questions_based_on_skills(skill):
+    primary_prompt = prompts.render('skill_question', skill=skill)
+    primary_question = generate_questions_with_backoff(primary_prompt, coalesce=True)
+    logger.debug("Skill Question: %s", primary_question)
     # For the sake of the API, we'll skip speech interaction
     return primary_question
 
-# Main route to start the interview
+# Follow-ups started while the answer they follow is still being graded
+follow_ups = speculation.Speculator(generate_questions_with_backoff)
+
+def follow_up_prompt(question, user_answer):
+    return prompts.render('follow_up', question=question, answer=user_answer)
+
+# Generate follow-up questions based on answers
+def generate_followup_question(question, user_answer):
+    return follow_ups.take(follow_up_prompt(question, user_answer))
+
+# Draw the HR question from the pooled questions per topic instead of generating one per interview
+def generate_hr_question():
+    picked = hr_interview.pick_questions(job_matching.company_name(), generate_questions_with_backoff, 1)
+    return picked[0][1] if picked else ""
+
+# Generate a follow-up question for HR responses
+def generate_hr_followup_question(hr_question, hr_answer):
+    hr_followup_prompt = prompts.render('hr_follow_up', question=hr_question, answer=hr_answer)
+    return generate_questions_with_backoff(hr_followup_prompt)
+
+# Generate the question the interview session is waiting for
+def generate_session_question(session):
+    if session.phase == interview_session.SKILL:
+        return generate_questions_based_on_skills(session.current_skill)
+    if session.phase == interview_session.FOLLOW_UP:
+        return generate_followup_question(session.base_question, session.last_answer)
+    if session.phase == interview_session.HR:
+        return generate_hr_question()
+    return generate_hr_followup_question(session.base_question, session.last_answer)
+
+# Grade pending answers and generate the next question, checkpointing the session after each step
+def advance_session(session):
+    collection = client['resume_analysis'][session.person_id]
+
+    def grade(entry):
+        is_relevant, _ = analyze_answer(entry['question'], entry['answer'], entry['skill'], collection)
+        return is_relevant
+
+    grade = speculation.grade_with_follow_up(session, grade, follow_ups, follow_up_prompt)
+    return interview_session.advance(session, generate_session_question, grade)
+
+# Job: read the resume, open a session and generate its first question
+def run_start_interview(payload, report):
+    person_id = payload['person_id']
+    collection, skills = update_resume(payload['file_path'], person_id)
+    report({"step": "skills_extracted", "skills": skills})
+
+    user_name = extract_username_from_person_id(person_id)
+    speak_introduction(user_name, skills)
+
+    session = interview_session.InterviewSession.start(person_id, skills)
+    interview_session.save_session(session)
+    report({"step": "session_created", "session_id": session.session_id})
+    advance_session(session)
+    return {"skills": skills, "session": session.summary()}
+
+# Job: grade an answer and generate the next question
+def run_answer(payload, report):
+    session = interview_session.load_session(payload['session_id'])
+    if session is None:
+        raise interview_session.SessionError(f"Interview session {payload['session_id']} not found.")
+    collection = client['resume_analysis'][session.person_id]
+
+    def grade(entry):
+        is_relevant, _ = analyze_answer(entry['question'], entry['answer'], entry['skill'], collection)
+        report({"step": "graded", "question": entry['question'], "relevant": is_relevant})
+        return is_relevant
+
+    # The follow-up is generated alongside the grade and dropped if the answer was not relevant
+    grade = speculation.grade_with_follow_up(session, grade, follow_ups, follow_up_prompt)
+    interview_session.answer(session, payload['answer'], generate_session_question, grade)
+    return {"session": session.summary()}
+
+jobs.register('start_interview', run_start_interview)
+jobs.register('answer', run_answer)
+
+# Main route to start the interview. Returns a job id at once; the job's result holds the
+# session and its first question, and the interview continues through /interview/<session_id>/answer.
 @app.route('/start-interview', methods=['POST'])
 def start_interview():
     try:
@@ -140,22 +220,54 @@ def start_interview():
         if not file_path or not person_id:
             return jsonify({"error": "Missing file path or person ID"}), 400
 
-        collection, skills = update_resume(file_path, person_id)
-        user_name = extract_username_from_person_id(person_id)
+        job_id = jobs.submit('start_interview', {"file_path": file_path, "person_id": person_id})
+        return jsonify({"message": "Interview queued.", "job_id": job_id}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Route to check where an interview stands
+@app.route('/interview/<session_id>', methods=['GET'])
+def get_interview(session_id):
+    session = interview_session.load_session(session_id)
+    if session is None:
+        return jsonify({"error": "Interview session not found"}), 404
+    return jsonify({"session": session.summary()}), 200
+
+# Route to answer the open question; the job's result holds the next question
+@app.route('/interview/<session_id>/answer', methods=['POST'])
+def answer_interview_question(session_id):
+    try:
+        data = request.json or {}
+        user_answer = data.get('answer')
+        if user_answer is None:
+            return jsonify({"error": "Missing answer"}), 400
 
-        speak_introduction(user_name, skills)
-        
-        interview_results = {"skills": skills, "questions": []}
+        session = interview_session.load_session(session_id)
+        if session is None:
+            return jsonify({"error": "Interview session not found"}), 404
+        if session.finished:
+            return jsonify({"error": "Interview already finished", "session": session.summary()}), 409
 
-        # Ask skill-based questions first
-        for skill in skills:
-            question = generate_questions_based_on_skills(skill, collection)
-            interview_results["questions"].append({"skill": skill, "question": question})
-        
-        return jsonify({"message": "Interview completed successfully.", "results": interview_results}), 200
+        job_id = jobs.submit('answer', {"session_id": session_id, "answer": user_answer})
+        return jsonify({"message": "Answer queued.", "job_id": job_id}), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Route to poll a job's status and result
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+# Route to stream a job's progress as NDJSON until it finishes
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    if jobs.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    return Response(job_queue.stream_job(jobs, job_id), mimetype='application/x-ndjson')
+
 # Utility to extract username from person_id
 def extract_username_from_person_id(person_id):
     match = re.match(r'^[a-zA-Z]+', person_id)
@@ -171,8 +283,20 @@ def speak_introduction(user_name, skills):
         f"By going through your resume, you seem well-versed in skills like {skills_list}. "
         f"So let's get started with your test."
     )
-    print(intro_text)
+    logger.debug(intro_text)
     speak(intro_text)
 
+# Prometheus scrape endpoint: step latency histograms, token counters and gateway counters
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    gateway = {f"llm_{name}_total": value for name, value in llm_gateway.get_metrics().items()}
+    counters, gauges = speculation.prometheus_metrics()
+    gateway.update(counters)
+    return Response(instrumentation.render_prometheus(gateway, gauges), mimetype='text/plain; version=0.0.4')
+
+# Usage: python questiongeneration2.py [worker]
 if __name__ == "__main__":
-    app.run(debug=True)
+    if sys.argv[1:] == ['worker']:
+        jobs.run_forever()
+    else:
+        app.run(debug=True)
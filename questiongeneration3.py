@@ -1,18 +1,30 @@
 import os
 import re
-import time
+import sys
 import pandas as pd
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
 from gtts import gTTS 
 import playsound  
-import speech_recognition as sr 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+import app_logging
+import hr_interview
+import instrumentation
+import interview_session
+import job_matching
+import job_queue
+import llm_gateway
+import pdf_extract
+import prompts
+import reference_answers
+import relevance_filter
+import resume_upload
+import speculation
 
 # Environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
@@ -24,20 +36,25 @@ model = gen_ai.GenerativeModel('gemini-pro')
 # MongoDB
 client = MongoClient(MONGO_URI)
 app = Flask(__name__)
+app_logging.init_app(app)
+app.config['MAX_CONTENT_LENGTH'] = resume_upload.RESUME_MAX_BYTES + 64 * 1024
 
-# Extract text from resume
-def extract_text_from_pdf(file_path):
+# Interviews run on a worker pool; routes only enqueue jobs and report on them
+jobs = job_queue.WorkerPool('questiongeneration3')
+
+# Extract text from a resume file path or binary stream
+@instrumentation.timed('extract_text_from_pdf')
+def extract_text_from_pdf(source):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = "".join(page.extract_text() or "" for page in pdf_reader.pages)
-        print("Text successfully extracted from the PDF.")
+        text = pdf_extract.extract_text(source)
+        logger.debug("Text successfully extracted from the PDF.")
         return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # Extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     skill_patterns = [
         r'\bPython\b', r'\bJava\b', r'\bJavaScript\b', r'\bSQL\b', r'\bMachine Learning\b',
@@ -54,9 +71,10 @@ def extract_skills(text):
     for pattern in skill_patterns:
         if re.search(pattern, text, re.IGNORECASE):
             skills_found.add(pattern.replace(r'\b', ''))
-    print(f"Skills extracted: {skills_found}")
+    logger.debug("Skills extracted: %s", skills_found)
     return list(skills_found)
 
+@instrumentation.timed('speak')
 def speak(text):
     try:
         tts = gTTS(text=text, lang='en')
@@ -65,7 +83,7 @@ def speak(text):
         playsound.playsound(audio_file)
         os.remove(audio_file)
     except Exception as e:
-        print(f"Error in text-to-speech conversion: {e}")
+        logger.error("Error in text-to-speech conversion: %s", e)
 
 def speak_introduction(user_name, skills):
     skills_list = ', '.join(skills)
@@ -74,64 +92,53 @@ def speak_introduction(user_name, skills):
         f"By going through your resume, you seem well-versed in skills like {skills_list}. "
         f"So let's get started with your Interview."
     )
-    print(intro_text)
+    logger.debug(intro_text)
     speak(intro_text)
 
-def update_resume(file_path, person_id):
-    resume_text = extract_text_from_pdf(file_path)
+def update_resume(resume_text, person_id):
     skills = extract_skills(resume_text)
     db = client['resume_analysis']
     collection = db[person_id]
     return collection, skills
 
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2
-            else:
-                break
-    return ""
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
+
+# Follow-ups started while the answer they follow is still being graded
+follow_ups = speculation.Speculator(generate_questions_with_backoff)
+
+def follow_up_prompt(question, user_answer):
+    return prompts.render('follow_up', question=question, answer=user_answer)
 
 def generate_followup_question(question, user_answer):
-    prompt = (
-        f"Generate a follow-up question based on the question: {question} and the user's answer: {user_answer}."
-    )
-    return generate_questions_with_backoff(prompt)
+    return follow_ups.take(follow_up_prompt(question, user_answer))
 
+# Draw the HR question from the pooled questions per topic instead of generating one per interview
 def generate_hr_question():
-    hr_prompt = "Generate a relevant HR question. Consider common HR topics such as teamwork, challenges, strengths, or experience."
-    return generate_questions_with_backoff(hr_prompt)
+    picked = hr_interview.pick_questions(job_matching.company_name(), generate_questions_with_backoff, 1)
+    return picked[0][1] if picked else ""
 
 def generate_hr_followup_question(hr_question, hr_answer):
-    hr_followup_prompt = (
-        f"Based on the HR question: {hr_question} and the user's answer: {hr_answer}, generate a follow-up question "
-        "to explore the user's response further."
-    )
+    hr_followup_prompt = prompts.render('hr_follow_up', question=hr_question, answer=hr_answer)
     return generate_questions_with_backoff(hr_followup_prompt)
 
 def analyze_answer(question, user_answer, skill, collection):
-    prompt = (
-        f"Generate a concise answer for the following question: {question}. "
-        f"Include an example to make the answer understandable."
-    )
-    model_answer = generate_questions_with_backoff(prompt)
-    analysis_prompt = (
-        f"Evaluate the user's answer: {user_answer} to the question: {question}. "
-        "Respond with 'Yes' if the answer is relevant, otherwise respond with 'No'."
-    )
-    feedback = generate_questions_with_backoff(analysis_prompt).lower()
-    is_relevant = feedback == 'yes'
+    model_answer, context_vector = reference_answers.answer_for(model, question, generate_questions_with_backoff)
+    # Decide clear cases locally; only ambiguous answers cost a grading call
+    is_relevant, _ = relevance_filter.prefilter(question, user_answer, model_answer,
+                                                context_vector=context_vector)
+    if is_relevant is None:
+        analysis_prompt = prompts.render('relevance', question=question, answer=user_answer)
+        feedback = generate_questions_with_backoff(analysis_prompt).lower()
+        is_relevant = feedback == 'yes'
     store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection)
     return is_relevant, model_answer
 
+@instrumentation.timed('store_to_mongodb')
 def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection):
     document = {
         'skill': skill,
@@ -143,53 +150,68 @@ def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, co
         }]
     }
     collection.insert_one(document)
-    print(f"Stored data for skill '{skill}'.")
-
-def generate_questions_based_on_skills(skill, collection):
-    primary_prompt = f"Generate a question about {skill}."
-    primary_question = generate_questions_with_backoff(primary_prompt)
-    print(f"Question: {primary_question}")
-    speak(primary_question)
-    user_answer = get_user_answer()
-    is_relevant, _ = analyze_answer(primary_question, user_answer, skill, collection)
-
-    follow_up_count = 0
-    while is_relevant and follow_up_count < 2:
-        follow_up_question = generate_followup_question(primary_question, user_answer)
-        if follow_up_question:
-            print(f"Follow-up Question: {follow_up_question}")
-            speak(follow_up_question)
-            user_answer = get_user_answer()
-            is_relevant, _ = analyze_answer(follow_up_question, user_answer, skill, collection)
-            follow_up_count += 1
-
-def get_user_answer():
-    method = input("Enter 1 to type your answer or 2 to speak: ").strip()
-    if method == '1':
-        return input("Your Answer: ")
-    elif method == '2':
-        return capture_spoken_answer()
-    else:
-        return input("Your Answer: ")
-    
-def capture_spoken_answer():
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
-        audio = recognizer.listen(source)
-    try:
-        return recognizer.recognize_google(audio)
-    except Exception as e:
-        print(f"Error capturing speech: {e}")
-        return ""
-    
+    logger.debug("Stored data for skill '%s'.", skill)
+
+def generate_questions_based_on_skills(skill):
+    primary_prompt = prompts.render('skill_question', skill=skill)
+    primary_question = generate_questions_with_backoff(primary_prompt, coalesce=True)
+    logger.debug("Question: %s", primary_question)
+    return primary_question
+
+# Generate the question the interview session is waiting for
+def generate_session_question(session):
+    if session.phase == interview_session.SKILL:
+        return generate_questions_based_on_skills(session.current_skill)
+    if session.phase == interview_session.FOLLOW_UP:
+        return generate_followup_question(session.base_question, session.last_answer)
+    if session.phase == interview_session.HR:
+        return generate_hr_question()
+    return generate_hr_followup_question(session.base_question, session.last_answer)
+
+def session_grader(session, report):
+    collection = client['resume_analysis'][session.person_id]
+
+    def grade(entry):
+        is_relevant, _ = analyze_answer(entry['question'], entry['answer'], entry['skill'], collection)
+        report({"step": "graded", "question": entry['question'], "relevant": is_relevant})
+        return is_relevant
+
+    # The follow-up is generated alongside the grade and dropped if the answer was not relevant
+    return speculation.grade_with_follow_up(session, grade, follow_ups, follow_up_prompt)
+
 def extract_username_from_person_id(person_id):
     match = re.match(r'^[a-zA-Z]+', person_id)
     if match:
         return match.group(0).capitalize()  
     return "User"
 
+# Job: extract skills from the resume text, open a session and generate its first question
+def run_interview(payload, report):
+    person_id = payload['person_id']
+    collection, skills = update_resume(payload['resume_text'], person_id)
+    report({"step": "skills_extracted", "skills": skills})
+
+    user_name = extract_username_from_person_id(person_id)
+    speak_introduction(user_name, skills)
+
+    session = interview_session.InterviewSession.start(person_id, skills)
+    interview_session.save_session(session)
+    report({"step": "session_created", "session_id": session.session_id})
+    interview_session.advance(session, generate_session_question, session_grader(session, report))
+    return {"skills": skills, "session": session.summary()}
+
+# Job: grade an answer and generate the next question
+def run_answer(payload, report):
+    session = interview_session.load_session(payload['session_id'])
+    if session is None:
+        raise interview_session.SessionError(f"Interview session {payload['session_id']} not found.")
+    interview_session.answer(session, payload['answer'], generate_session_question, session_grader(session, report))
+    return {"session": session.summary()}
+
+jobs.register('interview', run_interview)
+jobs.register('answer', run_answer)
+
+# Upload a resume and queue the interview; answers arrive through /interview/<session_id>/answer
 @app.route('/interview', methods=['POST'])
 def interview_process_api():
     if 'resume' not in request.files:
@@ -199,25 +221,67 @@ def interview_process_api():
 
     resume_file = request.files['resume']
     person_id = request.form['person_id']
-    file_path = os.path.join(resume_file.filename)
-    resume_file.save(file_path)
+    # Parse straight from the request stream (cached by content hash); the job only needs the text
+    try:
+        with resume_upload.read_upload(resume_file) as upload:
+            resume_text = resume_upload.resume_text(upload, extract_text_from_pdf)
+    except resume_upload.UploadTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except resume_upload.InvalidUploadError as e:
+        return jsonify({"error": str(e)}), 400
+    if not resume_text.strip():
+        return jsonify({"error": "No text found in the resume"}), 400
 
-    collection, skills = update_resume(file_path, person_id)
-    os.remove(file_path)
+    job_id = jobs.submit('interview', {"resume_text": resume_text, "person_id": person_id})
+    return jsonify({"status": "Interview queued", "job_id": job_id}), 202
 
-    user_name = extract_username_from_person_id(person_id)
-    speak_introduction(user_name, skills)
+@app.route('/interview/<session_id>', methods=['GET'])
+def get_interview(session_id):
+    session = interview_session.load_session(session_id)
+    if session is None:
+        return jsonify({"error": "Interview session not found"}), 404
+    return jsonify({"session": session.summary()}), 200
 
-    for skill in skills:
-        generate_questions_based_on_skills(skill, collection)
+@app.route('/interview/<session_id>/answer', methods=['POST'])
+def answer_interview_question(session_id):
+    data = request.get_json(silent=True) or request.form
+    user_answer = data.get('answer')
+    if user_answer is None:
+        return jsonify({"error": "Missing answer"}), 400
 
-    hr_question = generate_hr_question()
-    print(f"HR Question: {hr_question}")
-    speak(hr_question)
-    user_answer = get_user_answer()
-    generate_hr_followup_question(hr_question, user_answer)
+    session = interview_session.load_session(session_id)
+    if session is None:
+        return jsonify({"error": "Interview session not found"}), 404
+    if session.finished:
+        return jsonify({"error": "Interview already finished", "session": session.summary()}), 409
 
-    return jsonify({"status": "Interview processed successfully"}), 200
+    job_id = jobs.submit('answer', {"session_id": session_id, "answer": user_answer})
+    return jsonify({"status": "Answer queued", "job_id": job_id}), 202
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    if jobs.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    return Response(job_queue.stream_job(jobs, job_id), mimetype='application/x-ndjson')
+
+# Prometheus scrape endpoint: step latency histograms, token counters and gateway counters
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    gateway = {f"llm_{name}_total": value for name, value in llm_gateway.get_metrics().items()}
+    counters, gauges = speculation.prometheus_metrics()
+    gateway.update(counters)
+    return Response(instrumentation.render_prometheus(gateway, gauges), mimetype='text/plain; version=0.0.4')
+
+# Usage: python questiongeneration3.py [worker]
 if __name__ == '__main__':
-    app.run(debug=True)
+    if sys.argv[1:] == ['worker']:
+        jobs.run_forever()
+    else:
+        app.run(debug=True)
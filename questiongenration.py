@@ -1,18 +1,29 @@
 import os
 import re
-import time
 import pandas as pd
 from dotenv import load_dotenv
 import google.generativeai as gen_ai
-from PyPDF2 import PdfReader
 from pymongo import MongoClient
 from gtts import gTTS 
 import playsound  
 import speech_recognition as sr 
+import app_logging
+import difficulty
+import hr_interview
+import instrumentation
+import job_matching
+import llm_gateway
+import pdf_extract
+import prompts
+import question_bank
+import question_parser
+import reference_answers
+import relevance_filter
 
 
 # Environment variables
 load_dotenv()
+logger = app_logging.get_logger(__name__)
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")  
@@ -29,21 +40,18 @@ questions = []
 client = MongoClient(MONGO_URI)
 
 # Extract text from resume
+@instrumentation.timed('extract_text_from_pdf')
 def extract_text_from_pdf(file_path):
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""  
-                text += page_text
-            print("Text successfully extracted from the PDF.")
-            return text
+        text = pdf_extract.extract_text(file_path)
+        logger.debug("Text successfully extracted from the PDF.")
+        return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return ""
 
 # Extract skills from resume text
+@instrumentation.timed('extract_skills')
 def extract_skills(text):
     try:
         # Simple skill extraction based on patterns or keywords
@@ -63,87 +71,78 @@ def extract_skills(text):
             if re.search(pattern, text, re.IGNORECASE):
                 skills_found.add(pattern.replace(r'\b', ''))
         
-        print(f"Skills extracted: {skills_found}")
+        logger.debug("Skills extracted: %s", skills_found)
         return list(skills_found)
     except Exception as e:
-        print(f"Error extracting skills: {e}")
+        logger.error("Error extracting skills: %s", e)
         return []
 
 # Update resume texts and skills
 def update_resume(file_path, person_id):
     global resume_texts, skills
-    print("Extracting text from the resume...")
+    logger.debug("Extracting text from the resume...")
     resume_text = extract_text_from_pdf(file_path)
     resume_texts = [resume_text]
     
     if resume_text.strip() == "":
-        print("No text found in the resume.")
+        logger.warning("No text found in the resume.")
         return
 
-    print("Extracting skills from the resume text...")
+    logger.debug("Extracting skills from the resume text...")
     skills = extract_skills(resume_text)
     # Creating folder for the particular person inside the database
     db = client['resume_analysis']  
     collection = db[person_id]
     return collection
 
-# Function to generate questions with retry and exponential backoff
-def generate_questions_with_backoff(prompt, max_retries=5):
-    retries = 0
-    backoff_time = 2  
-    while retries < max_retries:
-        try:
-            response = model.start_chat().send_message(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit: {e}. Retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2  
-            else:
-                print(f"Error generating questions: {e}")
-                break
-    return ""
+# Function to generate questions through the shared LLM gateway (quota, jittered retries, circuit breaker)
+def generate_questions_with_backoff(prompt, max_retries=5, coalesce=False):
+    try:
+        return llm_gateway.generate(model, prompt, max_retries=max_retries, coalesce=coalesce).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating questions: %s", e)
+        return ""
 
 # Function to generate an analysis prompt for evaluating answers
 def generate_analysis_prompt(question, answer):
-    return (
-        f"Evaluate the following answer to determine if it is relevant to the question provided."
-        f"Question: {question}\n"
-        f"Answer: {answer}\n"
-        f"Is the answer relevant to the question? Respond with 'Yes' if it is relevant, otherwise respond with 'No'."
-    )
+    return prompts.render('relevance', question=question, answer=answer)
 
 # Function to analyze the answer and store the result
-def analyze_answer(question, user_answer, skill, collection):
-    # Generate the model's answer with an example
-    prompt = (
-        f"Your a expert answer generator. Generate a direct answer for the following question: {question}. "
-        f"Also include an eaxmple for each answer the answer generated by you should be understandable to the user."
-        f"The answer generated should be medium and understandable I dont need big answers."
-    )
+def analyze_answer(question, user_answer, skill, collection, level=None):
+    # The model's answer with an example: precomputed for banked questions, otherwise generated now
     try:
-        model_answer = model.start_chat().send_message(prompt).text.strip()
-        print(f"Netica Generated Answer: {model_answer}")
-
-        # Generate feedback on user's answer
-        analysis_prompt = generate_analysis_prompt(question, user_answer)
-        response = model.start_chat().send_message(analysis_prompt)
-        feedback = response.text.strip().lower()
-        print(f"Model response: {feedback}")
-
-        
-        is_relevant = feedback == 'yes'
-        store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection)
+        model_answer, context_vector = reference_answers.answer_for(model, question)
+        logger.debug("Netica Generated Answer: %s", model_answer)
+
+        # Decide clear cases locally; only ambiguous answers cost a grading call
+        is_relevant, similarity = relevance_filter.prefilter(question, user_answer, model_answer,
+                                                             context_vector=context_vector)
+        if is_relevant is None:
+            analysis_prompt = generate_analysis_prompt(question, user_answer)
+            feedback = llm_gateway.generate(model, analysis_prompt).strip().lower()
+            logger.debug("Model response: %s", feedback)
+            is_relevant = feedback == 'yes'
+        else:
+            logger.debug("Relevance decided locally (similarity %.2f): %s", similarity, is_relevant)
+        store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection, level=level)
         return is_relevant, model_answer
     except Exception as e:
-        print(f"Error analyzing answer: {e}")
+        logger.error("Error analyzing answer: %s", e)
         return False, ""
 
 # Function to store data into MongoDB
-def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection, hr_question=False):
+@instrumentation.timed('store_to_mongodb')
+def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, collection, hr_question=False, level=None):
     try:
+        entry = {
+            'question': question,
+            'user_answer': user_answer,
+            'model_answer': model_answer,
+            'relevant': is_relevant
+        }
+        if level:
+            entry['level'] = level.lower()
+
         # Check if a document for the skill already exists
         existing_document = collection.find_one({'skill': skill})
 
@@ -151,92 +150,61 @@ def store_to_mongodb(question, user_answer, model_answer, skill, is_relevant, co
             # Update existing document
             collection.update_one(
                 {'skill': 'HR'} if hr_question else {'skill': skill},
-                {
-                    '$push': {
-                        'questions': {
-                            'question': question,
-                            'user_answer': user_answer,
-                            'model_answer': model_answer,
-                            'relevant': is_relevant
-                        }
-                    }
-                }
+                {'$push': {'questions': entry}}
             )
         else:
             document = {
                 'skill': 'HR' if hr_question else skill,
-                'questions': [
-                    {
-                        'question': question,
-                        'user_answer': user_answer,
-                        'model_answer': model_answer,
-                        'relevant': is_relevant
-                    }
-                ]
+                'questions': [entry]
             }
             collection.insert_one(document)
 
-        print(f"Stored question, user answer, model answer, and relevance for skill '{skill}' into MongoDB collection '{collection.name}'.")
+        logger.debug("Stored question, user answer, model answer, and relevance for skill '%s' into MongoDB collection '%s'.", skill, collection.name)
     except Exception as e:
-        print(f"Error storing data into MongoDB: {e}")
-
-# Function to categorize questions into easy, normal, and hard levels
-def categorize_questions(questions):
-   
-    easy, normal, hard = [], [], []
-    if len(questions) >= 3:
-        easy = [questions[0]] 
-        normal = [questions[1]] if len(questions) > 1 else []  
-        hard = [questions[2]] if len(questions) > 2 else []  
-    else:
-        easy = questions[:1]
-        normal = questions[1:2]
-        hard = questions[2:3]
-    return easy, normal, hard
+        logger.error("Error storing data into MongoDB: %s", e)
+
+# Function to rank all generated questions by difficulty and bank the surplus for later interviews
+def categorize_questions(questions, skill=None):
+    return difficulty.categorize_questions(questions, skill)
 
 # Function to generate questions based on skills 
 def generate_questions_based_on_skills(skill):
     if not skills:
         return "No skills found in the resume."
 
-    prompt = (
-        f"Generate a list of specific interview questions directly related to the skill '{skill}'. "
-        f"Only list clear, direct questions without any extra text."
-    )
+    # Serve a full set from the question bank before spending an LLM call
+    banked = question_bank.draw_set(skill)
+    if banked:
+        return banked
 
-    gemini_response_text = generate_questions_with_backoff(prompt)
+    prompt = prompts.render('skill_questions', skill=skill)
 
-    if not gemini_response_text:
-        return [], [], []
-    
-    
-    questions = [q.strip() for q in gemini_response_text.split('\n') if q.strip()]
-    questions = [re.sub(r'^[\*\d+\.]+[\s\-]*', '', q).strip() for q in questions]
+    # Parse the JSON reply, repairing or re-asking once when the output is malformed
+    questions = question_parser.generate_questions(
+        prompt, lambda p: generate_questions_with_backoff(p, coalesce=True))
 
-    questions = [q for q in questions if q and q[-1] == '?']
+    if not questions:
+        return [], [], []
     
-    easy, normal, hard = categorize_questions(questions)
+    easy, normal, hard = categorize_questions(questions, skill)
     return easy, normal, hard
 
-# Function to generate HR-related questions
-def generate_hr_questions():
-    prompt = (
-        "Generate a list of common HR interview questions. These questions should cover topics like teamwork, "
-        "conflict resolution, career goals, work ethic and question why you want to join netanalytiks? this should be mandatory question. Only list clear, direct questions without any extra text in the prefix like number."
-        "Generate only three questions . Not more then three questions."
-    )
-
-    gemini_response_text = generate_questions_with_backoff(prompt)
+# Function to run the HR round: pooled questions by topic, graded and stored like the technical answers,
+# with a follow-up only when a relevant answer is too brief
+def run_hr_round(collection):
+    def ask(label, question):
+        print(f"\n{label}: {question}")
+        speak(question)
+        user_answer = get_user_answer()
+        if not user_answer.strip():
+            print("No answer provided, skipping to the next HR question.")
+        return user_answer
 
-    if not gemini_response_text:
-        return []
-    
-    hr_questions = [q.strip() for q in gemini_response_text.split('\n') if q.strip()]
-    hr_questions = [re.sub(r'^[\*\d+\.]+[\s\-]*', '', q).strip() for q in hr_questions]
+    def grade(question, user_answer):
+        is_relevant, _ = analyze_answer(question, user_answer, hr_interview.HR_SKILL, collection)
+        return is_relevant
 
-    hr_questions = [q for q in hr_questions if q and q[-1] == '?']
-    
-    return hr_questions[:3]
+    return hr_interview.run_round(job_matching.company_name(), ask, grade, generate_questions_with_backoff)
 
 
 # Function to validate if the response is a direct question
@@ -280,9 +248,10 @@ def generate_overall_score(collection):
         print(f"\nOverall Score: {score}/10")
 
     except Exception as e:
-        print(f"Error generating overall score: {e}")
+        logger.error("Error generating overall score: %s", e)
 
 # Function to generate speech from text
+@instrumentation.timed('speak')
 def speak(text):
     try:
         tts = gTTS(text=text, lang='en')
@@ -291,9 +260,10 @@ def speak(text):
         playsound.playsound(audio_file)
         os.remove(audio_file)  
     except Exception as e:
-        print(f"Error during TTS: {e}")
+        logger.error("Error during TTS: %s", e)
 
 # Function to capture spoken answer using speech recognition
+@instrumentation.timed('capture_spoken_answer')
 def capture_spoken_answer():
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
@@ -308,7 +278,7 @@ def capture_spoken_answer():
     except sr.UnknownValueError:
         print("Sorry, I could not understand your speech. Please try again.")
     except sr.RequestError as e:
-        print(f"Could not request results from Google Speech Recognition service; {e}")
+        logger.error("Could not request results from Google Speech Recognition service; %s", e)
     return ""
 
 # Function to capture user answer through text or speech
@@ -386,7 +356,7 @@ def main():
                         print("No answer provided, skipping to the next question.")
                         continue
                     
-                    is_relevant, model_answer = analyze_answer(question, user_answer, skill, collection)
+                    is_relevant, model_answer = analyze_answer(question, user_answer, skill, collection, level)
 
                     if not is_relevant:
                         if level == "Easy":
@@ -401,18 +371,8 @@ def main():
     print(hr_intro_message)
     speak(hr_intro_message)
     
-        # Adding HR-based questions
-    print("\nGenerating HR-based questions...")
-    hr_questions = generate_hr_questions()
-    if hr_questions:
-        for question in hr_questions:
-            print(f"\nHR Question: {question}")
-            speak(question)  
-
-            user_answer = get_user_answer()
-            if not user_answer.strip():
-                print("No answer provided, skipping to the next HR question.")
-                continue
+    # HR questions come from the pooled HR questions; answers are graded and stored
+    run_hr_round(collection)
 
     generate_overall_score(collection)
     
@@ -421,4 +381,4 @@ def main():
     speak(thank_you_message)
 
 if __name__ == "__main__":
-    main()
+    instrumentation.run_with_report(main)
@@ -0,0 +1,198 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import llm_gateway
+import prompts
+import question_bank
+import question_parser
+import relevance_filter
+
+logger = logging.getLogger(__name__)
+
+# Model answers for banked questions, generated offline in batches so grading an answer needs at most the
+# relevance call. Questions asked before the batch job reached them are answered live and stored as well.
+REFERENCE_ANSWERS = os.getenv("REFERENCE_ANSWERS", "1") == "1"
+REFERENCE_BATCH_SIZE = int(os.getenv("REFERENCE_BATCH_SIZE", "8"))
+# Stored answers are tagged with both prompt versions; bumping either one makes the store regenerate them
+STORE_VERSION = f"{prompts.get('reference_answer').key},{prompts.get('reference_answers').key}"
+
+
+# Store lookups and what the batch job produced
+class ReferenceStats:
+    FIELDS = ('lookups', 'hits', 'misses', 'stored', 'batches', 'fallbacks', 'failed')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+
+    def record(self, field, amount=1):
+        with self.lock:
+            self.values[field] += amount
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+        values['hit_rate'] = round(values['hits'] / values['lookups'], 4) if values['lookups'] else 0.0
+        return values
+
+
+stats = ReferenceStats()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Function to embed question + answer for the relevance prefilter; only worth storing for a sentence encoder,
+# since TF-IDF weights depend on the texts being compared
+def _embedding(question, answer):
+    if relevance_filter.get_encoder() is None:
+        return None
+    vector = relevance_filter.embed([relevance_filter.context_text(question, answer)])[0]
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _vector(blob):
+    if blob is None or relevance_filter.get_encoder() is None:
+        return None
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+# Function to store (question, answer) pairs with their embeddings
+def store(pairs):
+    saved = question_bank.save_references(
+        [(question, answer, STORE_VERSION, _embedding(question, answer)) for question, answer in pairs])
+    stats.record('stored', saved)
+    return saved
+
+
+# Function to return the stored (answer, context vector or None) for a question, or None
+def lookup(question):
+    if not REFERENCE_ANSWERS:
+        return None
+    stats.record('lookups')
+    row = question_bank.get_reference(question, STORE_VERSION)
+    if row is None:
+        stats.record('misses')
+        return None
+    stats.record('hits')
+    return row[0], _vector(row[1])
+
+
+# Function to return (reference answer, context vector or None) for a question: from the store, or generated
+# now with the single-question prompt and stored for next time. `generate` sends a prompt and returns text;
+# fresh=True regenerates the answer and replaces the stored one.
+def answer_for(model, question, generate=None, fresh=False):
+    found = None if fresh else lookup(question)
+    if found is not None:
+        return found
+    generate = generate or (lambda prompt: llm_gateway.generate(model, prompt, fresh=fresh))
+    answer = generate(prompts.render('reference_answer', question=question)).strip()
+    if answer and REFERENCE_ANSWERS:
+        store([(question, answer)])
+    return answer, None
+
+
+def build_batch_prompt(questions):
+    numbered = '\n'.join(f"{index}. {question}" for index, question in enumerate(questions, 1))
+    return prompts.render('reference_answers', questions=numbered)
+
+
+# Function to map each question of a batch to its answer in a {"1": "...", ...} reply; missing ones are left out
+def parse_batch_response(text, questions):
+    try:
+        data = question_parser.extract_json_object(text)
+    except ValueError as e:
+        logger.warning("Could not parse batched reference answers: %s", e)
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    answers = {}
+    for index, question in enumerate(questions, 1):
+        answer = data.get(str(index))
+        if isinstance(answer, str) and answer.strip():
+            answers[question] = answer.strip()
+    return answers
+
+
+def _generate_one(model, question):
+    try:
+        return llm_gateway.generate(model, prompts.render('reference_answer', question=question)).strip()
+    except llm_gateway.LLMError as e:
+        logger.error("Error generating the reference answer for %r: %s", question, e)
+        return ""
+
+
+# Function to answer every banked question (optionally one skill) that has no stored answer yet, with one
+# prompt per `batch_size` questions; questions a batch reply leaves out get the single-question prompt.
+# Returns (stored, failed).
+def build(model, skill=None, limit=None, batch_size=None):
+    batch_size = max(1, batch_size or REFERENCE_BATCH_SIZE)
+    pending = question_bank.questions_without_reference(STORE_VERSION, skill, limit)
+    stored = failed = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        answers = {}
+        if len(batch) > 1:
+            stats.record('batches')
+            try:
+                answers = parse_batch_response(llm_gateway.generate(model, build_batch_prompt(batch)), batch)
+            except llm_gateway.LLMError as e:
+                logger.error("Error generating a batch of reference answers: %s", e)
+        for question in batch:
+            if question in answers:
+                continue
+            if len(batch) > 1:
+                stats.record('fallbacks')
+            answer = _generate_one(model, question)
+            if answer:
+                answers[question] = answer
+            else:
+                failed += 1
+                stats.record('failed')
+        stored += store(answers.items())
+        logger.info("Stored %d of %d reference answers.", stored, len(pending))
+    return stored, failed
+
+
+# Usage: python reference_answers.py build [skill] [--limit N] [--every SECONDS] | stats
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command != 'build':
+        pending = question_bank.questions_without_reference(STORE_VERSION)
+        print(f"{len(pending)} banked questions without a reference answer ({STORE_VERSION})")
+        return
+
+    from dotenv import load_dotenv
+    import google.generativeai as gen_ai
+
+    import app_logging
+
+    load_dotenv()
+    app_logging.configure()
+    arguments = sys.argv[2:]
+    options = {}
+    for option in ('--limit', '--every'):
+        if option in arguments:
+            index = arguments.index(option)
+            options[option] = arguments[index + 1]
+            del arguments[index:index + 2]
+    gen_ai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    model = gen_ai.GenerativeModel('gemini-pro')
+    limit = int(options['--limit']) if '--limit' in options else None
+    # With --every, keep running and pick up questions as interviews bank them
+    while True:
+        stored, failed = build(model, arguments[0] if arguments else None, limit)
+        print(f"Reference answers: {stored} stored, {failed} failed")
+        if '--every' not in options:
+            break
+        time.sleep(float(options['--every']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# At or above HIGH an answer is clearly on-topic; everything below goes to Gemini. There is no low band: on the
+# labelled set, relevant paraphrases score 0.0 (no shared words), so no similarity marks an answer as off-topic.
+# Only empty answers and non-answers ("I don't know") are rejected locally; terse ones like "O(log n)" are not.
+RELEVANCE_HIGH = float(os.getenv("RELEVANCE_HIGH", "0.30"))
+RELEVANCE_PREFILTER = os.getenv("RELEVANCE_PREFILTER", "1") == "1"
+RELEVANCE_EMBEDDING_MODEL = os.getenv("RELEVANCE_EMBEDDING_MODEL", "")
+HASH_DIMENSIONS = 2 ** 14
+
+NON_ANSWERS = re.compile(
+    r"^\s*(i\s*(do\s*n[o']?t|dont|have\s*no)\s*(know|idea|remember)|no\s*idea|not\s*sure|pass|skip|"
+    r"n/?a|nothing|no|none|idk|sorry)\b[\s.!]*$",
+    re.IGNORECASE,
+)
+STOPWORDS = frozenset(
+    "a an the and or but if of to in on for with at by from as is are was were be been being it its this that "
+    "these those i you he she we they me my your our their what which who whom how why when where do does did "
+    "can could would should will shall may might must have has had not no so than then there here about into "
+    "over also just very more most some any such each".split()
+)
+WORD = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+# Counts how often the local stage decided on its own versus escalating to the LLM
+class FilterStats:
+    FIELDS = ('checked', 'local_negative', 'local_positive', 'escalated')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+
+    def record(self, field):
+        with self.lock:
+            self.values['checked'] += 1
+            self.values[field] += 1
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+        decided = values['local_negative'] + values['local_positive']
+        values['llm_calls_avoided'] = round(decided / values['checked'], 4) if values['checked'] else 0.0
+        return values
+
+
+stats = FilterStats()
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+def _tokens(text):
+    return [word.strip('.') for word in WORD.findall(text.lower()) if word.strip('.') not in STOPWORDS]
+
+
+# Function to embed texts as L2-normalised hashed TF-IDF vectors (words plus character trigrams).
+# IDF is computed over the texts being compared, so shared boilerplate words weigh less.
+def tfidf_vectors(texts):
+    features = []
+    for text in texts:
+        tokens = _tokens(text)
+        grams = [f"#{token[i:i + 3]}" for token in tokens for i in range(max(1, len(token) - 2))]
+        features.append([zlib.crc32(item.encode()) % HASH_DIMENSIONS for item in tokens + grams])
+
+    counts = np.zeros((len(texts), HASH_DIMENSIONS), dtype=np.float32)
+    for row, columns in enumerate(features):
+        if columns:
+            np.add.at(counts[row], columns, 1.0)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+    vectors = np.log1p(counts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+# Function to return the optional sentence-embedding model, or None to use TF-IDF
+def get_encoder():
+    global _encoder
+    if not RELEVANCE_EMBEDDING_MODEL:
+        return None
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                _encoder = SentenceTransformer(RELEVANCE_EMBEDDING_MODEL, device='cpu')
+            except Exception as e:
+                logger.warning("Falling back to TF-IDF relevance scoring: %s", e)
+                _encoder = False
+        return _encoder or None
+
+
+def embed(texts):
+    encoder = get_encoder()
+    if encoder is not None:
+        return np.asarray(encoder.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+    return tfidf_vectors(texts)
+
+
+def context_text(question, reference=None):
+    return f"{question} {reference}" if reference else question
+
+
+# Function to compute the cosine similarity between an answer and the question (plus reference answer).
+# `context_vector` is a stored sentence embedding of the context; TF-IDF always re-embeds both texts.
+def similarity(question, answer, reference=None, context_vector=None):
+    if context_vector is not None and get_encoder() is not None:
+        answer_vector = embed([answer])[0]
+        if answer_vector.shape == np.shape(context_vector):
+            return float(np.dot(context_vector, answer_vector))
+    vectors = embed([context_text(question, reference), answer])
+    return float(np.dot(vectors[0], vectors[1]))
+
+
+# Function to decide relevance locally when the answer is clearly on topic or no answer at all.
+# Returns (True/False, similarity) for local decisions and (None, similarity) to escalate to the LLM.
+def prefilter(question, answer, reference=None, high=None, context_vector=None):
+    high = RELEVANCE_HIGH if high is None else high
+    answer = (answer or '').strip()
+
+    if not RELEVANCE_PREFILTER:
+        return None, math.nan
+    if not answer or NON_ANSWERS.match(answer):
+        stats.record('local_negative')
+        return False, 0.0
+
+    score = similarity(question, answer, reference, context_vector)
+    if score >= high:
+        stats.record('local_positive')
+        return True, score
+    stats.record('escalated')
+    return None, score
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Upload limits; anything above RESUME_SPOOL_BYTES that has to be copied spills to a private temp file
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+RESUME_SPOOL_BYTES = int(os.getenv("RESUME_SPOOL_BYTES", str(2 * 1024 * 1024)))
+RESUME_TEXT_CACHE_SIZE = int(os.getenv("RESUME_TEXT_CACHE_SIZE", "256"))
+CHUNK_SIZE = 64 * 1024
+PDF_MAGIC = b'%PDF-'
+
+
+# Raised when an upload is larger than RESUME_MAX_BYTES
+class UploadTooLargeError(ValueError):
+    pass
+
+
+# Raised when an upload is empty or has no PDF header in its first kilobyte
+class InvalidUploadError(ValueError):
+    pass
+
+
+# One uploaded resume: a readable stream positioned at the start, its size and its SHA-256
+class ResumeUpload:
+    def __init__(self, stream, size, sha256, filename=None, owned=False):
+        self.stream = stream
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.owned = owned
+
+    def close(self):
+        if self.owned:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Small LRU of extracted text keyed by content hash, so re-uploading the same resume skips parsing
+class TextCache:
+    def __init__(self, capacity=RESUME_TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+        # Key -> the computation in progress for it, shared by every caller waiting on that key
+        self.computing = {}
+        self.hits = 0
+        self.misses = 0
+        self.parsed = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            self.items[key] = text
+            self.items.move_to_end(key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+    # Function to return the cached text or compute it once, even when the same resume arrives concurrently.
+    # Callers that waited on a computation get its result, empty text included; the entry is dropped with its
+    # last waiter, and a failed computation is retried by the next one.
+    def get_or_compute(self, key, compute):
+        text = self.get(key)
+        if text is not None:
+            return text
+        with self.lock:
+            entry = self.computing.get(key)
+            if entry is None:
+                entry = self.computing[key] = {'lock': threading.Lock(), 'waiters': 0, 'done': False, 'text': None}
+            entry['waiters'] += 1
+        try:
+            with entry['lock']:
+                if entry['done']:
+                    return entry['text']
+                with self.lock:
+                    text = self.items.get(key)
+                if text is None:
+                    text = compute()
+                    self.parsed += 1
+                    if text:
+                        self.put(key, text)
+                entry['done'], entry['text'] = True, text
+                return text
+        finally:
+            with self.lock:
+                entry['waiters'] -= 1
+                if not entry['waiters']:
+                    self.computing.pop(key, None)
+
+
+text_cache = TextCache()
+
+
+def _chunks(stream, limit):
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        size += len(chunk)
+        if size > limit:
+            raise UploadTooLargeError(f"Resume is larger than {limit} bytes.")
+        yield chunk
+
+
+# Function to take an uploaded file (werkzeug FileStorage or any binary stream) without touching a shared
+# path. Seekable streams are hashed in place and rewound; others are copied into a per-request spooled
+# temp file that stays in memory up to RESUME_SPOOL_BYTES. The size limit is checked while reading.
+def read_upload(upload, max_bytes=None, spool_bytes=None):
+    max_bytes = RESUME_MAX_BYTES if max_bytes is None else max_bytes
+    spool_bytes = RESUME_SPOOL_BYTES if spool_bytes is None else spool_bytes
+    stream = getattr(upload, 'stream', upload)
+    filename = getattr(upload, 'filename', None)
+
+    content_length = getattr(upload, 'content_length', None)
+    if content_length and content_length > max_bytes:
+        raise UploadTooLargeError(f"Resume is larger than {max_bytes} bytes.")
+
+    digest = hashlib.sha256()
+    seekable = getattr(stream, 'seekable', lambda: False)()
+    if seekable:
+        start = stream.tell()
+        size = 0
+        for chunk in _chunks(stream, max_bytes):
+            digest.update(chunk)
+            size += len(chunk)
+        stream.seek(start)
+        result = ResumeUpload(stream, size, digest.hexdigest(), filename)
+    else:
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        try:
+            size = 0
+            for chunk in _chunks(stream, max_bytes):
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        result = ResumeUpload(spool, size, digest.hexdigest(), filename, owned=True)
+
+    position = result.stream.tell()
+    head = result.stream.read(1024)
+    result.stream.seek(position)
+    if PDF_MAGIC not in head:
+        result.close()
+        raise InvalidUploadError("Resume must be a non-empty PDF file.")
+    return result
+
+
+# Function to get resume text from an upload (cached by content hash) or from a file path.
+# `extract` is the caller's PDF extractor and receives a path or a stream.
+def resume_text(source, extract):
+    if not isinstance(source, ResumeUpload):
+        return extract(source)
+
+    def compute():
+        position = source.stream.tell()
+        text = extract(source.stream)
+        source.stream.seek(position)
+        return text
+
+    return text_cache.get_or_compute(source.sha256, compute)
+
+
+def get_stats():
+    return {
+        'cached': len(text_cache.items), 'hits': text_cache.hits, 'misses': text_cache.misses,
+        'parsed': text_cache.parsed,
+    }
@@ -0,0 +1,88 @@
+import re
+
+# The skill patterns question7 and the bulk onboarding match resumes against
+SKILL_PATTERNS = [
+    r'\bPython\b', r'\bJava\b', r'\bJavaScript\b', r'\bSQL\b', r'\bMachine Learning\b',
+    r'\bData Science\b', r'\bDjango\b', r'\bReact\b', r'\bNode.js\b', r'\bHTML\b', r'\bCSS\b',
+    r'\bC++\b', r'\bC#\b', r'\bRuby\b', r'\bKotlin\b', r'\bTypeScript\b', r'\bAngular\b',
+    r'\bFlask\b', r'\bSpring Boot\b', r'\bAWS\b', r'\bAzure\b', r'\bGoogle Cloud\b', r'\bDocker\b',
+    r'\bKubernetes\b', r'\bGit\b', r'\bJenkins\b', r'\bLinux\b', r'\bREST API\b', r'\bGraphQL\b',
+    r'\bjQuery\b', r'\bNext.js\b', r'\bExpress.js\b', r'\bMongoDB\b', r'\bFlutter\b',
+    r'\bReact Native\b', r'\bHadoop\b', r'\bJIRA\b', r'\bSalesforce\b', r'\bPower BI\b',
+    r'\bBash\b', r'\bShell Scripting\b', r'\bBig Data\b', r'\bData Analytics\b',
+    r'\bData Visualization\b', r'\bR\b', r'\bMATLAB\b', r'\bScikit-learn\b', r'\bNLTK\b', r'\bOpenCV\b',
+    r'\bApache\b', r'\bFastAPI\b'
+]
+# Characters carried from one chunk into the next; must exceed the longest skill mention
+CHUNK_OVERLAP = 64
+
+
+# Compiles a pattern list once; a skill is found when its pattern matches anywhere, ignoring case.
+# The skill name is the pattern without its \b anchors, as the scripts report it.
+class SkillMatcher:
+    def __init__(self, patterns=SKILL_PATTERNS):
+        self.patterns = [(pattern.replace(r'\b', ''), re.compile(pattern, re.IGNORECASE))
+                         for pattern in dict.fromkeys(patterns)]
+
+    @property
+    def skills(self):
+        return [skill for skill, _ in self.patterns]
+
+    def find(self, text):
+        return {skill for skill, regex in self.patterns if regex.search(text)}
+
+    def scanner(self, overlap=CHUNK_OVERLAP):
+        return ChunkScanner(self, overlap)
+
+    # Function to match skills over an iterable of text chunks (e.g. pages) without joining them
+    def find_chunks(self, chunks, overlap=CHUNK_OVERLAP):
+        scanner = self.scanner(overlap)
+        for chunk in chunks:
+            scanner.feed(chunk)
+        return scanner.close()
+
+
+# Incremental matcher over consecutive chunks of one text. Each chunk is searched together with the tail of
+# the previous one, so a mention split across chunks is still found. Matches that touch the end of a window
+# wait for the next chunk (its first character decides the closing \b), and the tail keeps one character
+# before the overlap so a match starting inside it still sees its opening \b.
+class ChunkScanner:
+    def __init__(self, matcher, overlap=CHUNK_OVERLAP):
+        self.pending = list(matcher.patterns)
+        self.overlap = overlap
+        self.skills = set()
+        self.tail = ""
+        self.start = 0
+        self.chars = 0
+
+    def _search(self, window, final):
+        remaining = []
+        for skill, regex in self.pending:
+            if any(final or match.end() < len(window) for match in regex.finditer(window, self.start)):
+                self.skills.add(skill)
+            else:
+                remaining.append((skill, regex))
+        self.pending = remaining
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.chars += len(chunk)
+        window = self.tail + chunk
+        self._search(window, False)
+        self.start = 1 if len(window) > self.overlap + 1 else 0
+        self.tail = window[-(self.overlap + 1):]
+
+    def close(self):
+        if self.tail:
+            self._search(self.tail, True)
+            self.tail = ""
+        return self.skills
+
+
+default_matcher = SkillMatcher()
+
+
+# Function to return the set of skills mentioned in a text
+def find_skills(text):
+    return default_matcher.find(text)
@@ -0,0 +1,136 @@
+import datetime
+import math
+import os
+import re
+
+import job_matching
+import skill_matcher
+
+# Skills the target role needs (comma-separated; default: the skills of JOB_DESCRIPTION); they rank ahead
+# of skills with similar evidence
+JOB_PROFILE = os.getenv("JOB_PROFILE", "")
+JOB_PROFILE_WEIGHT = float(os.getenv("JOB_PROFILE_WEIGHT", "1.5"))
+# Years after which a dated experience mention counts half
+SKILL_RECENCY_HALF_LIFE = float(os.getenv("SKILL_RECENCY_HALF_LIFE", "3"))
+# Skills interviewed per candidate, strongest evidence first (0 = all)
+INTERVIEW_MAX_SKILLS = int(os.getenv("INTERVIEW_MAX_SKILLS", "5"))
+
+# A mention in work experience is stronger evidence than a name in a skills list
+SECTION_WEIGHTS = {
+    'experience': 1.0, 'projects': 0.8, 'summary': 0.6, 'certifications': 0.5, 'skills': 0.4, 'education': 0.3,
+}
+OTHER_SECTION_WEIGHT = 0.5
+# Heading keywords per section; headings are short lines such as "WORK EXPERIENCE" or "Technical Skills:"
+SECTION_HEADINGS = {
+    'experience': ('experience', 'employment', 'work history', 'internship'),
+    'projects': ('project',),
+    'skills': ('skill', 'technolog', 'tools', 'competenc'),
+    'summary': ('summary', 'objective', 'profile', 'about me'),
+    'education': ('education', 'academic', 'qualification'),
+    'certifications': ('certif', 'course', 'training', 'award'),
+}
+DATED_SECTIONS = ('experience', 'projects')
+UNDATED_RECENCY = 0.6
+MIN_RECENCY = 0.25
+YEAR = re.compile(r'\b(19[89]\d|20\d\d)\b')
+PRESENT = re.compile(r'\b(present|current|now|till date|to date)\b', re.IGNORECASE)
+
+
+# Evidence for one skill: weighted mentions, where they were found and the latest year they were used
+class SkillEvidence:
+    def __init__(self, skill, in_profile=False):
+        self.skill = skill
+        self.in_profile = in_profile
+        self.mentions = 0
+        self.weight = 0.0
+        self.sections = set()
+        self.latest_year = None
+
+    @property
+    def score(self):
+        return math.log1p(self.weight) + (JOB_PROFILE_WEIGHT if self.in_profile else 0.0)
+
+    def to_dict(self):
+        return {
+            'skill': self.skill, 'score': round(self.score, 3), 'mentions': self.mentions,
+            'sections': sorted(self.sections), 'latest_year': self.latest_year, 'in_profile': self.in_profile,
+        }
+
+
+# Function to name the section a heading line opens, or None for an ordinary line
+def section_of(line):
+    text = line.strip().strip(':').lower()
+    if not text or len(text) > 40 or len(text.split()) > 4:
+        return None
+    for section, keywords in SECTION_HEADINGS.items():
+        if any(keyword in text for keyword in keywords):
+            return section
+    return None
+
+
+# Function to return the latest year a line refers to ("Present" is this year), or None
+def line_year(line, this_year):
+    years = [int(year) for year in YEAR.findall(line) if int(year) <= this_year]
+    if PRESENT.search(line):
+        years.append(this_year)
+    return max(years) if years else None
+
+
+def recency(year, this_year):
+    if year is None:
+        return UNDATED_RECENCY
+    return max(MIN_RECENCY, 2 ** (-(this_year - year) / SKILL_RECENCY_HALF_LIFE))
+
+
+def _profile(profile):
+    if profile is None:
+        job = job_matching.current_job()
+        profile = JOB_PROFILE or (job.skills if job else '')
+    if isinstance(profile, str):
+        profile = profile.split(',')
+    return {skill.strip().lower() for skill in profile if skill.strip()}
+
+
+def _regex(skill, patterns):
+    return patterns.get(skill) or re.compile(r'\b' + re.escape(skill) + r'\b', re.IGNORECASE)
+
+
+# Function to score each skill by evidence strength (mentions weighted by section and, in experience and
+# projects, by how recent the surrounding entry is) plus job-profile relevance; strongest first
+def rank_skills(text, skills, profile=None, matcher=skill_matcher.default_matcher, this_year=None):
+    this_year = this_year or datetime.date.today().year
+    wanted = _profile(profile)
+    patterns = dict(matcher.patterns)
+    evidence = {skill: SkillEvidence(skill, skill.lower() in wanted) for skill in dict.fromkeys(skills)}
+    regexes = {skill: _regex(skill, patterns) for skill in evidence}
+
+    section, entry_year = None, None
+    for line in text.splitlines():
+        heading = section_of(line)
+        if heading:
+            section, entry_year = heading, None
+            continue
+        year = line_year(line, this_year)
+        if year is not None:
+            entry_year = year
+        for skill, regex in regexes.items():
+            count = len(regex.findall(line))
+            if not count:
+                continue
+            item = evidence[skill]
+            weight = SECTION_WEIGHTS.get(section, OTHER_SECTION_WEIGHT)
+            if section in DATED_SECTIONS:
+                weight *= recency(entry_year, this_year)
+                if entry_year and (item.latest_year is None or entry_year > item.latest_year):
+                    item.latest_year = entry_year
+            item.mentions += count
+            item.weight += weight * count
+            item.sections.add(section or 'other')
+    return sorted(evidence.values(), key=lambda item: (-item.score, item.skill.lower()))
+
+
+# Function to pick the skills to interview: the top `limit` (default INTERVIEW_MAX_SKILLS) by rank_skills
+def top_skills(text, skills, limit=None, profile=None):
+    ranked = rank_skills(text, skills, profile)
+    limit = INTERVIEW_MAX_SKILLS if limit is None else limit
+    return ranked[:limit] if limit else ranked, ranked[limit:] if limit else []
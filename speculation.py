@@ -0,0 +1,162 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import interview_session
+import llm_gateway
+import prompts
+
+logger = logging.getLogger(__name__)
+
+# Speculative follow-ups: the follow-up question is generated while the answer is still being graded and thrown
+# away if the grade says no follow-up is due. Speculation only starts while the LLM quota has headroom to spare.
+SPECULATIVE_FOLLOW_UPS = os.getenv("SPECULATIVE_FOLLOW_UPS", "1") == "1"
+SPECULATION_MIN_HEADROOM = float(os.getenv("SPECULATION_MIN_HEADROOM", "0.4"))
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "4"))
+# Results nobody asked for within this many seconds are dropped (e.g. the interview was abandoned)
+SPECULATION_TTL = float(os.getenv("SPECULATION_TTL", "120"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Speculative calls started, used and wasted, the latency they saved and the tokens they wasted
+class SpeculationStats:
+    FIELDS = ('started', 'used', 'wasted', 'skipped', 'failed', 'saved_seconds', 'wasted_tokens')
+    # The fields exported as Prometheus counters; saved_seconds and waste_rate are exported as gauges
+    COUNTERS = ('started', 'used', 'wasted', 'skipped', 'failed', 'wasted_tokens')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {field: 0 for field in self.FIELDS}
+
+    def record(self, field, amount=1):
+        with self.lock:
+            self.values[field] += amount
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+        values['saved_seconds'] = round(values['saved_seconds'], 3)
+        finished = values['used'] + values['wasted']
+        values['waste_rate'] = round(values['wasted'] / finished, 4) if finished else 0.0
+        return values
+
+
+stats = SpeculationStats()
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+# Function to split the stats into Prometheus counters and gauges, named speculation_*
+def prometheus_metrics():
+    values = stats.snapshot()
+    counters = {f"speculation_{name}_total": values[name] for name in SpeculationStats.COUNTERS}
+    gauges = {'speculation_waste_rate': values['waste_rate'], 'speculation_saved_seconds': values['saved_seconds']}
+    return counters, gauges
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix='speculation')
+        return _pool
+
+
+# Prompts generated ahead of time, keyed by the prompt text. `generate(prompt)` returns the reply text.
+class Speculator:
+    def __init__(self, generate, min_headroom=None, enabled=None, clock=time.perf_counter):
+        self.generate = generate
+        self.min_headroom = SPECULATION_MIN_HEADROOM if min_headroom is None else min_headroom
+        self.enabled = SPECULATIVE_FOLLOW_UPS if enabled is None else enabled
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.running = {}
+
+    def _run(self, prompt):
+        reply = self.generate(prompt)
+        return reply, self.clock()
+
+    # Function to start generating `prompt` in the background; returns False when speculation is off or the
+    # quota is too tight to spend a call that may be wasted
+    def start(self, prompt):
+        if not self.enabled:
+            return False
+        self._expire()
+        if llm_gateway.headroom() < self.min_headroom:
+            stats.record('skipped')
+            return False
+        with self.lock:
+            if prompt in self.running:
+                return True
+            context = contextvars.copy_context()
+            self.running[prompt] = (get_pool().submit(context.run, self._run, prompt), self.clock())
+        stats.record('started')
+        return True
+
+    # Function to return the reply for `prompt`: the speculative one if it was started, else generated now
+    def take(self, prompt):
+        with self.lock:
+            entry = self.running.pop(prompt, None)
+        if entry is None:
+            return self.generate(prompt)
+        future, started = entry
+        needed = self.clock()
+        try:
+            reply, finished = future.result()
+        except Exception as e:
+            logger.warning("Speculative call failed, generating again: %s", e)
+            stats.record('failed')
+            return self.generate(prompt)
+        stats.record('used')
+        stats.record('saved_seconds', max(0.0, min(finished, needed) - started))
+        return reply
+
+    # Function to drop a speculative call whose result is not needed; its tokens are counted as wasted
+    def discard(self, prompt):
+        with self.lock:
+            entry = self.running.pop(prompt, None)
+        if entry is not None:
+            self._waste(prompt, entry[0])
+
+    def _expire(self):
+        cutoff = self.clock() - SPECULATION_TTL
+        with self.lock:
+            expired = [(prompt, entry) for prompt, entry in self.running.items() if entry[1] < cutoff]
+            for prompt, _ in expired:
+                del self.running[prompt]
+        for prompt, entry in expired:
+            self._waste(prompt, entry[0])
+
+    def _waste(self, prompt, future):
+        stats.record('wasted')
+
+        def count(done):
+            tokens = prompts.estimate_tokens(prompt)
+            if done.exception() is None and done.result()[0]:
+                tokens += prompts.estimate_tokens(done.result()[0])
+            stats.record('wasted_tokens', tokens)
+        future.add_done_callback(count)
+
+
+# Function to wrap an interview's grade(entry) so that, while an answer is graded, the follow-up a relevant
+# grade would lead to is already being generated. `follow_up_prompt(question, answer)` renders that prompt.
+def grade_with_follow_up(session, grade, speculator, follow_up_prompt):
+    def speculative_grade(entry):
+        prompt = None
+        if (session.phase in interview_session.SKILL_PHASES and session.base_question
+                and session.follow_up_count < interview_session.SESSION_MAX_FOLLOW_UPS):
+            prompt = follow_up_prompt(session.base_question, session.last_answer)
+            if not speculator.start(prompt):
+                prompt = None
+        is_relevant = grade(entry)
+        if prompt is not None and not is_relevant:
+            speculator.discard(prompt)
+        return is_relevant
+    return speculative_grade
@@ -0,0 +1,19 @@
+import adaptive
+
+
+# A resume with no recognised skill gives the engine nothing to ask about
+def test_no_skills_asks_nothing():
+    interview = adaptive.AdaptiveInterview([])
+    assert interview.next_question() is None
+    assert interview.finished
+    assert interview.sd == 0.0
+    assert interview.summary() == []
+    assert interview.ability == 0.0
+
+
+def test_one_skill_asks_until_recorded():
+    interview = adaptive.AdaptiveInterview(['Python'], max_questions=1)
+    skill, level = interview.next_question()
+    assert skill == 'Python' and level in adaptive.LEVELS
+    interview.record(skill, level, True)
+    assert interview.next_question() is None
@@ -0,0 +1,62 @@
+import contextvars
+import threading
+
+import interview_budget
+import llm_gateway
+from benchmarks.fakes import FakeModel
+
+# Plain prompts have no template, so the response cache never answers them
+PROMPT = "Say hello"
+
+
+def setup_function():
+    llm_gateway.set_gateway(llm_gateway.LLMGateway(requests_per_minute=10 ** 6, burst=10 ** 4))
+
+
+def run_interview(model, calls, results, ready):
+    budget = interview_budget.InterviewBudget(calls_per_skill=2, max_calls=0)
+    with budget.track('Python'):
+        for _ in range(calls):
+            llm_gateway.generate(model, PROMPT)
+        ready.wait()
+    results.append((calls, budget.calls, budget.spent['Python']['calls']))
+
+
+# Two interviews in parallel threads only see their own calls
+def test_calls_are_counted_per_interview():
+    model = FakeModel(latency=0)
+    results, ready = [], threading.Barrier(2)
+    threads = [threading.Thread(target=run_interview, args=(model, calls, results, ready)) for calls in (2, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [(2, 2, 2), (5, 5, 5)]
+
+
+# Calls handed to a worker with copy_context (speculative follow-ups) belong to the interview
+def test_copied_context_is_charged_to_the_interview():
+    model = FakeModel(latency=0)
+    budget = interview_budget.InterviewBudget(calls_per_skill=2, max_calls=3)
+    with budget.track('Python'):
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(llm_gateway.generate, model, PROMPT))
+        worker.start()
+        worker.join()
+        llm_gateway.generate(model, PROMPT)
+    llm_gateway.generate(model, PROMPT)
+    assert budget.calls == 2
+    assert budget.over(1) is None
+    assert budget.over(2) == 'LLM call budget'
+
+
+# Counters are scoped to their block, so budgets created one after another never chain onto each other
+def test_counters_do_not_outlive_their_block():
+    model = FakeModel(latency=0)
+    for _ in range(3):
+        budget = interview_budget.InterviewBudget(calls_per_skill=2)
+        with budget.track('Python'):
+            llm_gateway.generate(model, PROMPT)
+            assert llm_gateway._call_counter.get().parent is None
+        assert budget.calls == 1
+    assert llm_gateway._call_counter.get() is None
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import time
+
+import job_queue
+
+
+def wait_for(pool, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = pool.get(job_id)
+        if job['status'] in job_queue.FINAL_STATUSES:
+            return job
+        time.sleep(0.01)
+    return pool.get(job_id)
+
+
+# Two apps on one jobs file, both registering 'answer': each runs only its own jobs
+def test_apps_sharing_a_file_keep_their_jobs_apart():
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    pools = {}
+    for app in ('first', 'second'):
+        pools[app] = job_queue.WorkerPool(app, backend=job_queue.SQLiteBackend(app, path=path), workers=2,
+                                          poll_interval=0.01)
+        pools[app].register('answer', lambda payload, report, app=app: app)
+    pools['first'].register('interview', lambda payload, report: 'interviewed')
+    pools['second'].start()
+
+    job_ids = [pools['first'].submit('interview', {}), pools['first'].submit('answer', {})]
+    results = [wait_for(pools['first'], job_id) for job_id in job_ids]
+    for pool in pools.values():
+        pool.stop()
+    assert [job['result'] for job in results] == ['interviewed', 'first']
+
+
+def backend(lease_seconds):
+    return job_queue.SQLiteBackend(path=os.path.join(tempfile.mkdtemp(), 'jobs.db'), lease_seconds=lease_seconds)
+
+
+# A handler that reports nothing for longer than the lease keeps its job through the heartbeat
+def test_heartbeat_keeps_a_silent_job():
+    runs = []
+    pool = job_queue.WorkerPool(backend=backend(0.2), workers=2, poll_interval=0.01)
+    pool.register('slow', lambda payload, report: (runs.append(1), time.sleep(0.7), 'ok')[2])
+    job = wait_for(pool, pool.submit('slow', {}))
+    pool.stop()
+    assert (job['status'], job['result'], job['attempts'], len(runs)) == ('done', 'ok', 1, 1)
+
+
+# Once a job is taken over, its first claim can neither renew nor finish it
+def test_finish_needs_the_current_owner():
+    queue = backend(0.05)
+    queue.enqueue('job', 'kind', {})
+    first = queue.claim()
+    time.sleep(0.1)
+    second = queue.claim()
+    assert second['attempts'] == 2
+    assert not queue.renew('job', first['owner'])
+    assert not queue.finish('job', job_queue.DONE, result='late', owner=first['owner'])
+    assert queue.finish('job', job_queue.DONE, result='ok', owner=second['owner'])
+    assert queue.get('job')['result'] == 'ok'
@@ -0,0 +1,32 @@
+import llm_gateway
+from benchmarks.fakes import FakeModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# A burst far beyond the quota: callers that give up return their token, so the bucket recovers
+def test_bucket_recovers_after_overload():
+    clock = FakeClock()
+    # Sleeping does not move the clock: every caller arrives in the same instant, as a concurrent burst does
+    gateway = llm_gateway.LLMGateway(requests_per_minute=60, burst=5, max_wait=10, clock=clock, sleep=lambda s: None)
+    model = FakeModel(latency=0)
+    rejected = 0
+    for _ in range(200):
+        try:
+            gateway.generate(model, "Say hello")
+        except llm_gateway.RateLimitError:
+            rejected += 1
+    assert rejected == 200 - 5 - 10
+    assert gateway.bucket.tokens == -10
+
+    clock.now += 60
+    for _ in range(5):
+        gateway.generate(model, "Say hello")
+    assert gateway.bucket.tokens == 0
+    assert model.call_count == 200 - rejected + 5
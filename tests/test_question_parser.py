@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import question_parser
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ("How do you use async/await in C#?", "How do you use async/await in C#?"),
+    ("What does __init__ do in a Python class?", "What does __init__ do in a Python class?"),
+    ("What does #include do in C++?", "What does #include do in C++?"),
+    ("What does `__init__` return?", "What does __init__ return?"),
+    ("1. **What is a closure?**", "What is a closure?"),
+    ("- *How do you profile Python code?*", "How do you profile Python code?"),
+    ("### What is a REST API?", "What is a REST API?"),
+    ("What is **polymorphism** in Java?", "What is polymorphism in Java?"),
+    ("__What is a decorator?__", "What is a decorator?"),
+])
+def test_clean_question_keeps_code_symbols(raw, expected):
+    assert question_parser.clean_question(raw) == expected
+
+
+def test_json_reply_keeps_language_names():
+    reply = json.dumps({"questions": ["How does C# handle generics?", "What is F# used for?"]})
+    assert question_parser.parse_questions(reply) == ["How does C# handle generics?", "What is F# used for?"]
+
+
+def test_free_text_reply_is_repaired():
+    reply = "Here are some questions:\n1. **What is a C# delegate?**\n2. How does Python's __slots__ save\nmemory?"
+    assert question_parser.parse_questions(reply) == [
+        "What is a C# delegate?", "How does Python's __slots__ save memory?"]
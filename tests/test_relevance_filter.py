@@ -0,0 +1,24 @@
+import pytest
+
+import relevance_filter
+
+
+# Terse answers can be right; only Gemini can tell, so they are never rejected locally
+@pytest.mark.parametrize('question, answer', [
+    ("What is the time complexity of binary search?", "O(log n)"),
+    ("Which HTTP method replaces a resource?", "PUT"),
+])
+def test_short_answers_go_to_the_llm(question, answer):
+    verdict, _ = relevance_filter.prefilter(question, answer)
+    assert verdict is None
+
+
+@pytest.mark.parametrize('answer', ["", "   ", "I don't know", "no idea", "skip"])
+def test_non_answers_are_rejected_locally(answer):
+    assert relevance_filter.prefilter("What is a Python decorator?", answer) == (False, 0.0)
+
+
+def test_on_topic_answer_is_accepted_locally():
+    verdict, score = relevance_filter.prefilter(
+        "What is a Python decorator?", "A Python decorator wraps a function to add behaviour to the function.")
+    assert verdict is True and score >= relevance_filter.RELEVANCE_HIGH
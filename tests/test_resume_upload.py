@@ -0,0 +1,48 @@
+import threading
+import time
+
+import resume_upload
+
+
+# Concurrent uploads of the same resume parse it once, even when the text is empty and so never cached
+def test_concurrent_callers_compute_once():
+    cache = resume_upload.TextCache()
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ""
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+    first.start()
+    started.wait()
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+               for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    # Let the first caller finish only once the others are waiting on its computation
+    while cache.computing['key']['waiters'] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [first] + waiters:
+        thread.join()
+    assert results == [""] * 5
+    assert len(calls) == 1
+    assert cache.computing == {}
+
+
+def test_failed_computation_is_retried():
+    cache = resume_upload.TextCache()
+
+    def fail():
+        raise ValueError("unreadable")
+
+    try:
+        cache.get_or_compute('key', fail)
+    except ValueError:
+        pass
+    assert cache.get_or_compute('key', lambda: "text") == "text"
+    assert cache.get('key') == "text"